@@ -0,0 +1,20 @@
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '0002_access_tracking_and_tiers'
+down_revision = '0001_create_files_table'
+branch_labels = None
+depends_on = None
+
+def upgrade() -> None:
+    op.add_column('files', sa.Column('access_count', sa.Integer(), nullable=False, server_default='0'))
+    op.add_column('files', sa.Column('last_accessed_at', sa.DateTime(timezone=True), nullable=True))
+    op.add_column('files', sa.Column('storage_tier', sa.String(length=16), nullable=False, server_default='hot'))
+    op.create_index('ix_files_storage_tier_last_accessed', 'files', ['storage_tier', 'last_accessed_at'])
+
+def downgrade() -> None:
+    op.drop_index('ix_files_storage_tier_last_accessed', table_name='files')
+    op.drop_column('files', 'storage_tier')
+    op.drop_column('files', 'last_accessed_at')
+    op.drop_column('files', 'access_count')
@@ -0,0 +1,17 @@
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '0003_association_indexes'
+down_revision = '0002_access_tracking_and_tiers'
+branch_labels = None
+depends_on = None
+
+def upgrade() -> None:
+    # Listados y lookups por mensaje/thread solo consideran archivos no eliminados
+    op.create_index('ix_files_message_id_active', 'files', ['message_id'], postgresql_where=sa.text('deleted_at IS NULL'))
+    op.create_index('ix_files_thread_id_active', 'files', ['thread_id'], postgresql_where=sa.text('deleted_at IS NULL'))
+
+def downgrade() -> None:
+    op.drop_index('ix_files_thread_id_active', table_name='files')
+    op.drop_index('ix_files_message_id_active', table_name='files')
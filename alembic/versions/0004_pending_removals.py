@@ -0,0 +1,22 @@
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '0004_pending_removals'
+down_revision = '0003_association_indexes'
+branch_labels = None
+depends_on = None
+
+def upgrade() -> None:
+    op.create_table(
+        'pending_removals',
+        sa.Column('id', sa.Integer(), primary_key=True, autoincrement=True),
+        sa.Column('bucket', sa.String(length=63), nullable=False),
+        sa.Column('object_key', sa.String(length=512), nullable=False),
+        sa.Column('remove_after', sa.DateTime(timezone=True), nullable=False),
+    )
+    op.create_index('ix_pending_removals_remove_after', 'pending_removals', ['remove_after'])
+
+def downgrade() -> None:
+    op.drop_index('ix_pending_removals_remove_after', table_name='pending_removals')
+    op.drop_table('pending_removals')
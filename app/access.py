@@ -0,0 +1,65 @@
+"""Conteo de accesos en memoria con volcado periódico por lotes a la base."""
+import asyncio
+import logging
+from datetime import datetime, timezone
+from uuid import UUID
+from sqlalchemy import bindparam, update
+
+from .config import settings
+from .db import SessionLocal
+from .models import File as FileModel
+
+logger = logging.getLogger("filesvc.access")
+
+_files = FileModel.__table__
+_flush_stmt = (
+    update(_files)
+    .where(_files.c.id == bindparam("b_id"))
+    .values(
+        access_count=_files.c.access_count + bindparam("b_hits"),
+        last_accessed_at=bindparam("b_last"),
+    )
+)
+
+class AccessTracker:
+    def __init__(self):
+        # file_id -> [hits, último acceso]
+        self._pending: dict[UUID, list] = {}
+
+    def record(self, file_id: UUID):
+        now = datetime.now(timezone.utc)
+        entry = self._pending.get(file_id)
+        if entry is None:
+            self._pending[file_id] = [1, now]
+        else:
+            entry[0] += 1
+            entry[1] = now
+
+    async def flush(self):
+        if not self._pending:
+            return
+        pending, self._pending = self._pending, {}
+        rows = [{"b_id": file_id, "b_hits": hits, "b_last": last} for file_id, (hits, last) in pending.items()]
+        try:
+            async with SessionLocal() as session:
+                # Un único UPDATE ejecutado en modo executemany
+                await session.execute(_flush_stmt, rows)
+                await session.commit()
+        except Exception:
+            logger.exception("No se pudieron volcar %d contadores de acceso", len(rows))
+            # Se reincorporan para el próximo intento
+            for file_id, (hits, last) in pending.items():
+                entry = self._pending.setdefault(file_id, [0, last])
+                entry[0] += hits
+                entry[1] = max(entry[1], last)
+
+    async def run(self, interval: float = None):
+        interval = interval or settings.access_flush_interval
+        try:
+            while True:
+                await asyncio.sleep(interval)
+                await self.flush()
+        finally:
+            await self.flush()
+
+access_tracker = AccessTracker()
@@ -0,0 +1,124 @@
+"""Control de admisión de subidas por proceso.
+
+Limita los bytes en vuelo (según Content-Length) y la cantidad de subidas
+concurrentes. Lo que no cabe espera en una cola FIFO acotada o se rechaza con
+503 + Retry-After antes de leer el cuerpo.
+"""
+import asyncio
+from collections import deque
+from fastapi.responses import JSONResponse
+from .config import settings
+from .metrics import Counter, Gauge
+
+upload_queue_depth = Gauge("filesvc_upload_queue_depth", "Subidas esperando admisión")
+upload_in_flight = Gauge("filesvc_upload_in_flight", "Subidas admitidas en curso")
+upload_in_flight_bytes = Gauge("filesvc_upload_in_flight_bytes", "Bytes de subidas admitidas en curso")
+upload_rejected = Counter("filesvc_upload_rejected_total", "Subidas rechazadas por saturación")
+
+class AdmissionRejected(Exception):
+    pass
+
+class UploadAdmission:
+    def __init__(self, max_bytes: int, max_concurrent: int, max_queue: int, queue_timeout: float):
+        self.max_bytes = max_bytes
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self._active = 0
+        self._bytes = 0
+        self._waiters: deque[tuple[int, asyncio.Future]] = deque()
+
+    def _fits(self, size: int) -> bool:
+        if self._active >= self.max_concurrent:
+            return False
+        # Una subida mayor que el límite solo entra cuando no hay otras en curso
+        return self._active == 0 or self._bytes + size <= self.max_bytes
+
+    def _admit(self, size: int):
+        self._active += 1
+        self._bytes += size
+        upload_in_flight.set(self._active)
+        upload_in_flight_bytes.set(self._bytes)
+
+    async def acquire(self, size: int):
+        if not self._waiters and self._fits(size):
+            self._admit(size)
+            return
+        if len(self._waiters) >= self.max_queue:
+            upload_rejected.inc()
+            raise AdmissionRejected("Cola de subidas llena")
+
+        waiter = (size, asyncio.get_running_loop().create_future())
+        self._waiters.append(waiter)
+        upload_queue_depth.set(len(self._waiters))
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter[1]), self.queue_timeout)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as exc:
+            if waiter[1].done() and not waiter[1].cancelled():
+                # Fue admitida justo al expirar: se devuelve el cupo
+                self.release(size)
+            else:
+                waiter[1].cancel()
+                self._waiters.remove(waiter)
+                upload_queue_depth.set(len(self._waiters))
+            if isinstance(exc, asyncio.CancelledError):
+                raise
+            upload_rejected.inc()
+            raise AdmissionRejected("Tiempo de espera en cola agotado") from None
+
+    def release(self, size: int):
+        self._active -= 1
+        self._bytes -= size
+        # Se despierta en orden estricto de llegada mientras haya capacidad
+        while self._waiters and self._fits(self._waiters[0][0]):
+            next_size, future = self._waiters.popleft()
+            self._admit(next_size)
+            future.set_result(None)
+        upload_in_flight.set(self._active)
+        upload_in_flight_bytes.set(self._bytes)
+        upload_queue_depth.set(len(self._waiters))
+
+class UploadAdmissionMiddleware:
+    """Middleware ASGI: la admisión ocurre antes de que FastAPI lea el multipart."""
+
+    def __init__(self, app, admission: UploadAdmission, path: str = "/v1/files"):
+        self.app = app
+        self.admission = admission
+        self.path = path
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] != "POST" or scope["path"] != self.path:
+            await self.app(scope, receive, send)
+            return
+
+        size = settings.upload_default_size
+        for name, value in scope["headers"]:
+            if name == b"content-length":
+                try:
+                    size = int(value)
+                except ValueError:
+                    pass
+                break
+
+        try:
+            await self.admission.acquire(size)
+        except AdmissionRejected as exc:
+            response = JSONResponse(
+                status_code=503,
+                content={"error": {"code": "UPLOADS_SATURATED", "message": str(exc), "details": None}},
+                headers={"Retry-After": str(settings.upload_retry_after)},
+            )
+            await response(scope, receive, send)
+            return
+
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.admission.release(size)
+
+upload_admission = UploadAdmission(
+    max_bytes=settings.upload_max_inflight_bytes,
+    max_concurrent=settings.upload_max_concurrent,
+    max_queue=settings.upload_max_queue,
+    queue_timeout=settings.upload_queue_timeout,
+)
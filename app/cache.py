@@ -0,0 +1,145 @@
+"""Caché LRU en memoria para cuerpos de objetos pequeños (avatares, stickers...).
+
+Acotada por bytes totales y tamaño máximo por objeto. La clave es el
+object_key y el checksum SHA-256 actúa como validador (ETag). Las faltas
+concurrentes de una misma clave comparten una sola lectura a MinIO.
+Las lecturas por file_id (sin pasar por la base) solo valen durante `ttl`
+segundos: si se pierde un files.deleted.v1, el borrado se nota como mucho tras ese tiempo.
+"""
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime
+from uuid import UUID
+
+from .config import settings
+from .events import event_bus
+from .metrics import Counter, Gauge
+
+logger = logging.getLogger("filesvc.cache")
+
+cache_hits = Counter("filesvc_object_cache_hits_total", "Lecturas servidas desde la caché de objetos")
+cache_misses = Counter("filesvc_object_cache_misses_total", "Lecturas que fueron a MinIO")
+cache_bytes = Gauge("filesvc_object_cache_bytes", "Bytes ocupados por la caché de objetos")
+
+@dataclass(frozen=True)
+class CachedObject:
+    file_id: UUID
+    object_key: str
+    checksum: str
+    filename: str
+    mime_type: str
+    created_at: datetime
+    body: bytes
+    expires_at: float
+
+class ObjectCache:
+    def __init__(self, max_bytes: int, max_object_size: int, ttl: float):
+        self.max_bytes = max_bytes
+        self.max_object_size = max_object_size
+        self.ttl = ttl
+        self._entries: OrderedDict[str, CachedObject] = OrderedDict()
+        self._keys_by_file_id: dict[UUID, str] = {}
+        # Una tarea por clave en vuelo; quienes la esperan usan shield, así que si se
+        # cancela la request que la inició las demás siguen recibiendo el resultado
+        self._inflight: dict[str, asyncio.Task] = {}
+        self._size = 0
+
+    def cacheable(self, size: int) -> bool:
+        return self.max_bytes > 0 and size <= min(self.max_object_size, self.max_bytes)
+
+    def get_by_file_id(self, file_id: UUID) -> CachedObject | None:
+        key = self._keys_by_file_id.get(file_id)
+        entry = self._entries.get(key) if key else None
+        if entry and entry.expires_at <= time.monotonic():
+            # Vencida: la próxima lectura pasa por la base (y comprueba deleted_at)
+            self.invalidate(object_key=key)
+            return None
+        if entry:
+            self._entries.move_to_end(key)
+            cache_hits.inc()
+        return entry
+
+    async def get_or_load(self, file, loader) -> CachedObject:
+        """Devuelve el objeto de `file` desde la caché o llamando a `loader()` una sola vez."""
+        entry = self._entries.get(file.object_key)
+        if entry and entry.checksum == file.checksum_sha256:
+            self._entries.move_to_end(file.object_key)
+            cache_hits.inc()
+            return entry
+
+        task = self._inflight.get(file.object_key)
+        if task is None:
+            cache_misses.inc()
+            task = asyncio.create_task(self._load(file, loader))
+            self._inflight[file.object_key] = task
+            task.add_done_callback(lambda done: self._finished(file.object_key, done))
+        return await asyncio.shield(task)
+
+    async def _load(self, file, loader) -> CachedObject:
+        body = await loader()
+        entry = CachedObject(
+            file.id,
+            file.object_key,
+            file.checksum_sha256,
+            file.filename,
+            file.mime_type,
+            file.created_at,
+            body,
+            time.monotonic() + self.ttl,
+        )
+        self._store(entry)
+        return entry
+
+    def _finished(self, object_key: str, task: asyncio.Task):
+        if self._inflight.get(object_key) is task:
+            del self._inflight[object_key]
+        if not task.cancelled():
+            # Evita "Task exception was never retrieved" si nadie más esperaba
+            task.exception()
+
+    def _store(self, entry: CachedObject):
+        self.invalidate(object_key=entry.object_key)
+        self._entries[entry.object_key] = entry
+        self._keys_by_file_id[entry.file_id] = entry.object_key
+        self._size += len(entry.body)
+        while self._size > self.max_bytes and self._entries:
+            _, evicted = self._entries.popitem(last=False)
+            self._forget(evicted)
+        cache_bytes.set(self._size)
+
+    def _forget(self, entry: CachedObject):
+        self._size -= len(entry.body)
+        if self._keys_by_file_id.get(entry.file_id) == entry.object_key:
+            del self._keys_by_file_id[entry.file_id]
+
+    def invalidate(self, object_key: str | None = None, file_id: UUID | None = None):
+        if object_key is None and file_id is not None:
+            object_key = self._keys_by_file_id.get(file_id)
+        entry = self._entries.pop(object_key, None) if object_key else None
+        if entry:
+            self._forget(entry)
+            cache_bytes.set(self._size)
+
+    async def _on_deleted(self, event: dict):
+        data = event.get("data") or {}
+        file_id = data.get("file_id")
+        self.invalidate(object_key=data.get("object_key"), file_id=UUID(file_id) if file_id else None)
+
+    async def listen_for_deletions(self, retry_seconds: float = 5.0):
+        """Suscribe la caché a files.deleted.v1 (borrados hechos por cualquier réplica)."""
+        while True:
+            try:
+                await event_bus.subscribe("files.deleted.v1", self._on_deleted)
+                return
+            except Exception as exc:
+                logger.warning("No se pudo suscribir a files.deleted.v1: %s", exc)
+                await asyncio.sleep(retry_seconds)
+
+object_cache = ObjectCache(
+    max_bytes=settings.object_cache_max_bytes,
+    max_object_size=settings.object_cache_max_object_size,
+    ttl=settings.object_cache_ttl_seconds,
+)
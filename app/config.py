@@ -18,6 +18,10 @@ class Settings(BaseSettings):
     minio_secure: bool = Field(False, alias="MINIO_SECURE")
     minio_bucket: str = Field("files", alias="MINIO_BUCKET")
     public_minio_url: str = Field("http://localhost:9000", alias="PUBLIC_MINIO_URL")
+    # Shards: "bucket[@endpoint[@public_url]]" separados por coma; vacío = solo MINIO_BUCKET
+    minio_shards: str = Field("", alias="MINIO_SHARDS")
+    # Capa fría: "bucket[@endpoint[@public_url]]"; vacío = sin tiering
+    minio_cold_bucket: str = Field("", alias="MINIO_COLD_BUCKET")
 
 
     rabbitmq_host: str = Field("rabbitmq", alias="RABBITMQ_HOST")
@@ -26,6 +30,40 @@ class Settings(BaseSettings):
     rabbitmq_password: str = Field("guest", alias="RABBITMQ_PASSWORD")
     rabbitmq_exchange: str = Field("files", alias="RABBITMQ_EXCHANGE")
 
+    # Chequeos de dependencias (segundos)
+    startup_check_timeout: float = Field(3.0, alias="STARTUP_CHECK_TIMEOUT")
+    readiness_check_timeout: float = Field(2.0, alias="READINESS_CHECK_TIMEOUT")
+
+    # Admisión de subidas (por proceso)
+    upload_max_inflight_bytes: int = Field(128 * 1024 * 1024, alias="UPLOAD_MAX_INFLIGHT_BYTES")
+    upload_max_concurrent: int = Field(16, alias="UPLOAD_MAX_CONCURRENT")
+    upload_max_queue: int = Field(64, alias="UPLOAD_MAX_QUEUE")  # 0 = rechazar sin esperar
+    upload_queue_timeout: float = Field(10.0, alias="UPLOAD_QUEUE_TIMEOUT")
+    upload_retry_after: int = Field(2, alias="UPLOAD_RETRY_AFTER")
+    upload_default_size: int = Field(8 * 1024 * 1024, alias="UPLOAD_DEFAULT_SIZE")  # sin Content-Length
+
+    # Seguimiento de accesos y tiering hot/cold
+    access_flush_interval: float = Field(30.0, alias="ACCESS_FLUSH_INTERVAL")
+    tiering_enabled: bool = Field(False, alias="TIERING_ENABLED")
+    tiering_cold_after_days: float = Field(7.0, alias="TIERING_COLD_AFTER_DAYS")
+    tiering_interval: float = Field(3600.0, alias="TIERING_INTERVAL")
+    tiering_batch_size: int = Field(50, alias="TIERING_BATCH_SIZE")
+
+    # Borrado diferido de copias obsoletas (tabla pending_removals)
+    removal_sweep_interval: float = Field(60.0, alias="REMOVAL_SWEEP_INTERVAL")
+    removal_batch_size: int = Field(100, alias="REMOVAL_BATCH_SIZE")
+
+    # Caché en memoria de objetos pequeños (0 = deshabilitada)
+    object_cache_max_bytes: int = Field(64 * 1024 * 1024, alias="OBJECT_CACHE_MAX_BYTES")
+    object_cache_max_object_size: int = Field(256 * 1024, alias="OBJECT_CACHE_MAX_OBJECT_SIZE")
+    # Segundos que una entrada se sirve sin volver a consultar la base (acota el daño si se pierde un files.deleted.v1)
+    object_cache_ttl_seconds: float = Field(60.0, alias="OBJECT_CACHE_TTL_SECONDS")
+
+    # Máximo de IDs (message_ids + file_ids) por llamada a POST /v1/files:lookup
+    lookup_max_ids: int = Field(500, alias="LOOKUP_MAX_IDS")
+    # Filas por UPDATE (y por transacción) en DELETE /v1/files?thread_id|message_id
+    bulk_delete_chunk_size: int = Field(500, alias="BULK_DELETE_CHUNK_SIZE")
+
     @property
     def database_url(self) -> str:
         return f"postgresql+asyncpg://{self.postgres_user}:{self.postgres_password}@{self.postgres_host}:{self.postgres_port}/{self.postgres_db}"
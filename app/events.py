@@ -8,18 +8,35 @@ class EventBus:
         self._conn = None
         self._channel = None
         self._exchange = None
+        self._lock = asyncio.Lock()
+
+    @property
+    def is_connected(self) -> bool:
+        return self._conn is not None and not self._conn.is_closed
 
     async def connect(self):
         if self._conn:
             return
-        self._conn = await aio_pika.connect_robust(
-            host=settings.rabbitmq_host,
-            port=settings.rabbitmq_port,
-            login=settings.rabbitmq_user,
-            password=settings.rabbitmq_password,
-        )
-        self._channel = await self._conn.channel()
-        self._exchange = await self._channel.declare_exchange(settings.rabbitmq_exchange, aio_pika.ExchangeType.TOPIC, durable=True)
+        # Evita abrir dos conexiones si varios publish/chequeos llegan a la vez
+        async with self._lock:
+            if self._conn:
+                return
+            conn = await aio_pika.connect_robust(
+                host=settings.rabbitmq_host,
+                port=settings.rabbitmq_port,
+                login=settings.rabbitmq_user,
+                password=settings.rabbitmq_password,
+            )
+            self._channel = await conn.channel()
+            self._exchange = await self._channel.declare_exchange(settings.rabbitmq_exchange, aio_pika.ExchangeType.TOPIC, durable=True)
+            self._conn = conn
+
+    async def close(self):
+        if self._conn:
+            await self._conn.close()
+        self._conn = None
+        self._channel = None
+        self._exchange = None
 
     async def publish(self, routing_key: str, payload: dict):
         await self.connect()
@@ -27,4 +44,27 @@ class EventBus:
         message = aio_pika.Message(body=body, content_type="application/json")
         await self._exchange.publish(message, routing_key=routing_key)
 
+    async def publish_many(self, routing_key: str, payloads: list):
+        """Publica varios eventos sin esperar la confirmación de cada uno antes del siguiente."""
+        await self.connect()
+        await asyncio.gather(*(
+            self._exchange.publish(
+                aio_pika.Message(body=json.dumps(payload, ensure_ascii=False).encode("utf-8"), content_type="application/json"),
+                routing_key=routing_key,
+            )
+            for payload in payloads
+        ))
+
+    async def subscribe(self, routing_key: str, handler):
+        """Consume eventos del exchange con una cola exclusiva de este proceso."""
+        await self.connect()
+        queue = await self._channel.declare_queue("", exclusive=True, auto_delete=True)
+        await queue.bind(self._exchange, routing_key=routing_key)
+
+        async def on_message(message: aio_pika.abc.AbstractIncomingMessage):
+            async with message.process():
+                await handler(json.loads(message.body))
+
+        await queue.consume(on_message)
+
 event_bus = EventBus()
@@ -0,0 +1,65 @@
+import asyncio
+import logging
+from sqlalchemy import text
+from .db import engine
+from .storage import check_buckets, ensure_bucket
+from .events import event_bus
+
+logger = logging.getLogger("filesvc.health")
+
+async def check_database(timeout: float):
+    async with engine.connect() as conn:
+        await conn.execute(text("SELECT 1"))
+
+async def check_storage(timeout: float):
+    # El cliente de MinIO es bloqueante: se ejecuta en un hilo aparte, con su propio
+    # timeout HTTP para que el hilo no siga corriendo después de que wait_for se rinda
+    await asyncio.to_thread(check_buckets, timeout)
+
+async def prepare_storage(timeout: float):
+    # Solo al arrancar: crea los buckets que falten (/readyz nunca escribe)
+    await asyncio.to_thread(ensure_bucket, timeout)
+
+async def check_broker(timeout: float):
+    # Solo mira el estado: conectar es trabajo del arranque y de quien publica o consume
+    if not event_bus.is_connected:
+        raise RuntimeError("Sin conexión con RabbitMQ")
+
+async def connect_broker(timeout: float):
+    await event_bus.connect()
+    await check_broker(timeout)
+
+CHECKS = {
+    "database": check_database,
+    "storage": check_storage,
+    "broker": check_broker,
+}
+
+STARTUP_CHECKS = {**CHECKS, "storage": prepare_storage, "broker": connect_broker}
+
+async def _run_check(name: str, check, timeout: float) -> tuple[str, dict]:
+    try:
+        await asyncio.wait_for(check(timeout), timeout)
+    except asyncio.TimeoutError:
+        return name, {"status": "timeout"}
+    except Exception as exc:
+        return name, {"status": "error", "message": str(exc)}
+    return name, {"status": "ok"}
+
+async def run_checks(timeout: float, checks: dict = CHECKS) -> dict[str, dict]:
+    """Ejecuta los chequeos en paralelo, cada uno con su propio timeout."""
+    results = await asyncio.gather(*(_run_check(name, check, timeout) for name, check in checks.items()))
+    return dict(results)
+
+def log_startup_results(task: asyncio.Task):
+    """Done-callback del calentamiento: deja en el log qué dependencia no respondió."""
+    if task.cancelled():
+        return
+    if task.exception() is not None:
+        logger.error("Falló el calentamiento de dependencias", exc_info=task.exception())
+        return
+    failed = {name: result for name, result in task.result().items() if result["status"] != "ok"}
+    if failed:
+        logger.warning("Dependencias no disponibles al arrancar: %s", failed)
+    else:
+        logger.info("Dependencias listas")
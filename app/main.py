@@ -1,17 +1,42 @@
+import asyncio
 from fastapi import FastAPI, Request
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
 from .config import settings
 from .routers import files as files_router
-from .storage import ensure_bucket
+from .db import engine
 from .events import event_bus
+from .health import STARTUP_CHECKS, log_startup_results, run_checks
+from .access import access_tracker
+from . import removals
+from .tiering import tiering
+from .cache import object_cache
+from .admission import UploadAdmissionMiddleware, upload_admission
+from . import metrics
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    ensure_bucket()
-    await event_bus.connect()
+    # Las dependencias se calientan en segundo plano y en paralelo: el proceso
+    # acepta tráfico de inmediato y /readyz indica cuándo están disponibles.
+    warmup = asyncio.create_task(run_checks(settings.startup_check_timeout, STARTUP_CHECKS))
+    warmup.add_done_callback(log_startup_results)
+    background = [
+        asyncio.create_task(access_tracker.run()),
+        asyncio.create_task(object_cache.listen_for_deletions()),
+        # Copias obsoletas registradas por rebalanceo/tiering, aunque el proceso que las movió ya no exista
+        asyncio.create_task(removals.run()),
+    ]
+    if tiering.enabled:
+        background.append(asyncio.create_task(tiering.run()))
     yield
+    warmup.cancel()
+    for task in background:
+        task.cancel()
+    # access_tracker.run() vuelca los contadores pendientes al cancelarse
+    await asyncio.gather(*background, return_exceptions=True)
+    await event_bus.close()
+    await engine.dispose()
 
 app = FastAPI(
     title="Servicio de Archivos",
@@ -20,6 +45,10 @@ app = FastAPI(
     lifespan=lifespan,
 )
 
+# Admisión de subidas: se evalúa antes de leer el cuerpo del multipart
+# (se registra antes que CORS para que los 503 también lleven sus headers)
+app.add_middleware(UploadAdmissionMiddleware, admission=upload_admission)
+
 # CORS (ajusta dominios en prod)
 app.add_middleware(
     CORSMiddleware,
@@ -32,8 +61,22 @@ app.add_middleware(
 
 @app.get("/healthz")
 async def healthz():
+    # Liveness: solo indica que el proceso responde, sin tocar dependencias
     return {"status":"ok","service": settings.app_name, "env": settings.app_env}
 
+@app.get("/readyz")
+async def readyz():
+    checks = await run_checks(settings.readiness_check_timeout)
+    ready = all(check["status"] == "ok" for check in checks.values())
+    return JSONResponse(
+        status_code=200 if ready else 503,
+        content={"status": "ok" if ready else "unavailable", "checks": checks},
+    )
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics_endpoint():
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
 # Error handler uniforme
 @app.exception_handler(Exception)
 async def unhandled(request: Request, exc: Exception):
@@ -0,0 +1,48 @@
+"""Métricas en formato de texto de Prometheus, sin dependencias externas."""
+import threading
+
+_registry: list = []
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, help: str):
+        self.name = name
+        self.help = help
+        self._value = 0.0
+        self._lock = threading.Lock()
+        _registry.append(self)
+
+    @property
+    def value(self) -> float:
+        return self._value
+
+    def render(self) -> str:
+        return (
+            f"# HELP {self.name} {self.help}\n"
+            f"# TYPE {self.name} {self.kind}\n"
+            f"{self.name} {self._value:g}\n"
+        )
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount: float = 1):
+        with self._lock:
+            self._value += amount
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def set(self, value: float):
+        self._value = value
+
+    def inc(self, amount: float = 1):
+        with self._lock:
+            self._value += amount
+
+    def dec(self, amount: float = 1):
+        self.inc(-amount)
+
+def render() -> str:
+    return "".join(metric.render() for metric in _registry)
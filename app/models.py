@@ -22,3 +22,17 @@ class File(Base):
 
     created_at: Mapped["DateTime"] = mapped_column(DateTime(timezone=True), server_default=func.now())
     deleted_at: Mapped["DateTime | None"] = mapped_column(DateTime(timezone=True), nullable=True)
+
+    # Accesos (se acumulan en memoria y se vuelcan por lotes) y capa de almacenamiento
+    access_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default=text("0"))
+    last_accessed_at: Mapped["DateTime | None"] = mapped_column(DateTime(timezone=True), nullable=True)
+    storage_tier: Mapped[str] = mapped_column(String(16), nullable=False, default="hot", server_default="hot")
+
+class PendingRemoval(Base):
+    """Copia obsoleta de un objeto (tras rebalanceo o cambio de capa) que se borra pasado su período de gracia."""
+    __tablename__ = "pending_removals"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    bucket: Mapped[str] = mapped_column(String(63), nullable=False)
+    object_key: Mapped[str] = mapped_column(String(512), nullable=False)
+    remove_after: Mapped["DateTime"] = mapped_column(DateTime(timezone=True), nullable=False, index=True)
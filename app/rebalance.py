@@ -0,0 +1,91 @@
+"""Rebalanceo de objetos tras agregar shards.
+
+Uso: `python -m app.rebalance [--batch-size N] [--pause S] [--grace-seconds S]`
+
+Por cada archivo cuyo bucket no coincide con el shard que le asigna el anillo:
+1. se copia el objeto al shard nuevo,
+2. se actualiza la columna `bucket` (las lecturas pasan a usar la copia nueva)
+   y, en la misma transacción, se registra el original en `pending_removals`,
+3. el barrido de las réplicas del servicio (app.removals) borra el original
+   pasado el período de gracia, para no romper URLs prefirmadas emitidas antes
+   del cambio. El job no espera ese plazo: si se interrumpe, nada queda huérfano.
+"""
+import argparse
+import asyncio
+import logging
+from sqlalchemy import select, update
+
+from .db import SessionLocal, engine
+from .models import File as FileModel
+from .removals import schedule_removal
+from .storage import copy_object, ensure_bucket, shard_for
+from .tiering import HOT
+
+logger = logging.getLogger("filesvc.rebalance")
+
+async def rebalance(batch_size: int = 100, pause: float = 0.0, grace_seconds: float = 3600) -> dict:
+    await asyncio.to_thread(ensure_bucket)
+    stats = {"scanned": 0, "moved": 0, "discarded": 0, "failed": 0}
+    last_id = None
+
+    while True:
+        async with SessionLocal() as session:
+            # Los archivos en la capa fría no pertenecen al anillo
+            stmt = (
+                select(FileModel.id, FileModel.bucket, FileModel.object_key)
+                .where(FileModel.storage_tier == HOT)
+                .order_by(FileModel.id)
+                .limit(batch_size)
+            )
+            if last_id is not None:
+                stmt = stmt.where(FileModel.id > last_id)
+            rows = (await session.execute(stmt)).all()
+            if not rows:
+                break
+            last_id = rows[-1].id
+
+            for row in rows:
+                stats["scanned"] += 1
+                target = shard_for(row.object_key)
+                if row.bucket == target:
+                    continue
+                try:
+                    await asyncio.to_thread(copy_object, row.object_key, row.bucket, target)
+                except Exception:
+                    logger.exception("No se pudo copiar %s desde %s a %s", row.object_key, row.bucket, target)
+                    stats["failed"] += 1
+                    continue
+                # El puntero solo cambia si nadie lo modificó mientras se copiaba
+                res = await session.execute(
+                    update(FileModel)
+                    .where(FileModel.id == row.id, FileModel.bucket == row.bucket, FileModel.storage_tier == HOT)
+                    .values(bucket=target)
+                )
+                if res.rowcount:
+                    schedule_removal(session, row.bucket, row.object_key, grace_seconds)
+                    stats["moved"] += 1
+                else:
+                    # El archivo cambió o se borró durante la copia: la copia nueva queda huérfana.
+                    # Se borra en el próximo barrido, que antes comprueba que nadie apunte a ella
+                    schedule_removal(session, target, row.object_key, 0)
+                    stats["discarded"] += 1
+                await session.commit()
+
+        if pause:
+            await asyncio.sleep(pause)
+
+    await engine.dispose()
+    return stats
+
+def main():
+    parser = argparse.ArgumentParser(description="Mueve objetos al shard que les corresponde")
+    parser.add_argument("--batch-size", type=int, default=100)
+    parser.add_argument("--pause", type=float, default=0.0, help="Segundos de espera entre lotes")
+    parser.add_argument("--grace-seconds", type=float, default=3600, help="Gracia antes de que se borren los originales")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    stats = asyncio.run(rebalance(args.batch_size, args.pause, args.grace_seconds))
+    logger.info("Rebalanceo terminado: %s", stats)
+
+if __name__ == "__main__":
+    main()
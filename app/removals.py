@@ -0,0 +1,75 @@
+"""Borrado diferido y persistente de copias obsoletas de objetos.
+
+Quien mueve un objeto (rebalanceo, tiering) registra el original en
+`pending_removals` en la misma transacción que cambia el puntero del archivo.
+Un barrido periódico en cada réplica borra los que ya cumplieron su gracia;
+si el proceso muere, otra réplica (o el siguiente arranque) retoma el trabajo.
+"""
+import asyncio
+import logging
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .config import settings
+from .db import SessionLocal
+from .metrics import Counter
+from .models import File as FileModel, PendingRemoval
+from .storage import remove_object
+
+logger = logging.getLogger("filesvc.removals")
+
+removals_done = Counter("filesvc_pending_removals_total", "Copias obsoletas borradas tras su período de gracia")
+
+def schedule_removal(session: AsyncSession, bucket: str, object_key: str, grace_seconds: float):
+    """Agrega el borrado a la transacción de `session` (se confirma con su commit)."""
+    session.add(PendingRemoval(
+        bucket=bucket,
+        object_key=object_key,
+        remove_after=datetime.now(timezone.utc) + timedelta(seconds=grace_seconds),
+    ))
+
+async def purge_due(batch_size: int = None) -> int:
+    """Borra un lote de copias vencidas; devuelve cuántas entradas se resolvieron."""
+    batch_size = batch_size or settings.removal_batch_size
+    async with SessionLocal() as session:
+        # SKIP LOCKED: varias réplicas pueden barrer a la vez sin repetir trabajo
+        res = await session.execute(
+            select(PendingRemoval)
+            .where(PendingRemoval.remove_after <= datetime.now(timezone.utc))
+            .order_by(PendingRemoval.remove_after)
+            .limit(batch_size)
+            .with_for_update(skip_locked=True)
+        )
+        done = 0
+        for entry in res.scalars().all():
+            # Se bloquea la fila del archivo hasta el commit: una promoción o movimiento en
+            # curso termina antes de decidir, y ninguno nuevo puede apuntar a esta copia
+            # mientras se borra. Si el archivo volvió a esa ubicación, la copia está en uso
+            current_bucket = await session.scalar(
+                select(FileModel.bucket)
+                .where(FileModel.object_key == entry.object_key)
+                .with_for_update()
+            )
+            if current_bucket != entry.bucket:
+                try:
+                    # Borrar un objeto inexistente no falla: el barrido es idempotente
+                    await asyncio.to_thread(remove_object, entry.bucket, entry.object_key)
+                except Exception:
+                    logger.exception("No se pudo borrar %s/%s; se reintenta en el próximo barrido", entry.bucket, entry.object_key)
+                    continue
+                removals_done.inc()
+            await session.delete(entry)
+            done += 1
+        await session.commit()
+    return done
+
+async def run(interval: float = None):
+    interval = interval or settings.removal_sweep_interval
+    while True:
+        try:
+            while await purge_due() >= settings.removal_batch_size:
+                pass
+        except Exception:
+            logger.exception("Fallo en el barrido de borrados pendientes")
+        await asyncio.sleep(interval)
@@ -1,28 +1,47 @@
-from fastapi import APIRouter, UploadFile, File as FFile, Depends, HTTPException, Query
+import asyncio
+from fastapi import APIRouter, UploadFile, File as FFile, Form, Depends, HTTPException, Query, Request, Response
 from fastapi import status
+from fastapi.responses import StreamingResponse
 from typing import Optional, List
 from uuid import UUID, uuid4
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, update
+from sqlalchemy import String, any_, bindparam, or_, select, update
+from sqlalchemy.dialects.postgresql import ARRAY, UUID as PGUUID
 from datetime import datetime, timezone
 from io import BytesIO
+from urllib.parse import quote
+from email.utils import format_datetime, parsedate_to_datetime
 
 from ..db import get_session
 from ..models import File as FileModel
-from ..schemas import FileOut
-from ..storage import put_object, presign_get
+from ..schemas import FileLookupIn, FileLookupOut, FileOut
+from ..storage import put_object, presign_get, get_object_bytes, iter_object
 from ..events import event_bus
 from ..utils import sha256_bytesio
+from ..access import access_tracker
+from ..tiering import COLD, tiering
+from ..cache import object_cache
+from ..config import settings
 
 router = APIRouter(prefix="/v1/files", tags=["files"])
 
 @router.post("", response_model=FileOut, status_code=status.HTTP_201_CREATED)
 async def upload_file(
-    upload: UploadFile = FFile(...),
+    upload: Optional[UploadFile] = FFile(None),
+    file: Optional[UploadFile] = FFile(None),
     message_id: Optional[str] = None,
     thread_id: Optional[str] = None,
+    form_message_id: Optional[str] = Form(None, alias="message_id"),
+    form_thread_id: Optional[str] = Form(None, alias="thread_id"),
     session: AsyncSession = Depends(get_session),
 ):
+    # El gateway retransmite el multipart del navegador tal cual: el archivo puede
+    # venir como `upload` o `file` y las asociaciones como query o campos del form
+    upload = upload or file
+    message_id = message_id or form_message_id
+    thread_id = thread_id or form_thread_id
+    if not upload:
+        raise HTTPException(status_code=400, detail={"code":"MISSING_FILE","message":"Debe enviar un archivo"})
     if not message_id and not thread_id:
         raise HTTPException(status_code=400, detail={"code":"MISSING_ASSOCIATION","message":"Debe enviar message_id o thread_id"})
 
@@ -93,6 +112,108 @@ async def list_files(
     res = await session.execute(stmt.order_by(FileModel.created_at.desc()))
     return res.scalars().all()
 
+@router.post(":lookup", response_model=FileLookupOut)
+async def lookup_files(body: FileLookupIn, session: AsyncSession = Depends(get_session)):
+    # Una sola consulta con los IDs como arreglo (= ANY(:ids)): mismo SQL sin importar cuántos vengan
+    message_ids = list(dict.fromkeys(body.message_ids))
+    file_ids = list(dict.fromkeys(body.file_ids))
+    if not message_ids and not file_ids:
+        raise HTTPException(status_code=400, detail={"code":"MISSING_FILTER","message":"Debe enviar message_ids o file_ids"})
+    if len(message_ids) + len(file_ids) > settings.lookup_max_ids:
+        raise HTTPException(status_code=400, detail={"code":"TOO_MANY_IDS","message":f"Máximo {settings.lookup_max_ids} IDs por consulta"})
+    conditions = []
+    if message_ids:
+        conditions.append(FileModel.message_id == any_(bindparam("message_ids", message_ids, type_=ARRAY(String(36)))))
+    if file_ids:
+        conditions.append(FileModel.id == any_(bindparam("file_ids", file_ids, type_=ARRAY(PGUUID(as_uuid=True)))))
+    stmt = select(FileModel).where(FileModel.deleted_at.is_(None), or_(*conditions))
+    res = await session.execute(stmt.order_by(FileModel.created_at.desc()))
+
+    requested_files = set(file_ids)
+    messages = {message_id: [] for message_id in message_ids}
+    files = []
+    for file in res.scalars().all():
+        if file.message_id in messages:
+            messages[file.message_id].append(file)
+        if file.id in requested_files:
+            files.append(file)
+    found = {file.id for file in files}
+    return {
+        "messages": messages,
+        "files": files,
+        "missing_file_ids": [file_id for file_id in file_ids if file_id not in found],
+    }
+
+@router.delete("")
+async def delete_files(
+    message_id: Optional[str] = Query(None),
+    thread_id: Optional[str] = Query(None),
+    session: AsyncSession = Depends(get_session),
+):
+    # Eliminación lógica masiva: un UPDATE ... RETURNING por bloque, con commit por bloque
+    # para que ninguna transacción retenga más de bulk_delete_chunk_size filas bloqueadas.
+    # Los eventos del bloque se publican antes del commit: si la publicación falla el bloque
+    # se revierte (un reintento puede duplicar eventos, pero ninguno se pierde)
+    if not message_id and not thread_id:
+        raise HTTPException(status_code=400, detail={"code":"MISSING_FILTER","message":"Debe filtrar por message_id o thread_id"})
+    chunk = select(FileModel.id).where(FileModel.deleted_at.is_(None))
+    if message_id:
+        chunk = chunk.where(FileModel.message_id==message_id)
+    if thread_id:
+        chunk = chunk.where(FileModel.thread_id==thread_id)
+    chunk = chunk.limit(settings.bulk_delete_chunk_size).scalar_subquery()
+
+    deleted = 0
+    while True:
+        now = datetime.now(timezone.utc)
+        stmt = (
+            update(FileModel)
+            # Se repite deleted_at IS NULL: si otro borrado tomó la fila mientras esperábamos su lock, se descarta
+            .where(FileModel.id.in_(chunk), FileModel.deleted_at.is_(None))
+            .values(deleted_at=now)
+            .returning(FileModel.id, FileModel.bucket, FileModel.object_key, FileModel.message_id, FileModel.thread_id)
+            .execution_options(synchronize_session=False)
+        )
+        rows = (await session.execute(stmt)).all()
+        if not rows:
+            await session.commit()
+            break
+        try:
+            await event_bus.publish_many(
+                routing_key="files.deleted.v1",
+                payloads=[
+                    {
+                        "type":"files.deleted.v1",
+                        "occurred_at": now.isoformat(),
+                        "data": {
+                            "file_id": str(row.id),
+                            "bucket": row.bucket,
+                            "object_key": row.object_key,
+                            "message_id": row.message_id,
+                            "thread_id": row.thread_id
+                        }
+                    }
+                    for row in rows
+                ],
+            )
+        except Exception:
+            await session.rollback()
+            raise HTTPException(
+                status_code=503,
+                detail={
+                    "code":"EVENTS_UNAVAILABLE",
+                    "message":"No se pudieron publicar los eventos; el borrado quedó incompleto",
+                    "deleted": deleted,
+                },
+            )
+        await session.commit()
+        deleted += len(rows)
+        for row in rows:
+            object_cache.invalidate(object_key=row.object_key)
+        if len(rows) < settings.bulk_delete_chunk_size:
+            break
+    return {"deleted": deleted}
+
 @router.delete("/{file_id}", status_code=204)
 async def delete_file(file_id: UUID, session: AsyncSession = Depends(get_session)):
     res = await session.execute(select(FileModel).where(FileModel.id==file_id, FileModel.deleted_at.is_(None)))
@@ -101,6 +222,7 @@ async def delete_file(file_id: UUID, session: AsyncSession = Depends(get_session
         raise HTTPException(status_code=404, detail={"code":"FILE_NOT_FOUND","message":"No existe el archivo"})
     file.deleted_at = datetime.now(timezone.utc)
     await session.commit()
+    object_cache.invalidate(object_key=file.object_key)
 
     await event_bus.publish(
         routing_key="files.deleted.v1",
@@ -110,7 +232,9 @@ async def delete_file(file_id: UUID, session: AsyncSession = Depends(get_session
             "data": {
                 "file_id": str(file.id),
                 "bucket": file.bucket,
-                "object_key": file.object_key
+                "object_key": file.object_key,
+                "message_id": file.message_id,
+                "thread_id": file.thread_id
             }
         }
     )
@@ -122,5 +246,107 @@ async def presign_download(file_id: UUID, session: AsyncSession = Depends(get_se
     file = res.scalar_one_or_none()
     if not file:
         raise HTTPException(status_code=404, detail={"code":"FILE_NOT_FOUND","message":"No existe el archivo"})
-    url = presign_get(file.object_key, 3600, filename=file.filename)
+    access_tracker.record(file.id)
+    if file.storage_tier == COLD:
+        # Se sirve desde la capa fría y se promueve en segundo plano
+        tiering.promote_soon(file.id)
+    url = presign_get(file.bucket, file.object_key, 3600, filename=file.filename)
     return {"url": url, "expires_in": 3600}
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates
+
+def _not_modified(request: Request, etag: str, last_modified: datetime) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match:
+        # If-None-Match tiene prioridad sobre If-Modified-Since (RFC 9110 §13.2.2)
+        return _etag_matches(if_none_match, etag)
+    try:
+        since = parsedate_to_datetime(request.headers["if-modified-since"])
+    except (KeyError, TypeError, ValueError):
+        return False
+    return last_modified.replace(microsecond=0) <= since
+
+def _parse_range(header: Optional[str], size: int):
+    """Devuelve (inicio, fin) inclusivos, None para servir completo o "invalid" si es insatisfacible."""
+    if not header or not header.startswith("bytes=") or "," in header:
+        # Sin Range o con múltiples rangos: se responde el objeto completo
+        return None
+    start_text, _, end_text = header[len("bytes="):].strip().partition("-")
+    try:
+        if start_text:
+            start = int(start_text)
+            end = min(int(end_text), size - 1) if end_text else size - 1
+        else:
+            start, end = max(size - int(end_text), 0), size - 1
+    except ValueError:
+        return None
+    if start > end or start >= size:
+        return "invalid"
+    return start, end
+
+def _content_headers(filename: str, checksum: str, last_modified: datetime) -> dict:
+    return {
+        "ETag": f'"{checksum}"',
+        "Last-Modified": format_datetime(last_modified, usegmt=True),
+        "Accept-Ranges": "bytes",
+        "Content-Disposition": f"inline; filename*=UTF-8''{quote(filename)}",
+    }
+
+@router.get("/{file_id}/content")
+async def download_content(file_id: UUID, request: Request, session: AsyncSession = Depends(get_session)):
+    # Los objetos pequeños y populares se sirven desde memoria sin consultar la base
+    cached = object_cache.get_by_file_id(file_id)
+    if cached:
+        filename, mime_type, checksum, size, created_at = (
+            cached.filename, cached.mime_type, cached.checksum, len(cached.body), cached.created_at
+        )
+    else:
+        res = await session.execute(select(FileModel).where(FileModel.id==file_id, FileModel.deleted_at.is_(None)))
+        file = res.scalar_one_or_none()
+        if not file:
+            raise HTTPException(status_code=404, detail={"code":"FILE_NOT_FOUND","message":"No existe el archivo"})
+        if file.storage_tier == COLD:
+            tiering.promote_soon(file.id)
+        filename, mime_type, checksum, size, created_at = (
+            file.filename, file.mime_type, file.checksum_sha256, file.size, file.created_at
+        )
+    access_tracker.record(file_id)
+
+    if created_at.tzinfo is None:
+        created_at = created_at.replace(tzinfo=timezone.utc)
+    headers = _content_headers(filename, checksum, created_at)
+    if _not_modified(request, headers["ETag"], created_at):
+        return Response(status_code=304, headers=headers)
+
+    byte_range = _parse_range(request.headers.get("range"), size)
+    if_range = request.headers.get("if-range")
+    if byte_range and if_range and if_range.strip() != headers["ETag"]:
+        # El cliente tiene otra versión: se envía el objeto completo
+        byte_range = None
+    if byte_range == "invalid":
+        return Response(status_code=416, headers={**headers, "Content-Range": f"bytes */{size}"})
+
+    status_code, offset, length = 200, 0, size
+    if byte_range:
+        start, end = byte_range
+        status_code, offset, length = 206, start, end - start + 1
+        headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+
+    if not cached and object_cache.cacheable(file.size):
+        bucket, key = file.bucket, file.object_key
+        cached = await object_cache.get_or_load(file, lambda: asyncio.to_thread(get_object_bytes, bucket, key))
+    if cached:
+        body = cached.body[offset:offset + length] if byte_range else cached.body
+        return Response(content=body, status_code=status_code, media_type=mime_type, headers=headers)
+
+    headers["Content-Length"] = str(length)
+    return StreamingResponse(
+        iter_object(file.bucket, file.object_key, offset=offset, length=length if byte_range else 0),
+        status_code=status_code,
+        media_type=mime_type,
+        headers=headers,
+    )
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field, ConfigDict
-from typing import Optional
+from typing import Dict, List, Optional
 from uuid import UUID
 from datetime import datetime
 
@@ -18,5 +18,15 @@ class FileOut(BaseModel):
 
     model_config = ConfigDict(from_attributes=True)
 
+class FileLookupIn(BaseModel):
+    message_ids: List[str] = Field(default_factory=list)
+    file_ids: List[UUID] = Field(default_factory=list)
+
+class FileLookupOut(BaseModel):
+    # Un elemento por cada message_id pedido (lista vacía si no tiene archivos)
+    messages: Dict[str, List[FileOut]]
+    files: List[FileOut]
+    missing_file_ids: List[UUID]
+
 class ErrorResponse(BaseModel):
     error: dict
@@ -0,0 +1,50 @@
+"""Distribución de objetos entre buckets/endpoints de MinIO con hashing consistente."""
+import bisect
+import hashlib
+from dataclasses import dataclass
+
+@dataclass(frozen=True)
+class Shard:
+    bucket: str
+    endpoint: str
+    public_url: str
+
+def parse_shards(raw: str, default_bucket: str, default_endpoint: str, default_public_url: str) -> list[Shard]:
+    """Interpreta MINIO_SHARDS: `bucket[@endpoint[@public_url]]` separados por coma.
+
+    Sin valor, el único shard es el bucket/endpoint configurado por defecto.
+    """
+    shards = []
+    for entry in (raw or "").split(","):
+        entry = entry.strip()
+        if not entry:
+            continue
+        parts = entry.split("@", 2)
+        bucket = parts[0]
+        endpoint = parts[1] if len(parts) > 1 and parts[1] else default_endpoint
+        public_url = parts[2] if len(parts) > 2 and parts[2] else default_public_url
+        shards.append(Shard(bucket, endpoint, public_url))
+    if not shards:
+        shards.append(Shard(default_bucket, default_endpoint, default_public_url))
+    if len({shard.bucket for shard in shards}) != len(shards):
+        # El shard se registra en la columna `bucket`, por lo que debe ser único
+        raise ValueError("MINIO_SHARDS contiene buckets repetidos")
+    return shards
+
+def _hash(value: str) -> int:
+    return int.from_bytes(hashlib.md5(value.encode("utf-8")).digest()[:8], "big")
+
+class HashRing:
+    """Anillo de hashing consistente con nodos virtuales.
+
+    Al agregar un shard solo se reasigna ~1/N de las claves.
+    """
+
+    def __init__(self, shards: list[Shard], vnodes: int = 128):
+        points = sorted((_hash(f"{shard.bucket}#{i}"), shard) for shard in shards for i in range(vnodes))
+        self._hashes = [point for point, _ in points]
+        self._shards = [shard for _, shard in points]
+
+    def shard_for(self, key: str) -> Shard:
+        index = bisect.bisect(self._hashes, _hash(key)) % len(self._hashes)
+        return self._shards[index]
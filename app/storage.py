@@ -1,44 +1,152 @@
 # app/storage.py
+import urllib3
 from minio import Minio
+from minio.commonconfig import CopySource
 from datetime import timedelta
 from urllib.parse import urlsplit
 from .config import settings
+from .sharding import HashRing, Shard, parse_shards
 
-# Cliente interno (subidas/lecturas del servicio)
-_client_internal = Minio(
-    settings.minio_endpoint,
-    access_key=settings.minio_access_key,
-    secret_key=settings.minio_secret_key,
-    secure=settings.minio_secure,
+SHARDS = parse_shards(
+    settings.minio_shards,
+    default_bucket=settings.minio_bucket,
+    default_endpoint=settings.minio_endpoint,
+    default_public_url=settings.public_minio_url,
 )
+_ring = HashRing(SHARDS)
+_shards_by_bucket = {shard.bucket: shard for shard in SHARDS}
+
+# Capa fría opcional: no participa del anillo, solo recibe objetos sin accesos recientes
+COLD_SHARD = None
+if settings.minio_cold_bucket:
+    COLD_SHARD = parse_shards(
+        settings.minio_cold_bucket,
+        default_bucket=settings.minio_cold_bucket,
+        default_endpoint=settings.minio_endpoint,
+        default_public_url=settings.public_minio_url,
+    )[0]
+    if COLD_SHARD.bucket in _shards_by_bucket:
+        raise ValueError("MINIO_COLD_BUCKET no puede ser uno de los MINIO_SHARDS")
+    _shards_by_bucket[COLD_SHARD.bucket] = COLD_SHARD
+
+# Cliente interno (subidas/lecturas del servicio), uno por endpoint
+_clients_internal: dict[str, Minio] = {}
 
 # Cliente público solo para FIRMAR URLs con el host que verá el navegador
-_pub = urlsplit(settings.public_minio_url)
-_client_public = Minio(
-    _pub.netloc,  # host:puerto
-    access_key=settings.minio_access_key,
-    secret_key=settings.minio_secret_key,
-    secure=_pub.scheme == "https",
-    region="us-east-1",               # <- evita lookup de región
-)
+_clients_public: dict[str, Minio] = {}
+
+def _internal(endpoint: str) -> Minio:
+    client = _clients_internal.get(endpoint)
+    if client is None:
+        client = _clients_internal[endpoint] = Minio(
+            endpoint,
+            access_key=settings.minio_access_key,
+            secret_key=settings.minio_secret_key,
+            secure=settings.minio_secure,
+        )
+    return client
+
+# Clientes para chequeos de salud: timeout propio y sin reintentos, así el hilo
+# que los ejecuta termina aunque MinIO no responda
+_clients_probe: dict[tuple[str, float], Minio] = {}
+
+def _probe(endpoint: str, timeout: float) -> Minio:
+    client = _clients_probe.get((endpoint, timeout))
+    if client is None:
+        client = _clients_probe[(endpoint, timeout)] = Minio(
+            endpoint,
+            access_key=settings.minio_access_key,
+            secret_key=settings.minio_secret_key,
+            secure=settings.minio_secure,
+            http_client=urllib3.PoolManager(
+                timeout=urllib3.Timeout(connect=timeout, read=timeout),
+                retries=urllib3.Retry(total=0),
+            ),
+        )
+    return client
+
+def _public(public_url: str) -> Minio:
+    client = _clients_public.get(public_url)
+    if client is None:
+        pub = urlsplit(public_url)
+        client = _clients_public[public_url] = Minio(
+            pub.netloc,  # host:puerto
+            access_key=settings.minio_access_key,
+            secret_key=settings.minio_secret_key,
+            secure=pub.scheme == "https",
+            region="us-east-1",               # <- evita lookup de región
+        )
+    return client
 
-def ensure_bucket():
-    if not _client_internal.bucket_exists(settings.minio_bucket):
-        _client_internal.make_bucket(settings.minio_bucket)
+def _shard(bucket: str) -> Shard:
+    # Buckets fuera de MINIO_SHARDS (p. ej. registros antiguos) viven en el endpoint por defecto
+    return _shards_by_bucket.get(bucket) or Shard(bucket, settings.minio_endpoint, settings.public_minio_url)
+
+def shard_for(object_key: str) -> str:
+    """Bucket destino de una clave según el anillo de hashing."""
+    return _ring.shard_for(object_key).bucket
+
+def ensure_bucket(timeout: float | None = None):
+    for shard in SHARDS + ([COLD_SHARD] if COLD_SHARD else []):
+        client = _probe(shard.endpoint, timeout) if timeout else _internal(shard.endpoint)
+        if not client.bucket_exists(shard.bucket):
+            client.make_bucket(shard.bucket)
+
+def check_buckets(timeout: float):
+    """Chequeo de solo lectura: falla si algún bucket no existe o MinIO no responde."""
+    for shard in SHARDS + ([COLD_SHARD] if COLD_SHARD else []):
+        if not _probe(shard.endpoint, timeout).bucket_exists(shard.bucket):
+            raise RuntimeError(f"No existe el bucket {shard.bucket}")
 
 def put_object(object_key: str, data, length: int, content_type: str):
-    _client_internal.put_object(settings.minio_bucket, object_key, data, length, content_type=content_type)
-    return settings.minio_bucket, object_key
+    shard = _ring.shard_for(object_key)
+    _internal(shard.endpoint).put_object(shard.bucket, object_key, data, length, content_type=content_type)
+    return shard.bucket, object_key
+
+def get_object_bytes(bucket: str, object_key: str) -> bytes:
+    response = _internal(_shard(bucket).endpoint).get_object(bucket, object_key)
+    try:
+        return response.read()
+    finally:
+        response.close()
+        response.release_conn()
+
+def iter_object(bucket: str, object_key: str, offset: int = 0, length: int = 0, chunk_size: int = 64 * 1024):
+    """Itera el objeto (o el rango offset/length) por bloques sin cargarlo completo en memoria."""
+    response = _internal(_shard(bucket).endpoint).get_object(bucket, object_key, offset=offset, length=length)
+    try:
+        yield from response.stream(chunk_size)
+    finally:
+        response.close()
+        response.release_conn()
+
+def copy_object(object_key: str, src_bucket: str, dst_bucket: str):
+    """Copia un objeto entre shards; del lado del servidor si comparten endpoint."""
+    src, dst = _shard(src_bucket), _shard(dst_bucket)
+    if src.endpoint == dst.endpoint:
+        _internal(dst.endpoint).copy_object(dst.bucket, object_key, CopySource(src.bucket, object_key))
+        return
+    src_client = _internal(src.endpoint)
+    stat = src_client.stat_object(src.bucket, object_key)
+    response = src_client.get_object(src.bucket, object_key)
+    try:
+        _internal(dst.endpoint).put_object(dst.bucket, object_key, response, stat.size, content_type=stat.content_type)
+    finally:
+        response.close()
+        response.release_conn()
+
+def remove_object(bucket: str, object_key: str):
+    _internal(_shard(bucket).endpoint).remove_object(bucket, object_key)
 
-def presign_get(object_key: str, expires_seconds: int = 3600, filename: str = None) -> str:
+def presign_get(bucket: str, object_key: str, expires_seconds: int = 3600, filename: str = None) -> str:
     # ¡Firmamos con el cliente público! (ya no reescribimos la URL)
     # Añadimos response_content_disposition para forzar la descarga
     response_headers = {}
     if filename:
         response_headers['response-content-disposition'] = f'attachment; filename="{filename}"'
     
-    return _client_public.presigned_get_object(
-        settings.minio_bucket, 
+    return _public(_shard(bucket).public_url).presigned_get_object(
+        bucket, 
         object_key, 
         expires=timedelta(seconds=expires_seconds),
         response_headers=response_headers if response_headers else None
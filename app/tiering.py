@@ -0,0 +1,134 @@
+"""Tiering hot/cold de objetos.
+
+Un job periódico mueve al bucket frío (MINIO_COLD_BUCKET) los archivos sin
+accesos durante TIERING_COLD_AFTER_DAYS. Cuando un archivo frío vuelve a
+pedirse se sirve desde la capa fría y se promueve en segundo plano a su shard.
+"""
+import asyncio
+import logging
+from datetime import datetime, timedelta, timezone
+from uuid import UUID
+from sqlalchemy import func, select, update
+
+from .config import settings
+from .db import SessionLocal
+from .models import File as FileModel
+from .metrics import Counter
+from .removals import schedule_removal
+from .storage import COLD_SHARD, copy_object, shard_for
+
+logger = logging.getLogger("filesvc.tiering")
+
+HOT = "hot"
+COLD = "cold"
+
+# Las URLs prefirmadas duran una hora: el original se conserva ese tiempo tras cambiar de capa
+# (también cubre los accesos que AccessTracker aún no volcó)
+TIER_CHANGE_GRACE_SECONDS = 3600
+
+tiering_demoted = Counter("filesvc_tiering_demoted_total", "Objetos movidos a la capa fría")
+tiering_promoted = Counter("filesvc_tiering_promoted_total", "Objetos promovidos a la capa caliente")
+
+class Tiering:
+    def __init__(self):
+        self._promoting: set[UUID] = set()
+        self._tasks: set[asyncio.Task] = set()
+
+    @property
+    def enabled(self) -> bool:
+        return settings.tiering_enabled and COLD_SHARD is not None
+
+    def _spawn(self, coro):
+        task = asyncio.create_task(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def demote_batch(self) -> int:
+        """Mueve un lote de archivos fríos; devuelve cuántos se movieron."""
+        cutoff = datetime.now(timezone.utc) - timedelta(days=settings.tiering_cold_after_days)
+        demoted = 0
+        async with SessionLocal() as session:
+            # Sin bloquear filas mientras se copia (como app.rebalance): el puntero se cambia
+            # después con un UPDATE condicionado a que nadie lo haya tocado
+            res = await session.execute(
+                select(FileModel.id, FileModel.bucket, FileModel.object_key)
+                .where(
+                    FileModel.storage_tier == HOT,
+                    FileModel.deleted_at.is_(None),
+                    func.coalesce(FileModel.last_accessed_at, FileModel.created_at) < cutoff,
+                )
+                .limit(settings.tiering_batch_size)
+            )
+            rows = res.all()
+            await session.commit()
+
+            for row in rows:
+                try:
+                    await asyncio.to_thread(copy_object, row.object_key, row.bucket, COLD_SHARD.bucket)
+                except Exception:
+                    logger.exception("No se pudo enfriar %s", row.object_key)
+                    continue
+                res = await session.execute(
+                    update(FileModel)
+                    .where(
+                        FileModel.id == row.id,
+                        FileModel.bucket == row.bucket,
+                        FileModel.storage_tier == HOT,
+                        FileModel.deleted_at.is_(None),
+                    )
+                    .values(bucket=COLD_SHARD.bucket, storage_tier=COLD)
+                )
+                if res.rowcount:
+                    schedule_removal(session, row.bucket, row.object_key, TIER_CHANGE_GRACE_SECONDS)
+                    demoted += 1
+                else:
+                    # El archivo cambió o se borró durante la copia: la copia fría sobra
+                    # (el barrido no la borra si otra réplica la enfrió a la vez y está en uso)
+                    schedule_removal(session, COLD_SHARD.bucket, row.object_key, 0)
+                await session.commit()
+
+        tiering_demoted.inc(demoted)
+        return demoted
+
+    def promote_soon(self, file_id: UUID):
+        if not self.enabled or file_id in self._promoting:
+            return
+        self._promoting.add(file_id)
+        self._spawn(self._promote(file_id))
+
+    async def _promote(self, file_id: UUID):
+        try:
+            async with SessionLocal() as session:
+                res = await session.execute(
+                    select(FileModel)
+                    .where(FileModel.id == file_id, FileModel.storage_tier == COLD)
+                    .with_for_update(skip_locked=True)
+                )
+                file = res.scalar_one_or_none()
+                if not file:
+                    return
+                source, target = file.bucket, shard_for(file.object_key)
+                await asyncio.to_thread(copy_object, file.object_key, source, target)
+                file.bucket = target
+                file.storage_tier = HOT
+                file.last_accessed_at = datetime.now(timezone.utc)
+                # Quien recibió una URL de la capa fría puede seguir usándola hasta que expire
+                schedule_removal(session, source, file.object_key, TIER_CHANGE_GRACE_SECONDS)
+                await session.commit()
+            tiering_promoted.inc()
+        except Exception:
+            logger.exception("No se pudo promover %s", file_id)
+        finally:
+            self._promoting.discard(file_id)
+
+    async def run(self):
+        while True:
+            try:
+                # Se drenan lotes hasta que no quede nada frío por mover
+                while await self.demote_batch() >= settings.tiering_batch_size:
+                    pass
+            except Exception:
+                logger.exception("Fallo en el job de tiering")
+            await asyncio.sleep(settings.tiering_interval)
+
+tiering = Tiering()
@@ -1,4 +1,4 @@
-import { useEffect, useMemo, useState } from 'react'
+import { useEffect, useMemo, useRef, useState } from 'react'
 import {
   usersAPI,
   channelsAPI,
@@ -10,6 +10,7 @@ import {
   presenceAPI,
   wikiAPI,
   programmingChatAPI,
+  batchAPI,
   setAuthToken,
 } from '../services/api'
 
@@ -63,6 +64,8 @@ function ChatWorkspace() {
 
   const channelId = resolveChannelId(selectedChannel)
   const threadId = resolveThreadId(selectedThread)
+  // true mientras la conexión SSE de eventos de archivos del thread está abierta
+  const fileEventsOpen = useRef(false)
 
   useEffect(() => {
     if (session?.token) {
@@ -93,6 +96,27 @@ function ChatWorkspace() {
     loadAttachments(threadId)
   }, [threadId])
 
+  useEffect(() => {
+    if (!threadId || typeof EventSource === 'undefined') return
+    // Los adjuntos se recargan solo cuando el gateway avisa de un cambio en el thread
+    const events = filesAPI.subscribe({ thread_id: threadId })
+    const reload = () => loadAttachments(threadId)
+    events.addEventListener('open', () => { fileEventsOpen.current = true })
+    events.addEventListener('files.added.v1', reload)
+    events.addEventListener('files.deleted.v1', reload)
+    // Tras una desconexión por lentitud, EventSource reconecta solo; se recarga para no perder eventos
+    events.addEventListener('dropped', reload)
+    // Conexión caída o eventos no disponibles (503): pudo perderse algún cambio
+    events.addEventListener('error', () => {
+      fileEventsOpen.current = false
+      reload()
+    })
+    return () => {
+      fileEventsOpen.current = false
+      events.close()
+    }
+  }, [threadId])
+
   useEffect(() => {
     refreshPresence()
     const interval = setInterval(refreshPresence, 45000)
@@ -254,13 +278,15 @@ function ChatWorkspace() {
 
   const refreshPresence = async () => {
     try {
-      const [usersResp, statsResp] = await Promise.all([
-        presenceAPI.list('online'),
-        presenceAPI.stats(),
+      // Un solo viaje al gateway para ambos listados
+      const { data } = await batchAPI.run([
+        { method: 'GET', path: '/gateway/presence?status=online' },
+        { method: 'GET', path: '/gateway/presence/stats' },
       ])
-      const list = Array.isArray(usersResp?.data) ? usersResp.data : normalizeList(usersResp)
+      const [usersResp, statsResp] = data?.responses || []
+      const list = normalizeList(usersResp?.body)
       setPresenceUsers(list)
-      setPresenceStats(statsResp?.data || statsResp)
+      setPresenceStats(statsResp?.body)
     } catch (_) {
       // ignore presence errors to avoid UI noise
     }
@@ -325,7 +351,10 @@ function ChatWorkspace() {
       }
       setComposer({ content: '', messageType: 'text', attachment: null })
       loadMessages(threadId)
-      loadAttachments(threadId)
+      // Sin conexión SSE abierta no llegará el evento del adjunto nuevo
+      if (!fileEventsOpen.current) {
+        loadAttachments(threadId)
+      }
     } catch (error) {
       setErrorMessage('No se pudo enviar el mensaje')
     } finally {
@@ -363,12 +392,22 @@ function ChatWorkspace() {
     }
   }
 
+  // Muestra la respuesta a medida que llega (el gateway ya entrega solo el texto de cada evento)
+  const streamAnswer = async (botAPI, question, setAnswer) => {
+    let text = ''
+    setAnswer('…')
+    await botAPI.askStream(question, (chunk) => {
+      text += chunk
+      setAnswer(text)
+    })
+    if (!text) setAnswer('Sin respuesta')
+  }
+
   const askWiki = async (event) => {
     event.preventDefault()
     if (!wikiQuestion.trim()) return
     try {
-      const { data } = await wikiAPI.ask(wikiQuestion.trim())
-      setWikiAnswer(data?.message || 'Sin respuesta')
+      await streamAnswer(wikiAPI, wikiQuestion.trim(), setWikiAnswer)
     } catch (error) {
       setWikiAnswer('Error consultando al bot de Wikipedia')
     }
@@ -378,8 +417,7 @@ function ChatWorkspace() {
     event.preventDefault()
     if (!devQuestion.trim()) return
     try {
-      const { data } = await programmingChatAPI.ask(devQuestion.trim())
-      setDevAnswer(data?.reply || 'Sin respuesta')
+      await streamAnswer(programmingChatAPI, devQuestion.trim(), setDevAnswer)
     } catch (error) {
       setDevAnswer('El bot de programación no respondió')
     }
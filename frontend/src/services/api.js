@@ -76,6 +76,10 @@ export const filesAPI = {
   }),
   delete: (id) => api.delete(`/files/${id}`),
   getDownloadUrl: (id) => api.post(`/files/${id}/download-url`),
+  // Server-Sent Events: files.added.v1 / files.deleted.v1 del thread
+  subscribe: (params = {}) => new EventSource(
+    `${API_BASE_URL}/files/events?${new URLSearchParams(params).toString()}`
+  ),
 };
 
 // Search
@@ -122,13 +126,50 @@ export const presenceAPI = {
   remove: (userId) => api.delete(`/presence/${userId}`),
 };
 
+// Batch: varias llamadas al gateway en un solo viaje ({ method, path, body } con path desde /gateway)
+export const batchAPI = {
+  run: (requests) => api.post('/batch', { requests }),
+};
+
 // Chatbots
+// Lee la respuesta SSE de /chat/*/stream e invoca onData con el `data` de cada evento
+const streamChat = async (path, message, onData, signal) => {
+  const response = await fetch(`${API_BASE_URL}${path}`, {
+    method: 'POST',
+    headers: { 'Content-Type': 'application/json', Accept: 'text/event-stream' },
+    body: JSON.stringify({ message }),
+    signal,
+  });
+  if (!response.ok || !response.body) {
+    throw new Error(`HTTP ${response.status}`);
+  }
+  const reader = response.body.pipeThrough(new TextDecoderStream()).getReader();
+  let buffer = '';
+  for (;;) {
+    const { value, done } = await reader.read();
+    if (done) break;
+    buffer += value;
+    let boundary = buffer.indexOf('\n\n');
+    while (boundary !== -1) {
+      const block = buffer.slice(0, boundary);
+      buffer = buffer.slice(boundary + 2);
+      const lines = block.split('\n');
+      const event = lines.find((line) => line.startsWith('event:'))?.slice(6).trim() || 'message';
+      const data = lines.filter((line) => line.startsWith('data:')).map((line) => line.slice(5).replace(/^ /, '')).join('\n');
+      if (event !== 'done' && data) onData(data);
+      boundary = buffer.indexOf('\n\n');
+    }
+  }
+};
+
 export const wikiAPI = {
   ask: (message) => api.post('/chat/wiki', { message }),
+  askStream: (message, onData, signal) => streamChat('/chat/wiki/stream', message, onData, signal),
 };
 
 export const programmingChatAPI = {
   ask: (message) => api.post('/chat/programming', { message }),
+  askStream: (message, onData, signal) => streamChat('/chat/programming/stream', message, onData, signal),
 };
 
 export default api;
@@ -0,0 +1,167 @@
+"""Verificación local de JWT: llaves de firma cacheadas y claims cacheados por token hasta su expiración"""
+import asyncio
+import contextvars
+import hashlib
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from jose import JWTError, jwt
+
+import metrics
+from config import settings
+
+logger = logging.getLogger("gateway.auth")
+
+auth_results = metrics.Counter("gateway_auth_tokens_total", "Tokens bearer procesados por resultado")
+
+_claims: contextvars.ContextVar[Optional[Dict[str, Any]]] = contextvars.ContextVar("gateway_claims", default=None)
+
+
+class AuthUnavailable(Exception):
+    """No hay llaves con qué verificar (JWKS aún no cargado o inaccesible)"""
+
+
+def current_claims() -> Optional[Dict[str, Any]]:
+    return _claims.get()
+
+
+def current_user_id() -> Optional[str]:
+    """ID del usuario autenticado en la request actual (None si no vino token)"""
+    claims = _claims.get()
+    if not claims:
+        return None
+    user_id = claims.get(settings.jwt_user_id_claim) or claims.get("sub")
+    return str(user_id) if user_id is not None else None
+
+
+class TokenVerifier:
+    """
+    Verifica tokens sin llamar al servicio de usuarios.
+
+    - Llaves: `JWT_SECRET` (HS*) o el JWKS del servicio de usuarios, que se
+      refresca en segundo plano y también cuando llega un `kid` desconocido.
+    - Claims: LRU por hash del token, válida hasta el `exp` del propio token.
+    """
+
+    def __init__(self, max_entries: int, refresh_seconds: float):
+        self.max_entries = max_entries
+        self.refresh_seconds = refresh_seconds
+        self._keys: Dict[str, Dict[str, Any]] = {}
+        self._refreshed_at = 0.0
+        self._refresh_lock = asyncio.Lock()
+        self._cache: "OrderedDict[bytes, Tuple[Dict[str, Any], float]]" = OrderedDict()
+
+    def _algorithms(self, symmetric: bool):
+        # Secreto compartido solo con HS*, llaves públicas nunca con HS* (evita la confusión de algoritmos)
+        algorithms = [alg.strip() for alg in settings.jwt_algorithms.split(",") if alg.strip()]
+        return [alg for alg in algorithms if alg.upper().startswith("HS") == symmetric]
+
+    async def refresh_keys(self):
+        if not settings.jwt_jwks_path:
+            return
+        # Import diferido: clients.base usa este módulo para inyectar X-User-Id
+        from clients.users import users_client
+
+        async with self._refresh_lock:
+            self._refreshed_at = time.monotonic()
+            result = await users_client.get(settings.jwt_jwks_path)
+            keys = result.get("keys") if isinstance(result, dict) else None
+            if not isinstance(keys, list):
+                logger.warning("No se pudo obtener el JWKS: %s", result.get("error") if isinstance(result, dict) else result)
+                return
+            self._keys = {key.get("kid", ""): key for key in keys if isinstance(key, dict)}
+
+    async def _key_for(self, token: str) -> Tuple[Any, list]:
+        if settings.jwt_secret:
+            return settings.jwt_secret, self._algorithms(symmetric=True)
+        kid = jwt.get_unverified_header(token).get("kid", "")
+        key = self._keys.get(kid)
+        # kid desconocido: quizá rotaron las llaves; se refresca como mucho cada 30 s
+        if key is None and time.monotonic() - self._refreshed_at > 30:
+            await self.refresh_keys()
+            key = self._keys.get(kid)
+        if key is None and len(self._keys) == 1 and not kid:
+            key = next(iter(self._keys.values()))
+        if key is None:
+            if not self._keys:
+                raise AuthUnavailable("No hay llaves de firma cargadas")
+            raise JWTError(f"Llave de firma desconocida: {kid!r}")
+        return key, [key["alg"]] if key.get("alg") else self._algorithms(symmetric=False)
+
+    async def verify(self, token: str) -> Dict[str, Any]:
+        """Claims del token; lanza JWTError si es inválido o expiró"""
+        digest = hashlib.sha256(token.encode("utf-8")).digest()
+        cached = self._cache.get(digest)
+        now = time.time()
+        if cached and cached[1] > now:
+            self._cache.move_to_end(digest)
+            auth_results.inc(result="cached")
+            return cached[0]
+        key, algorithms = await self._key_for(token)
+        claims = jwt.decode(
+            token,
+            key,
+            algorithms=algorithms,
+            audience=settings.jwt_audience or None,
+            issuer=settings.jwt_issuer or None,
+            options={"verify_aud": bool(settings.jwt_audience)},
+        )
+        # Sin exp el token no caduca, pero se vuelve a verificar cada tanto por si rotan las llaves
+        expires_at = float(claims.get("exp") or now + self.refresh_seconds)
+        self._cache[digest] = (claims, expires_at)
+        self._cache.move_to_end(digest)
+        while len(self._cache) > self.max_entries:
+            self._cache.popitem(last=False)
+        auth_results.inc(result="verified")
+        return claims
+
+    async def run(self):
+        while True:
+            try:
+                await self.refresh_keys()
+            except Exception:
+                logger.exception("Error refrescando el JWKS")
+            await asyncio.sleep(self.refresh_seconds)
+
+
+token_verifier = TokenVerifier(settings.jwt_claims_cache_size, settings.jwt_keys_refresh_seconds)
+
+
+class AuthMiddleware:
+    """
+    Si la request trae `Authorization: Bearer`, verifica el token localmente y deja
+    los claims disponibles (`current_user_id()`) para routers y clientes de backend.
+    Un token inválido no corta la request (p. ej. un token vencido guardado en el
+    navegador al hacer login): simplemente queda sin identidad.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        token = None
+        for name, value in scope["headers"]:
+            if name == b"authorization":
+                scheme, _, credentials = value.decode("latin-1").partition(" ")
+                if scheme.lower() == "bearer" and credentials.strip():
+                    token = credentials.strip()
+                break
+        claims = None
+        if token:
+            try:
+                claims = await token_verifier.verify(token)
+            except AuthUnavailable:
+                auth_results.inc(result="unverifiable")
+            except JWTError as exc:
+                auth_results.inc(result="invalid")
+                logger.debug("Token rechazado: %s", exc)
+        claims_token = _claims.set(claims)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _claims.reset(claims_token)
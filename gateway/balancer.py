@@ -0,0 +1,91 @@
+"""Balanceo entre réplicas de un backend: power-of-two-choices con expulsión de réplicas caídas"""
+import random
+import time
+from typing import Any, Dict, List, Optional
+
+HEALTHY = "healthy"
+EJECTED = "ejected"
+
+
+class Endpoint:
+    __slots__ = ("url", "in_flight", "consecutive_failures", "state", "ejected_at", "ejections")
+
+    def __init__(self, url: str):
+        self.url = url.rstrip("/")
+        self.in_flight = 0
+        self.consecutive_failures = 0
+        self.state = HEALTHY
+        self.ejected_at: Optional[float] = None
+        self.ejections = 0
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "url": self.url,
+            "state": self.state,
+            "in_flight": self.in_flight,
+            "consecutive_failures": self.consecutive_failures,
+            "ejected_seconds": round(time.monotonic() - self.ejected_at, 1) if self.ejected_at else None,
+            "ejections": self.ejections,
+        }
+
+
+class LoadBalancer:
+    """
+    Elige la réplica para cada intento entre las que no están expulsadas.
+
+    - Selección: se toman dos al azar y gana la que tiene menos requests en curso
+      (power of two choices); con una sola réplica siempre es esa.
+    - Expulsión pasiva: `failure_threshold` fallos seguidos (error de transporte,
+      500 o 502) sacan la réplica de la rotación, sin superar `max_ejection_percent`.
+    - Readmisión: solo cuando el health check activo vuelve a responder
+      (ver `BaseClient.check_endpoints`).
+    """
+
+    def __init__(self, urls: List[str], failure_threshold: int, max_ejection_percent: int):
+        self.endpoints = [Endpoint(url) for url in urls]
+        self.failure_threshold = failure_threshold
+        self.max_ejection_percent = max_ejection_percent
+
+    @classmethod
+    def from_setting(cls, value: str, failure_threshold: int, max_ejection_percent: int) -> "LoadBalancer":
+        """Construye el balanceador a partir de una o varias URLs separadas por coma"""
+        urls = [url.strip() for url in value.split(",") if url.strip()]
+        return cls(urls or [value], failure_threshold, max_ejection_percent)
+
+    def available(self) -> List[Endpoint]:
+        return [endpoint for endpoint in self.endpoints if endpoint.state == HEALTHY]
+
+    def ejected(self) -> List[Endpoint]:
+        return [endpoint for endpoint in self.endpoints if endpoint.state == EJECTED]
+
+    def pick(self) -> Endpoint:
+        candidates = self.available() or self.endpoints
+        if len(candidates) == 1:
+            return candidates[0]
+        first, second = random.sample(candidates, 2)
+        return first if first.in_flight <= second.in_flight else second
+
+    def record_success(self, endpoint: Endpoint):
+        endpoint.consecutive_failures = 0
+
+    def record_failure(self, endpoint: Endpoint) -> bool:
+        """Cuenta un fallo; devuelve True si la réplica quedó expulsada"""
+        endpoint.consecutive_failures += 1
+        if endpoint.state == EJECTED or endpoint.consecutive_failures < self.failure_threshold:
+            return False
+        # Nunca se expulsa más del porcentaje configurado (con una sola réplica decide el breaker)
+        max_ejected = len(self.endpoints) * self.max_ejection_percent // 100
+        if len(self.ejected()) >= max_ejected:
+            return False
+        endpoint.state = EJECTED
+        endpoint.ejected_at = time.monotonic()
+        endpoint.ejections += 1
+        return True
+
+    def readmit(self, endpoint: Endpoint):
+        endpoint.state = HEALTHY
+        endpoint.consecutive_failures = 0
+        endpoint.ejected_at = None
+
+    def snapshot(self) -> List[Dict[str, Any]]:
+        return [endpoint.snapshot() for endpoint in self.endpoints]
@@ -0,0 +1,144 @@
+"""Caché de respuestas del gateway: LRU acotada, TTL por ruta, coalescing y stale-while-revalidate"""
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Set
+
+import deadline
+import metrics
+from config import settings
+
+logger = logging.getLogger("gateway.cache")
+
+cache_requests = metrics.Counter("gateway_cache_requests_total", "Lecturas de la caché de respuestas por resultado")
+
+
+def _is_error(value: Any) -> bool:
+    return isinstance(value, dict) and "error" in value
+
+
+class _Entry:
+    __slots__ = ("value", "fresh_until", "stale_until")
+
+    def __init__(self, value: Any, ttl: float, stale: float):
+        now = time.monotonic()
+        self.value = value
+        self.fresh_until = now + ttl
+        self.stale_until = now + ttl + stale
+
+
+class ResponseCache:
+    def __init__(self, max_entries: int, stale_seconds: float):
+        self.max_entries = max_entries
+        self.stale_seconds = stale_seconds
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        # Una tarea por clave en vuelo; las requests solo la esperan (con shield), así
+        # que si la que la inició se cancela, las demás siguen recibiendo el resultado
+        self._inflight: Dict[str, asyncio.Task] = {}
+        # Generación por clave con carga en vuelo: invalidate() la incrementa y una
+        # carga iniciada antes de la invalidación no guarda su resultado
+        self._generations: Dict[str, int] = {}
+        self._tasks: Set[asyncio.Task] = set()
+
+    async def fetch(self, key: str, ttl: float, loader: Callable[[], Awaitable[Any]], service: str = "") -> Any:
+        """
+        Devuelve el valor de `key`, llamando a `loader` solo si hace falta.
+
+        - Fresco: se responde desde memoria.
+        - Vencido pero dentro de la ventana stale: se responde el valor viejo y se
+          refresca en segundo plano.
+        - Ausente: una sola llamada a `loader` por clave, compartida por todas las
+          requests concurrentes. Con `ttl=0` solo se aplica este coalescing.
+        Los errores ({"error": ...}) nunca se guardan.
+        """
+        entry = self._entries.get(key) if ttl > 0 else None
+        if entry:
+            now = time.monotonic()
+            if now < entry.fresh_until:
+                self._entries.move_to_end(key)
+                cache_requests.inc(service=service, result="hit")
+                return entry.value
+            if now < entry.stale_until:
+                cache_requests.inc(service=service, result="stale")
+                self._start(key, ttl, loader)
+                return entry.value
+
+        if key in self._inflight:
+            cache_requests.inc(service=service, result="coalesced")
+        elif ttl > 0:
+            cache_requests.inc(service=service, result="miss")
+        task = self._start(key, ttl, loader)
+        left = deadline.remaining()
+        if left is None:
+            return await asyncio.shield(task)
+        # Cada request espera la carga compartida solo lo que le queda de su propio plazo
+        try:
+            return await asyncio.wait_for(asyncio.shield(task), max(left, 0))
+        except asyncio.TimeoutError:
+            if task.done():
+                # La carga terminó justo al vencer el plazo (acotado por el mismo): se usa su resultado
+                return task.result()
+            return {"error": "Plazo agotado esperando la respuesta compartida", "status_code": 504, "deadline_exceeded": True}
+
+    def _start(self, key: str, ttl: float, loader: Callable[[], Awaitable[Any]]) -> asyncio.Task:
+        """Tarea de carga de `key`: la que ya está en vuelo o una nueva, registrada antes de correr"""
+        task = self._inflight.get(key)
+        if task is not None:
+            return task
+        generation = self._generations.setdefault(key, 0)
+        # La carga corre con su propio plazo (cancelar la request que la inició no la corta),
+        # acotado por lo que le queda a esa request: el backend recibe ese plazo y no sigue
+        # trabajando cuando quien la pidió ya se rindió
+        budget = settings.cache_load_timeout_seconds
+        left = deadline.remaining()
+        if left is not None:
+            budget = min(budget, max(left, 0.001)) if budget else max(left, 0.001)
+        task = asyncio.create_task(
+            self._load(key, ttl, loader, generation),
+            context=deadline.detached(budget),
+        )
+        self._inflight[key] = task
+        self._tasks.add(task)
+        task.add_done_callback(lambda done: self._finished(key, done))
+        return task
+
+    def _finished(self, key: str, task: asyncio.Task):
+        self._tasks.discard(task)
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if key not in self._inflight:
+            self._generations.pop(key, None)
+        if not task.cancelled():
+            # Un refresco en segundo plano que falla no tiene quién lea su excepción
+            task.exception()
+
+    async def _load(self, key: str, ttl: float, loader: Callable[[], Awaitable[Any]], generation: int) -> Any:
+        value = await loader()
+        if ttl > 0 and not _is_error(value) and self._generations.get(key) == generation:
+            self._store(key, _Entry(value, ttl, self.stale_seconds))
+        return value
+
+    def _store(self, key: str, entry: _Entry):
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, key: str):
+        self._entries.pop(key, None)
+        if key in self._inflight:
+            # La carga en vuelo pudo leer el valor anterior a la escritura: no se guarda
+            # y las lecturas siguientes inician una nueva en lugar de sumarse a ella
+            self._generations[key] += 1
+            del self._inflight[key]
+
+    def invalidate_prefix(self, prefix: str):
+        for key in [key for key in (*self._entries, *self._inflight) if key.startswith(prefix)]:
+            self.invalidate(key)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+response_cache = ResponseCache(settings.cache_max_entries, settings.cache_stale_seconds)
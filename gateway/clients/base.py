@@ -1,27 +1,508 @@
 """Cliente base para comunicación con microservicios"""
+import asyncio
+import logging
+import time
 import httpx
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List, Tuple
+from urllib.parse import urlencode
+from starlette.responses import Response
 from config import settings
+from cache import response_cache
+from balancer import Endpoint, LoadBalancer
+from resilience import CircuitBreaker, CircuitOpenError, LatencyTracker, RetryBudget, backoff_delay
+from deadline import DeadlineExceeded
+import auth
+import deadline
+import metrics
+import tracing
+
+logger = logging.getLogger("gateway.clients")
+
+def _deadline_timeout(exc: BaseException) -> bool:
+    """
+    Timeout causado por el plazo de la request entrante (p. ej. un X-Request-Timeout-Ms
+    corto que acotó el timeout de httpx), no por lentitud del backend: no cuenta como
+    fallo para el breaker ni para el balanceador.
+    """
+    left = deadline.remaining()
+    return isinstance(exc, httpx.TimeoutException) and left is not None and left < 0.01
+
+
+# Respuestas que indican una réplica rota. Un 503 (sobrecarga, con o sin Retry-After)
+# o un 504 no cuentan: expulsar réplicas saturadas solo carga más a las demás
+_EJECTION_STATUSES = {500, 502}
+
+try:
+    import h2  # noqa: F401
+    _HTTP2_AVAILABLE = True
+except ImportError:
+    _HTTP2_AVAILABLE = False
+
+pool_in_flight = metrics.Gauge("gateway_upstream_in_flight", "Requests en curso por backend")
+pool_connections = metrics.Gauge("gateway_upstream_pool_connections", "Conexiones abiertas en el pool por backend")
+pool_idle_connections = metrics.Gauge("gateway_upstream_pool_idle_connections", "Conexiones ociosas (keep-alive) por backend")
+pool_max_connections = metrics.Gauge("gateway_upstream_pool_max_connections", "Límite de conexiones del pool por backend")
+upstream_retries = metrics.Counter("gateway_upstream_retries_total", "Reintentos hacia backends (retried / budget_exhausted)")
+upstream_deadline_exceeded = metrics.Counter("gateway_upstream_deadline_exceeded_total", "Llamadas abortadas por plazo agotado")
+upstream_duration = metrics.Histogram(
+    "gateway_upstream_request_duration_seconds",
+    "Latencia de cada intento hacia un backend, por ruta del gateway que lo originó",
+)
+upstream_responses = metrics.Counter("gateway_upstream_responses_total", "Respuestas de backends por código de estado (error = sin respuesta)")
+upstream_ejections = metrics.Counter("gateway_upstream_ejections_total", "Réplicas sacadas de la rotación por fallos seguidos")
+upstream_endpoints = metrics.Gauge("gateway_upstream_endpoints", "Réplicas por backend y estado (healthy / ejected)")
+
+# Solo se reintentan métodos idempotentes y fallos que suelen ser transitorios
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS", "PUT", "DELETE"})
+RETRYABLE_STATUS = frozenset({502, 503, 504})
+
+class UpstreamError(Exception):
+    """Error de un backend en modo passthrough; main.py lo convierte en respuesta HTTP"""
+
+    def __init__(self, status_code: int, detail: Dict[str, Any]):
+        super().__init__(detail.get("error"))
+        self.status_code = status_code
+        self.detail = detail
+
+
+class _TrackedStream(httpx.AsyncByteStream):
+    """Cuerpo de una respuesta en streaming que avisa (una sola vez) cuando se cierra"""
+
+    def __init__(self, stream: httpx.AsyncByteStream, on_close):
+        self._stream = stream
+        self._on_close = on_close
+
+    async def __aiter__(self):
+        async for chunk in self._stream:
+            yield chunk
+
+    async def aclose(self):
+        if self._on_close is not None:
+            on_close, self._on_close = self._on_close, None
+            on_close()
+        await self._stream.aclose()
+
 
 class BaseClient:
     """Cliente HTTP base para todos los microservicios"""
+
+    # Todas las instancias, para abrirlas/cerrarlas desde el lifespan del gateway
+    instances: List["BaseClient"] = []
+    # Cabecera con la que el backend espera el usuario autenticado (None = no se envía)
+    user_id_header: Optional[str] = None
+    # Ruta que consulta el health check activo para readmitir réplicas expulsadas
+    health_path: str = "/health"
     
-    def __init__(self, base_url: str, timeout: int = None):
-        self.base_url = base_url.rstrip("/")
+    def __init__(self, base_url: str, timeout: int = None, name: str = None):
+        # base_url puede listar varias réplicas separadas por coma
+        self.balancer = LoadBalancer.from_setting(base_url, settings.lb_failure_threshold, settings.lb_max_ejection_percent)
+        self.base_url = self.balancer.endpoints[0].url
+        self.name = name or type(self).__name__.removesuffix("Client").lower()
         self.timeout = timeout or settings.http_timeout
-        self.client = httpx.AsyncClient(timeout=self.timeout)
-    
-    async def get(self, path: str, params: Optional[Dict] = None, headers: Optional[Dict] = None):
-        """GET request"""
-        url = f"{self.base_url}{path}"
+        self.max_connections, self.max_keepalive = settings.pool_limits(self.name)
+        self.in_flight = 0
+        self.breaker = CircuitBreaker(
+            settings.breaker_failure_threshold,
+            settings.breaker_open_seconds,
+            settings.breaker_half_open_max_calls,
+        )
+        self.latency = LatencyTracker(min_samples=settings.hedge_min_samples)
+        self.retry_budget = RetryBudget(settings.retry_budget_ratio, settings.retry_budget_max_tokens)
+        self._client: Optional[httpx.AsyncClient] = None
+        BaseClient.instances.append(self)
+
+    def _build_client(self) -> httpx.AsyncClient:
+        http2 = settings.http2_enabled and _HTTP2_AVAILABLE
+        if settings.http2_enabled and not _HTTP2_AVAILABLE:
+            logger.warning("HTTP2_ENABLED activo pero falta el paquete 'h2'; se usa HTTP/1.1")
+        return httpx.AsyncClient(
+            http2=http2,
+            timeout=httpx.Timeout(
+                self.timeout,
+                connect=settings.http_connect_timeout,
+                read=settings.http_read_timeout or self.timeout,
+                pool=settings.http_pool_timeout,
+            ),
+            limits=httpx.Limits(
+                max_connections=self.max_connections,
+                max_keepalive_connections=self.max_keepalive,
+                keepalive_expiry=settings.http_keepalive_expiry,
+            ),
+        )
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        # Se crea bajo demanda por si se usa fuera del lifespan (scripts, pruebas)
+        if self._client is None or self._client.is_closed:
+            self._client = self._build_client()
+        return self._client
+
+    def pool_stats(self) -> Dict[str, Any]:
+        """Uso del pool de conexiones (lee el pool interno de httpcore si está disponible)"""
+        connections = []
+        if self._client is not None:
+            pool = getattr(getattr(self._client, "_transport", None), "_pool", None)
+            connections = list(getattr(pool, "connections", []))
+        return {
+            "service": self.name,
+            "in_flight": self.in_flight,
+            "connections": len(connections),
+            "idle_connections": sum(1 for conn in connections if conn.is_idle()),
+            "max_connections": self.max_connections,
+            "max_keepalive_connections": self.max_keepalive,
+        }
+
+    @classmethod
+    async def open_all(cls):
+        for instance in cls.instances:
+            instance.client
+
+    @classmethod
+    async def close_all(cls):
+        for instance in cls.instances:
+            await instance.close()
+
+    async def check_endpoints(self):
+        """Health check activo de las réplicas expulsadas; las que responden vuelven a la rotación"""
+        for endpoint in self.balancer.ejected():
+            try:
+                response = await self.client.get(
+                    f"{endpoint.url}{self.health_path}", timeout=settings.lb_health_check_timeout
+                )
+            except httpx.HTTPError:
+                continue
+            # Un 404 indica que el proceso responde aunque no exponga esa ruta
+            if response.status_code < 500:
+                self.balancer.readmit(endpoint)
+                logger.info("Réplica %s de '%s' readmitida", endpoint.url, self.name)
+
+    @classmethod
+    async def run_health_checks(cls):
+        while True:
+            await asyncio.sleep(settings.lb_health_check_seconds)
+            for instance in cls.instances:
+                try:
+                    await instance.check_endpoints()
+                except Exception:
+                    logger.exception("Error en el health check de '%s'", instance.name)
+
+    def status(self) -> Dict[str, Any]:
+        """Estado del backend para /gateway/backends"""
+        return {
+            "service": self.name,
+            "base_url": self.base_url,
+            "endpoints": self.balancer.snapshot(),
+            "breaker": self.breaker.snapshot(),
+            "latency_p50": self.latency.percentile(0.5),
+            "latency_p95": self.latency.percentile(0.95),
+            "retry_budget_tokens": round(self.retry_budget.tokens, 2),
+            "pool": self.pool_stats(),
+        }
+
+    def _with_deadline(self, kwargs: Dict[str, Any]) -> bool:
+        """
+        Ajusta timeout y cabecera de plazo según lo que le queda a la request entrante.
+        Devuelve True si el timeout quedó acotado por el plazo.
+        """
+        left = deadline.remaining()
+        if left is None:
+            return False
+        if left <= 0:
+            raise DeadlineExceeded(f"Plazo agotado antes de llamar al servicio '{self.name}'")
+        headers = dict(kwargs.get("headers") or {})
+        # Al menos 1 ms: el backend interpretaría "0" como "sin plazo"
+        headers[settings.deadline_header] = str(max(1, int(left * 1000)))
+        kwargs["headers"] = headers
+        base = self.client.timeout
+        kwargs["timeout"] = httpx.Timeout(
+            connect=min(base.connect or left, left),
+            read=min(base.read or left, left),
+            write=min(base.write or left, left),
+            pool=min(base.pool or left, left),
+        )
+        return True
+
+    def _retry_delay(self, method: str, attempt: int) -> Optional[float]:
+        """Espera antes del siguiente intento, o None si no corresponde reintentar"""
+        if method not in IDEMPOTENT_METHODS or attempt + 1 >= settings.retry_max_attempts:
+            return None
+        delay = backoff_delay(attempt, settings.retry_backoff_base, settings.retry_backoff_max)
+        left = deadline.remaining()
+        if left is not None and delay >= left:
+            return None
+        if not self.retry_budget.withdraw():
+            upstream_retries.inc(service=self.name, outcome="budget_exhausted")
+            return None
+        upstream_retries.inc(service=self.name, outcome="retried")
+        return delay
+
+    async def _send(self, method: str, path: str, **kwargs) -> httpx.Response:
+        """
+        Envía la request respetando el plazo de la request entrante. Los métodos
+        idempotentes se reintentan ante errores de transporte o 502/503/504, con
+        backoff exponencial con jitter y dentro del presupuesto de reintentos.
+        Cada intento elige réplica, así que un reintento suele ir a otra.
+        """
+        self.retry_budget.deposit()
+        user_id = auth.current_user_id() if self.user_id_header else None
+        if user_id:
+            # La identidad del token verificado prevalece sobre la que venga en el cuerpo
+            kwargs["headers"] = {**(kwargs.get("headers") or {}), self.user_id_header: user_id}
+        attempt = 0
+        while True:
+            bounded = self._with_deadline(kwargs)
+            try:
+                response = await self._attempt(method, path, **kwargs)
+            except CircuitOpenError:
+                raise
+            except httpx.TimeoutException as exc:
+                if bounded and _deadline_timeout(exc):
+                    upstream_deadline_exceeded.inc(service=self.name)
+                    raise DeadlineExceeded(f"Plazo agotado esperando al servicio '{self.name}'") from exc
+                delay = self._retry_delay(method, attempt)
+                if delay is None:
+                    raise
+            except httpx.TransportError:
+                delay = self._retry_delay(method, attempt)
+                if delay is None:
+                    raise
+            else:
+                if response.status_code not in RETRYABLE_STATUS:
+                    return response
+                delay = self._retry_delay(method, attempt)
+                if delay is None:
+                    return response
+                await response.aclose()
+            attempt += 1
+            await asyncio.sleep(delay)
+
+    def _trace(self, headers: Optional[Dict]) -> Tuple[Optional[Dict], Optional[str]]:
+        """Agrega `traceparent` con un span hijo si la request actual está en una traza"""
+        span = tracing.current_span()
+        if span is None:
+            return headers, None
+        span_id = tracing.new_span_id()
+        headers = dict(headers or {})
+        headers["traceparent"] = span.traceparent(span_id)
+        return headers, span_id
+
+    def _observe(self, method: str, status: str, started: float, span_id: Optional[str]):
+        elapsed = time.monotonic() - started
+        route = tracing.current_route()
+        upstream_duration.observe(elapsed, service=self.name, route=route, method=method)
+        upstream_responses.inc(service=self.name, method=method, status=status)
+        span = tracing.current_span()
+        if span_id and span.sampled:
+            tracing.export_span(
+                f"{self.name} {method}",
+                span,
+                span_id,
+                span.span_id,
+                time.time() - elapsed,
+                kind="client",
+                service=self.name,
+                route=route,
+                status=status,
+            )
+
+    def _release(self, endpoint: Endpoint, status: Optional[int]):
+        """Libera la réplica y registra el resultado pasivo (None = error de transporte)"""
+        endpoint.in_flight -= 1
+        if status is not None and status < 500:
+            self.balancer.record_success(endpoint)
+        elif status is not None and status not in _EJECTION_STATUSES:
+            # Ni éxito ni fallo de la réplica: no cambia la racha de fallos
+            return
+        elif self.balancer.record_failure(endpoint):
+            upstream_ejections.inc(service=self.name)
+            logger.warning("Réplica %s de '%s' fuera de rotación", endpoint.url, self.name)
+
+    async def _call(self, method: str, path: str, **kwargs) -> httpx.Response:
+        """Una request a la réplica elegida por el balanceador"""
+        endpoint = self.balancer.pick()
+        endpoint.in_flight += 1
+        try:
+            response = await self.client.request(method, f"{endpoint.url}{path}", **kwargs)
+        except httpx.TransportError as exc:
+            if _deadline_timeout(exc):
+                endpoint.in_flight -= 1
+            else:
+                self._release(endpoint, None)
+            raise
+        except BaseException:
+            # Cancelación (p. ej. el hedge perdedor): no dice nada de la réplica
+            endpoint.in_flight -= 1
+            raise
+        self._release(endpoint, response.status_code)
+        return response
+
+    async def _attempt(self, method: str, path: str, **kwargs) -> httpx.Response:
+        """Un intento pasando por el breaker; los GET pueden ir con hedging"""
+        if not self.breaker.allow():
+            raise CircuitOpenError(f"Circuito abierto para el servicio '{self.name}'")
+        kwargs["headers"], span_id = self._trace(kwargs.get("headers"))
+        started = time.monotonic()
+        status = "error"
+        try:
+            if method == "GET" and settings.hedge_enabled:
+                response = await self._hedged(method, path, **kwargs)
+            else:
+                response = await self._call(method, path, **kwargs)
+            status = str(response.status_code)
+        except Exception as exc:
+            if _deadline_timeout(exc):
+                # El plazo lo puso el cliente: se libera el lugar de sonda sin contar un fallo
+                self.breaker.release()
+            else:
+                self.breaker.record_failure()
+            raise
+        except asyncio.CancelledError:
+            # Cancelada por plazo, hedging o desconexión del cliente: no es un fallo del backend
+            self.breaker.release()
+            raise
+        finally:
+            self._observe(method, status, started, span_id)
+        if response.status_code >= 500:
+            self.breaker.record_failure()
+        else:
+            self.breaker.record_success()
+            self.latency.observe(time.monotonic() - started)
+        return response
+
+    async def _hedged(self, method: str, path: str, **kwargs) -> httpx.Response:
+        """
+        Si el primer intento no respondió dentro del percentil configurado se lanza
+        un segundo; gana la primera respuesta exitosa y la otra se cancela.
+        """
+        delay = self.latency.percentile(settings.hedge_percentile)
+        first = asyncio.create_task(self._call(method, path, **kwargs))
+        if delay is None:
+            return await first
+        tasks = {first}
         try:
-            response = await self.client.get(url, params=params, headers=headers)
+            done, _ = await asyncio.wait(tasks, timeout=delay)
+            if not done:
+                tasks.add(asyncio.create_task(self._call(method, path, **kwargs)))
+            error: Optional[BaseException] = None
+            while tasks:
+                done, tasks = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def _request(self, method: str, path: str, empty_result: Any = None, **kwargs):
+        """Ejecuta la request y aplica la convención de errores {"error", "status_code"}"""
+        self.in_flight += 1
+        try:
+            response = await self._send(method, path, **kwargs)
             response.raise_for_status()
+            if empty_result is not None and not response.content:
+                return empty_result
             return response.json()
         except httpx.HTTPStatusError as e:
             return {"error": str(e), "status_code": e.response.status_code}
+        except CircuitOpenError as e:
+            return {"error": str(e), "status_code": 503, "circuit_open": True}
+        except DeadlineExceeded as e:
+            return {"error": str(e), "status_code": 504, "deadline_exceeded": True}
         except Exception as e:
             return {"error": str(e), "status_code": 500}
+        finally:
+            self.in_flight -= 1
+
+    async def _request_raw(self, method: str, path: str, **kwargs):
+        """
+        Modo passthrough: el cuerpo exitoso se devuelve como bytes con su
+        Content-Type, sin parsear ni volver a serializar. Solo los errores se decodifican.
+        """
+        self.in_flight += 1
+        try:
+            response = await self._send(method, path, **kwargs)
+        except CircuitOpenError as e:
+            return {"error": str(e), "status_code": 503, "circuit_open": True}
+        except DeadlineExceeded as e:
+            return {"error": str(e), "status_code": 504, "deadline_exceeded": True}
+        except Exception as e:
+            return {"error": str(e), "status_code": 500}
+        finally:
+            self.in_flight -= 1
+        if response.is_error:
+            try:
+                upstream = response.json()
+            except ValueError:
+                upstream = response.text
+            return {
+                "error": f"{self.name} respondió {response.status_code}",
+                "status_code": response.status_code,
+                "upstream": upstream,
+            }
+        return Response(
+            content=response.content,
+            status_code=response.status_code,
+            media_type=response.headers.get("content-type"),
+        )
+
+    def _request_key(self, path: str, params: Optional[Dict] = None, headers: Optional[Dict] = None) -> str:
+        key = f"{self.name}:{path}"
+        if params:
+            key += "?" + urlencode(sorted((k, str(v)) for k, v in params.items() if v is not None))
+        if headers:
+            key += "#" + urlencode(sorted(headers.items()))
+        return key
+
+    def _cache_key(self, path: str, params: Optional[Dict] = None, headers: Optional[Dict] = None) -> str:
+        key = self._request_key(path, params, headers)
+        if self.user_id_header:
+            # _call inyecta el usuario del token: la respuesta no se comparte entre usuarios
+            key += "@" + (auth.current_user_id() or "")
+        return key
+
+    def invalidate(self, path: str, params: Optional[Dict] = None, prefix: bool = False):
+        """Descarta respuestas cacheadas de un GET (o de todas las que empiezan con esa ruta), de cualquier usuario"""
+        key = self._request_key(path, params)
+        if prefix:
+            response_cache.invalidate_prefix(key)
+        elif self.user_id_header:
+            response_cache.invalidate_prefix(key + "@")
+        else:
+            response_cache.invalidate(key)
+            response_cache.invalidate(key + "|raw")
+    
+    async def get(
+        self,
+        path: str,
+        params: Optional[Dict] = None,
+        headers: Optional[Dict] = None,
+        cache_ttl: float = 0,
+        raw: bool = False,
+    ):
+        """
+        GET request (GETs idénticos concurrentes comparten una sola llamada; `cache_ttl` > 0 la cachea).
+
+        Con `raw=True` devuelve una `Response` con los bytes del backend o lanza
+        `UpstreamError`, en lugar de la convención de dict con "error".
+        """
+        if raw:
+            result = await response_cache.fetch(
+                self._cache_key(path, params, headers) + "|raw",
+                cache_ttl,
+                lambda: self._request_raw("GET", path, params=params, headers=headers),
+                service=self.name,
+            )
+            if isinstance(result, dict):
+                raise UpstreamError(result.get("status_code", 500), result)
+            return result
+        return await response_cache.fetch(
+            self._cache_key(path, params, headers),
+            cache_ttl,
+            lambda: self._request("GET", path, params=params, headers=headers),
+            service=self.name,
+        )
     
     async def post(
         self,
@@ -33,22 +514,15 @@ class BaseClient:
         params: Optional[Dict] = None,
     ):
         """POST request"""
-        url = f"{self.base_url}{path}"
-        try:
-            response = await self.client.post(
-                url,
-                json=json,
-                data=data,
-                files=files,
-                headers=headers,
-                params=params,
-            )
-            response.raise_for_status()
-            return response.json()
-        except httpx.HTTPStatusError as e:
-            return {"error": str(e), "status_code": e.response.status_code}
-        except Exception as e:
-            return {"error": str(e), "status_code": 500}
+        return await self._request(
+            "POST",
+            path,
+            json=json,
+            data=data,
+            files=files,
+            headers=headers,
+            params=params,
+        )
     
     async def put(
         self,
@@ -58,15 +532,7 @@ class BaseClient:
         params: Optional[Dict] = None,
     ):
         """PUT request"""
-        url = f"{self.base_url}{path}"
-        try:
-            response = await self.client.put(url, json=json, headers=headers, params=params)
-            response.raise_for_status()
-            return response.json()
-        except httpx.HTTPStatusError as e:
-            return {"error": str(e), "status_code": e.response.status_code}
-        except Exception as e:
-            return {"error": str(e), "status_code": 500}
+        return await self._request("PUT", path, json=json, headers=headers, params=params)
     
     async def delete(
         self,
@@ -75,15 +541,7 @@ class BaseClient:
         params: Optional[Dict] = None,
     ):
         """DELETE request"""
-        url = f"{self.base_url}{path}"
-        try:
-            response = await self.client.delete(url, headers=headers, params=params)
-            response.raise_for_status()
-            return response.json() if response.text else {"success": True}
-        except httpx.HTTPStatusError as e:
-            return {"error": str(e), "status_code": e.response.status_code}
-        except Exception as e:
-            return {"error": str(e), "status_code": 500}
+        return await self._request("DELETE", path, empty_result={"success": True}, headers=headers, params=params)
 
     async def patch(
         self,
@@ -93,16 +551,79 @@ class BaseClient:
         params: Optional[Dict] = None,
     ):
         """PATCH request"""
-        url = f"{self.base_url}{path}"
+        return await self._request("PATCH", path, json=json, headers=headers, params=params)
+
+    async def stream(
+        self,
+        method: str,
+        path: str,
+        content: Any = None,
+        headers: Optional[Dict] = None,
+        params: Optional[Dict] = None,
+    ) -> httpx.Response:
+        """Request en modo streaming: ni el cuerpo enviado ni el recibido se cargan en memoria.
+
+        Quien llama debe cerrar la respuesta (`await response.aclose()`); hasta
+        entonces cuenta como request en curso.
+        """
+        if not self.breaker.allow():
+            raise CircuitOpenError(f"Circuito abierto para el servicio '{self.name}'")
+        # Sin reintentos ni hedging: el cuerpo enviado no se puede repetir
+        endpoint = self.balancer.pick()
+        headers, span_id = self._trace(headers)
+        request = self.client.build_request(
+            method, f"{endpoint.url}{path}", content=content, headers=headers, params=params
+        )
+        started = time.monotonic()
+        status = "error"
+        endpoint.in_flight += 1
+        self.in_flight += 1
         try:
-            response = await self.client.patch(url, json=json, headers=headers, params=params)
-            response.raise_for_status()
-            return response.json()
-        except httpx.HTTPStatusError as e:
-            return {"error": str(e), "status_code": e.response.status_code}
-        except Exception as e:
-            return {"error": str(e), "status_code": 500}
+            response = await self.client.send(request, stream=True)
+            status = str(response.status_code)
+        except httpx.TransportError:
+            self.in_flight -= 1
+            self.breaker.record_failure()
+            self._release(endpoint, None)
+            raise
+        except Exception:
+            self.in_flight -= 1
+            self.breaker.record_failure()
+            endpoint.in_flight -= 1
+            raise
+        except asyncio.CancelledError:
+            self.in_flight -= 1
+            endpoint.in_flight -= 1
+            self.breaker.release()
+            raise
+        finally:
+            # En streaming se mide hasta recibir las cabeceras
+            self._observe(method, status, started, span_id)
+        # La réplica se libera al recibir las cabeceras, no al terminar el cuerpo
+        self._release(endpoint, response.status_code)
+        response.stream = _TrackedStream(response.stream, self._stream_closed)
+        if response.status_code >= 500:
+            self.breaker.record_failure()
+        else:
+            self.breaker.record_success()
+        return response
     
+    def _stream_closed(self):
+        self.in_flight -= 1
+
     async def close(self):
         """Cerrar conexión"""
-        await self.client.aclose()
+        if self._client is not None:
+            await self._client.aclose()
+
+
+@metrics.on_collect
+def _collect_pool_metrics():
+    for instance in BaseClient.instances:
+        stats = instance.pool_stats()
+        pool_in_flight.set(stats["in_flight"], service=instance.name)
+        pool_connections.set(stats["connections"], service=instance.name)
+        pool_idle_connections.set(stats["idle_connections"], service=instance.name)
+        pool_max_connections.set(stats["max_connections"], service=instance.name)
+        upstream_endpoints.set(len(instance.balancer.available()), service=instance.name, state="healthy")
+        upstream_endpoints.set(len(instance.balancer.ejected()), service=instance.name, state="ejected")
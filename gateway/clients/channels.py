@@ -6,20 +6,20 @@ class ChannelsClient(BaseClient):
     """Cliente para interactuar con el servicio de canales"""
     
     def __init__(self):
-        super().__init__(settings.channels_service_url)
+        super().__init__(settings.channels_service_url, name="channels")
     
-    async def list_channels(self, page: int = 1, page_size: int = 20):
+    async def list_channels(self, page: int = 1, page_size: int = 20, raw: bool = False):
         """Listar canales paginados"""
         params = {"page": page, "page_size": page_size}
-        return await self.get("/v1/channels/", params=params)
+        return await self.get("/v1/channels/", params=params, raw=raw)
     
-    async def list_channels_by_member(self, user_id: str):
+    async def list_channels_by_member(self, user_id: str, raw: bool = False):
         """Listar canales donde participa un usuario"""
-        return await self.get(f"/v1/members/{user_id}")
+        return await self.get(f"/v1/members/{user_id}", raw=raw)
     
-    async def list_channels_by_owner(self, owner_id: str):
+    async def list_channels_by_owner(self, owner_id: str, raw: bool = False):
         """Listar canales por propietario"""
-        return await self.get(f"/v1/members/owner/{owner_id}")
+        return await self.get(f"/v1/members/owner/{owner_id}", raw=raw)
     
     async def get_channel(self, channel_id: str):
         """Obtener un canal específico"""
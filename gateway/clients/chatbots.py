@@ -1,23 +1,44 @@
 """Clientes para los chatbots externos"""
+import json
+import httpx
 from clients.base import BaseClient
 from config import settings
 
+_STREAM_HEADERS = {"Content-Type": "application/json", "Accept": "text/event-stream"}
+
+
+def _body(message: str) -> bytes:
+    return json.dumps({"message": message}).encode("utf-8")
+
 
 class WikipediaChatClient(BaseClient):
+    # Campo con el texto de la respuesta cuando el bot no responde en streaming
+    answer_field = "message"
+
     def __init__(self):
-        super().__init__(settings.wikipedia_service_url)
+        super().__init__(settings.wikipedia_service_url, name="wikipedia")
 
     async def ask(self, message: str):
         return await self.post("/chat-wikipedia", json={"message": message})
 
+    async def ask_stream(self, message: str) -> httpx.Response:
+        """Respuesta en streaming (quien llama debe cerrarla)"""
+        return await self.stream("POST", "/chat-wikipedia", content=_body(message), headers=_STREAM_HEADERS)
+
 
 class ProgrammingChatClient(BaseClient):
+    answer_field = "reply"
+
     def __init__(self):
-        super().__init__(settings.chatbot_programming_service_url)
+        super().__init__(settings.chatbot_programming_service_url, name="chatbot_programming")
 
     async def ask(self, message: str):
         return await self.post("/chat", json={"message": message})
 
+    async def ask_stream(self, message: str) -> httpx.Response:
+        """Respuesta en streaming (quien llama debe cerrarla)"""
+        return await self.stream("POST", "/chat", content=_body(message), headers=_STREAM_HEADERS)
+
 
 wikipedia_chat_client = WikipediaChatClient()
 programming_chat_client = ProgrammingChatClient()
@@ -1,32 +1,43 @@
 """Cliente para el Servicio de Archivos (Grupo 7 - Nuestro)"""
 from clients.base import BaseClient
 from config import settings
-from typing import Optional
+from typing import Optional, AsyncIterator, Dict, List
 
 class FilesClient(BaseClient):
     """Cliente para interactuar con el servicio de archivos"""
+
+    health_path = "/readyz"
     
     def __init__(self):
-        super().__init__(settings.files_service_url)
+        super().__init__(settings.files_service_url, name="files")
     
-    async def upload_file(self, file_data: bytes, filename: str, message_id: Optional[str] = None, thread_id: Optional[str] = None):
-        """Subir un archivo"""
-        files = {"upload": (filename, file_data)}
-        data = {}
+    async def upload_file(
+        self,
+        body: AsyncIterator[bytes],
+        headers: Dict[str, str],
+        message_id: Optional[str] = None,
+        thread_id: Optional[str] = None,
+    ):
+        """Subir un archivo retransmitiendo el multipart original por bloques"""
+        params = {}
         if message_id:
-            data["message_id"] = message_id
+            params["message_id"] = message_id
         if thread_id:
-            data["thread_id"] = thread_id
-        return await self.post("/v1/files", files=files, data=data)
+            params["thread_id"] = thread_id
+        return await self.stream("POST", "/v1/files", content=body, headers=headers, params=params)
     
-    async def list_files(self, message_id: Optional[str] = None, thread_id: Optional[str] = None):
+    async def list_files(self, message_id: Optional[str] = None, thread_id: Optional[str] = None, raw: bool = False):
         """Listar archivos por mensaje o thread"""
         params = {}
         if message_id:
             params["message_id"] = message_id
         if thread_id:
             params["thread_id"] = thread_id
-        return await self.get("/v1/files", params=params)
+        return await self.get("/v1/files", params=params, raw=raw)
+    
+    async def lookup_files(self, message_ids: Optional[List[str]] = None, file_ids: Optional[List[str]] = None):
+        """Metadatos de muchos mensajes/archivos en una sola llamada, agrupados por message_id"""
+        return await self.post("/v1/files:lookup", json={"message_ids": message_ids or [], "file_ids": file_ids or []})
     
     async def get_file(self, file_id: str):
         """Obtener información de un archivo"""
@@ -36,6 +47,19 @@ class FilesClient(BaseClient):
         """Eliminar un archivo"""
         return await self.delete(f"/v1/files/{file_id}")
     
+    async def delete_files(self, message_id: Optional[str] = None, thread_id: Optional[str] = None):
+        """Eliminar todos los archivos de un mensaje o thread en una sola llamada"""
+        params = {}
+        if message_id:
+            params["message_id"] = message_id
+        if thread_id:
+            params["thread_id"] = thread_id
+        return await self.delete("/v1/files", params=params)
+    
+    async def download_content(self, file_id: str, headers: Optional[Dict[str, str]] = None):
+        """Descargar el contenido en streaming (respuesta abierta, ver BaseClient.stream)"""
+        return await self.stream("GET", f"/v1/files/{file_id}/content", headers=headers)
+    
     async def get_download_url(self, file_id: str):
         """Obtener URL de descarga pre-firmada"""
         return await self.post(f"/v1/files/{file_id}/presign-download")
@@ -5,15 +5,18 @@ from typing import Optional, Dict, Any, List
 
 class MessagesClient(BaseClient):
     """Cliente para interactuar con el servicio de mensajes"""
+
+    user_id_header = "X-User-Id"
     
     def __init__(self):
-        super().__init__(settings.messages_service_url)
+        super().__init__(settings.messages_service_url, name="messages")
     
     async def list_messages(
         self, 
         thread_id: str,
         limit: int = 50,
-        cursor: Optional[str] = None
+        cursor: Optional[str] = None,
+        raw: bool = False,
     ) -> List[Dict[str, Any]]:
         """
         Lista mensajes de un thread.
@@ -22,11 +25,12 @@ class MessagesClient(BaseClient):
             thread_id: ID del thread (UUID, requerido)
             limit: Número máximo de mensajes (1-200, default 50)
             cursor: Cursor para paginación (opcional)
+            raw: Devolver el cuerpo sin parsear (modo passthrough)
         """
         params = {"limit": limit}
         if cursor:
             params["cursor"] = cursor
-        return await self.get(f"/threads/{thread_id}/messages", params=params)
+        return await self.get(f"/threads/{thread_id}/messages", params=params, raw=raw)
     
     async def get_message(self, thread_id: str, message_id: str) -> Dict[str, Any]:
         """Obtener un mensaje específico de un thread"""
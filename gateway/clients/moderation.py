@@ -1,13 +1,16 @@
 """Cliente para el servicio de Moderación (Grupo 6)"""
+import hashlib
 from clients.base import BaseClient
+from cache import response_cache
 from config import settings
+from moderation_blacklist import ANALYZE_CACHE_PREFIX, blacklist_mirror
 from typing import Optional
 
 class ModerationClient(BaseClient):
     """Cliente para interactuar con el servicio de moderación"""
     
     def __init__(self):
-        super().__init__(settings.moderation_service_url)
+        super().__init__(settings.moderation_service_url, name="moderation")
         self.api_key = None  # Se puede configurar si es necesario
     
     def _get_headers(self):
@@ -17,7 +20,10 @@ class ModerationClient(BaseClient):
         return None
     
     async def check_message(self, user_id: str, channel_id: str, content: str):
-        """Moderar un mensaje"""
+        """
+        Moderar un mensaje. Siempre decide el servicio: también registra violaciones
+        y baneos, que el gateway no conoce.
+        """
         payload = {
             "user_id": user_id,
             "channel_id": channel_id,
@@ -26,8 +32,14 @@ class ModerationClient(BaseClient):
         return await self.post("/api/v1/moderation/check", json=payload)
     
     async def analyze_text(self, text: str):
-        """Analizar texto para moderación"""
-        return await self.post("/api/v1/moderation/analyze", json={"text": text})
+        """Analizar texto para moderación (respuesta del servicio memoizada por hash del texto)"""
+        digest = hashlib.sha256(text.encode("utf-8")).hexdigest()
+        return await response_cache.fetch(
+            f"{ANALYZE_CACHE_PREFIX}{digest}",
+            settings.cache_ttl_analyze,
+            lambda: self.post("/api/v1/moderation/analyze", json={"text": text}),
+            service=self.name,
+        )
     
     async def get_user_status(self, user_id: str, channel_id: str):
         """Obtener estado de moderación de un usuario"""
@@ -47,11 +59,15 @@ class ModerationClient(BaseClient):
     
     async def list_blacklist_words(self):
         """Listar palabras de la lista negra"""
-        return await self.get("/api/v1/blacklist/words")
+        return await self.get("/api/v1/blacklist/words", cache_ttl=settings.cache_ttl_blacklist)
     
     async def add_blacklist_word(self, word: str):
         """Agregar palabra a lista negra (requiere API Key)"""
-        return await self.post("/api/v1/blacklist/words", json={"word": word}, headers=self._get_headers())
+        result = await self.post("/api/v1/blacklist/words", json={"word": word}, headers=self._get_headers())
+        self.invalidate("/api/v1/blacklist/words")
+        if "error" not in result:
+            blacklist_mirror.add(word)
+        return result
 
 # Instancia global
 moderation_client = ModerationClient()
@@ -8,7 +8,7 @@ class PresenceClient(BaseClient):
     """Cliente HTTP para el servicio de presencia"""
 
     def __init__(self):
-        super().__init__(settings.presence_service_url)
+        super().__init__(settings.presence_service_url, name="presence")
 
     async def register(self, user_id: str, device: Optional[str] = None, ip: Optional[str] = None):
         payload = {"userId": user_id}
@@ -18,9 +18,9 @@ class PresenceClient(BaseClient):
             payload["ip"] = ip
         return await self.post("/presence", json=payload)
 
-    async def list_users(self, status: Optional[str] = None):
+    async def list_users(self, status: Optional[str] = None, raw: bool = False):
         params = {"status": status} if status else None
-        return await self.get("/presence", params=params)
+        return await self.get("/presence", params=params, raw=raw)
 
     async def get_user(self, user_id: str):
         return await self.get(f"/presence/{user_id}")
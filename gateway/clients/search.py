@@ -7,7 +7,7 @@ class SearchClient(BaseClient):
     """Cliente para interactuar con el servicio de búsqueda"""
     
     def __init__(self):
-        super().__init__(settings.search_service_url)
+        super().__init__(settings.search_service_url, name="search")
     
     def _build_params(self, query: str, extra: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
         params = {"q": query}
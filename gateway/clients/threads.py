@@ -8,13 +8,18 @@ class ThreadsClient(BaseClient):
     """Cliente HTTP para administrar hilos"""
 
     def __init__(self):
-        super().__init__(settings.threads_service_url)
+        super().__init__(settings.threads_service_url, name="threads")
 
-    async def list_threads_for_channel(self, channel_id: str):
-        return await self.get("/channel/get_threads", params={"channel_id": channel_id})
+    async def list_threads_for_channel(self, channel_id: str, raw: bool = False):
+        return await self.get(
+            "/channel/get_threads",
+            params={"channel_id": channel_id},
+            cache_ttl=settings.cache_ttl_threads,
+            raw=raw,
+        )
 
-    async def list_threads_for_user(self, user_id: str):
-        return await self.get(f"/threads/mine/{user_id}")
+    async def list_threads_for_user(self, user_id: str, raw: bool = False):
+        return await self.get(f"/threads/mine/{user_id}", raw=raw)
 
     async def create_thread(self, channel_id: str, thread_name: str, user_id: str):
         params = {
@@ -22,10 +27,12 @@ class ThreadsClient(BaseClient):
             "thread_name": thread_name,
             "user_id": user_id,
         }
-        return await self.post("/threads/", params=params)
+        result = await self.post("/threads/", params=params)
+        self.invalidate("/channel/get_threads", params={"channel_id": channel_id})
+        return result
 
     async def get_thread(self, thread_id: str):
-        return await self.get(f"/threads/{thread_id}")
+        return await self.get(f"/threads/{thread_id}", cache_ttl=settings.cache_ttl_threads)
 
     async def edit_thread(self, thread_id: str, title: Optional[str] = None, metadata: Optional[dict] = None):
         payload = {}
@@ -33,7 +40,11 @@ class ThreadsClient(BaseClient):
             payload["title"] = title
         if metadata is not None:
             payload["metadata"] = metadata
-        return await self.put(f"/threads/{thread_id}/edit", json=payload)
+        result = await self.put(f"/threads/{thread_id}/edit", json=payload)
+        self.invalidate(f"/threads/{thread_id}")
+        # El canal del hilo no se conoce aquí: se descartan todos los listados por canal
+        self.invalidate("/channel/get_threads", prefix=True)
+        return result
 
 
 threads_client = ThreadsClient()
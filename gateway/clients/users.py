@@ -4,19 +4,20 @@ from config import settings
 
 class UsersClient(BaseClient):
     def __init__(self):
-        super().__init__(settings.users_service_url)
+        super().__init__(settings.users_service_url, name="users")
     
-    async def get_current_user(self):
+    async def get_current_user(self, authorization: str = None):
         """Obtener información del usuario actual (requiere token)"""
-        return await self.get("/v1/users/me")
+        headers = {"Authorization": authorization} if authorization else None
+        return await self.get("/v1/users/me", headers=headers)
     
     async def get_user(self, user_id: str):
         """Obtener un usuario por ID"""
-        return await self.get(f"/v1/users/{user_id}")
+        return await self.get(f"/v1/users/{user_id}", cache_ttl=settings.cache_ttl_users)
     
     async def get_user_by_username(self, username: str):
         """Obtener un usuario por username"""
-        return await self.get(f"/v1/users/username/{username}")
+        return await self.get(f"/v1/users/username/{username}", cache_ttl=settings.cache_ttl_users)
     
     async def create_user(self, username: str, email: str, password: str, full_name: str = None):
         """Crear un nuevo usuario"""
@@ -38,11 +39,20 @@ class UsersClient(BaseClient):
             data["full_name"] = full_name
         if is_active is not None:
             data["is_active"] = is_active
-        return await self.put(f"/v1/users/{user_id}", json=data)
+        result = await self.put(f"/v1/users/{user_id}", json=data)
+        self._invalidate_user(user_id)
+        return result
     
     async def delete_user(self, user_id: str):
         """Eliminar un usuario"""
-        return await self.delete(f"/v1/users/{user_id}")
+        result = await self.delete(f"/v1/users/{user_id}")
+        self._invalidate_user(user_id)
+        return result
+
+    def _invalidate_user(self, user_id: str):
+        """Descarta el usuario cacheado (el username no se conoce aquí: se limpian todas)"""
+        self.invalidate(f"/v1/users/{user_id}")
+        self.invalidate("/v1/users/username/", prefix=True)
     
     async def authenticate(self, username_or_email: str, password: str):
         """Autenticar usuario"""
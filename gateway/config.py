@@ -5,7 +5,7 @@ import json
 
 from pydantic_settings import BaseSettings
 from pydantic import ConfigDict
-from typing import List
+from typing import Dict, List, Tuple
 
 class Settings(BaseSettings):
     model_config = ConfigDict(
@@ -42,7 +42,7 @@ class Settings(BaseSettings):
                 pass
         return [origin.strip() for origin in value.split(",") if origin.strip()]
     
-    # URLs de los microservicios
+    # URLs de los microservicios (varias réplicas: URLs separadas por coma)
     users_service_url: str = "https://users.inf326.nursoft.dev/usersservice"
     channels_service_url: str = "https://channel-api-134-199-176-197.nip.io"
     messages_service_url: str = "https://messages-service.kroder.dev"
@@ -56,5 +56,114 @@ class Settings(BaseSettings):
     
     # Timeouts
     http_timeout: int = 30
+    http_connect_timeout: float = 5.0
+    http_read_timeout: float = 0  # 0 = usar http_timeout
+    http_pool_timeout: float = 5.0
+
+    # Circuit breaker por backend
+    breaker_failure_threshold: int = 5
+    breaker_open_seconds: float = 30.0
+    breaker_half_open_max_calls: int = 1
+
+    # Balanceo entre réplicas: fallos seguidos para expulsar una y health check para readmitirla
+    lb_failure_threshold: int = 3
+    lb_max_ejection_percent: int = 50  # nunca se saca de rotación más de este porcentaje de réplicas
+    lb_health_check_seconds: float = 5.0
+    lb_health_check_timeout: float = 2.0
+
+    # Reintentos de métodos idempotentes (backoff exponencial con jitter)
+    retry_max_attempts: int = 3  # incluye el primer intento; 1 = sin reintentos
+    retry_backoff_base: float = 0.05
+    retry_backoff_max: float = 1.0
+    retry_budget_ratio: float = 0.2  # reintentos permitidos por request (en promedio)
+    retry_budget_max_tokens: float = 10.0
+
+    # JWT: verificación local de tokens bearer (JWT_SECRET para HS*, o JWKS del servicio de usuarios)
+    jwt_secret: str = ""
+    jwt_jwks_path: str = "/.well-known/jwks.json"  # relativo a users_service_url; vacío = no usar JWKS
+    jwt_algorithms: str = "RS256,HS256"
+    jwt_audience: str = ""
+    jwt_issuer: str = ""
+    jwt_user_id_claim: str = "sub"
+    jwt_keys_refresh_seconds: float = 300.0
+    jwt_claims_cache_size: int = 10000
+
+    # Trazas W3C: fracción de requests sin traceparent entrante que inician una traza muestreada
+    trace_sample_ratio: float = 0.0
+
+    # Plazo por request: el cliente puede pedir uno menor en la cabecera (ms), que se reenvía a los backends
+    request_deadline_seconds: float = 30.0  # 0 = sin plazo por defecto
+    deadline_header: str = "X-Request-Timeout-Ms"
+
+    # Hedging de GETs: segundo intento si el primero supera el percentil indicado
+    hedge_enabled: bool = False
+    hedge_percentile: float = 0.95
+    hedge_min_samples: int = 20
+
+    # Caché de respuestas (TTL en segundos por ruta; 0 = sin caché)
+    cache_max_entries: int = 5000
+    # Plazo máximo de una carga compartida (coalescing / refresco), acotado por el de la request que la inicia
+    cache_load_timeout_seconds: float = 30.0
+    cache_stale_seconds: float = 30.0
+    cache_ttl_users: float = 60.0
+    cache_ttl_threads: float = 15.0
+    cache_ttl_blacklist: float = 60.0
+    cache_ttl_analyze: float = 300.0  # resultados de /moderation/analyze por hash del texto
+
+    # Copia local de la lista negra en el gateway (no aprueba ni rechaza: decide el servicio)
+    moderation_blacklist_sync_enabled: bool = True
+    moderation_blacklist_refresh_seconds: float = 60.0
+
+    # Heartbeats de presencia: se agregan en memoria y se envían cada N segundos
+    presence_heartbeat_flush_seconds: float = 10.0
+    presence_heartbeat_concurrency: int = 20
+    presence_heartbeat_max_pending: int = 50000  # al llegar a este número se envía de inmediato
+
+    # RabbitMQ (eventos de archivos para /gateway/files/events)
+    rabbitmq_host: str = "rabbitmq"
+    rabbitmq_port: int = 5672
+    rabbitmq_user: str = "guest"
+    rabbitmq_password: str = "guest"
+    rabbitmq_exchange: str = "files"
+    file_events_enabled: bool = True
+    file_events_queue_size: int = 100  # eventos pendientes por suscriptor antes de desconectarlo
+    file_events_keepalive_seconds: float = 15.0
+
+    # Prefetch de la página siguiente de mensajes (?prefetch=true en /gateway/messages/threads/{id})
+    message_prefetch_ttl_seconds: float = 30.0
+    message_prefetch_per_thread: int = 2
+    message_prefetch_max_bytes: int = 20 * 1024 * 1024
+
+    # POST /gateway/batch: máximo de sub-requests por lote y cuántas corren a la vez
+    batch_max_items: int = 20
+    batch_concurrency: int = 8
+
+    # Concurrencia máxima de llamadas al componer vistas (p. ej. /threads/{id}/view)
+    view_fanout_concurrency: int = 10
+
+    # Plazo común para la búsqueda agregada (/gateway/search)
+    search_deadline_seconds: float = 3.0
+
+    # Pool de conexiones HTTP (por backend)
+    http_max_connections: int = 100
+    http_max_keepalive_connections: int = 20
+    http_keepalive_expiry: float = 60.0
+    http2_enabled: bool = False
+    # Overrides por backend: "files=50:20,messages=30" (max_conexiones[:max_keepalive])
+    http_pool_limits_raw: str = ""
+
+    def pool_limits(self, service: str) -> Tuple[int, int]:
+        """Límites (max_connections, max_keepalive_connections) para un backend"""
+        overrides: Dict[str, Tuple[int, int]] = {}
+        for entry in (self.http_pool_limits_raw or "").split(","):
+            name, _, value = entry.strip().partition("=")
+            if not name or not value:
+                continue
+            max_connections, _, max_keepalive = value.partition(":")
+            overrides[name.strip()] = (
+                int(max_connections),
+                int(max_keepalive) if max_keepalive else min(int(max_connections), self.http_max_keepalive_connections),
+            )
+        return overrides.get(service, (self.http_max_connections, self.http_max_keepalive_connections))
 
 settings = Settings()
@@ -0,0 +1,68 @@
+"""Plazo (deadline) de cada request entrante, propagado a los backends"""
+import contextvars
+import time
+from typing import Optional
+
+from config import settings
+
+
+class DeadlineExceeded(Exception):
+    """Se agotó el plazo de la request antes de obtener respuesta del backend"""
+
+
+_deadline: contextvars.ContextVar[Optional[float]] = contextvars.ContextVar("gateway_deadline", default=None)
+
+
+def remaining() -> Optional[float]:
+    """Segundos que le quedan a la request actual (None = sin plazo)"""
+    deadline = _deadline.get()
+    if deadline is None:
+        return None
+    return deadline - time.monotonic()
+
+
+def detached(budget: Optional[float] = None) -> contextvars.Context:
+    """
+    Copia del contexto sin el plazo de la request, para tareas compartidas o que la
+    sobreviven (p. ej. cargas de caché). Con `budget` la tarea tiene su propio plazo.
+    """
+    context = contextvars.copy_context()
+    context.run(_deadline.set, time.monotonic() + budget if budget else None)
+    return context
+
+
+def _parse_timeout_ms(value: bytes) -> Optional[float]:
+    try:
+        seconds = float(value) / 1000
+    except ValueError:
+        return None
+    return seconds if seconds > 0 else None
+
+
+class DeadlineMiddleware:
+    """
+    Fija el plazo de la request: el que indique el cliente en `settings.deadline_header`
+    (milisegundos), acotado por `settings.request_deadline_seconds`. BaseClient lo
+    usa como timeout de cada llamada y lo reenvía a los backends en la misma cabecera.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self.header = settings.deadline_header.lower().encode("latin-1")
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        budget = settings.request_deadline_seconds or None
+        for name, value in scope["headers"]:
+            if name == self.header:
+                requested = _parse_timeout_ms(value)
+                if requested is not None:
+                    budget = min(budget, requested) if budget else requested
+                break
+        token = _deadline.set(time.monotonic() + budget if budget else None)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _deadline.reset(token)
@@ -0,0 +1,140 @@
+"""Eventos de archivos (files.added.v1 / files.deleted.v1) repartidos a clientes SSE"""
+import asyncio
+import json
+import logging
+from typing import Any, Dict, Optional, Set, Tuple
+
+import aio_pika
+
+import metrics
+from config import settings
+
+logger = logging.getLogger("gateway.file_events")
+
+ROUTING_KEYS = ("files.added.v1", "files.deleted.v1")
+
+events_received = metrics.Counter("gateway_file_events_received_total", "Eventos de archivos recibidos desde RabbitMQ")
+events_delivered = metrics.Counter("gateway_file_events_delivered_total", "Eventos entregados a suscriptores")
+subscribers_dropped = metrics.Counter("gateway_file_events_dropped_subscribers_total", "Suscriptores desconectados por no consumir a tiempo")
+subscribers_active = metrics.Gauge("gateway_file_events_subscribers", "Suscriptores SSE conectados")
+
+
+class Subscription:
+    """Cola acotada de un cliente; si se llena, el cliente se desconecta (debe reconectar y recargar)"""
+
+    def __init__(self, keys: Tuple[Tuple[str, str], ...], max_queue: int):
+        self.keys = keys
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=max_queue)
+        self.dropped = False
+
+    def offer(self, event: Dict[str, Any]) -> bool:
+        try:
+            self.queue.put_nowait(event)
+            return True
+        except asyncio.QueueFull:
+            # Se vacía la cola y se deja solo la marca de fin para que el stream termine ya
+            self.dropped = True
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(None)
+            return False
+
+
+class FileEventHub:
+    """
+    Un único consumidor AMQP por proceso (cola exclusiva ligada al exchange de
+    archivos) que reparte cada evento a los suscriptores de su thread_id/message_id.
+    """
+
+    def __init__(self, max_queue: int):
+        self.max_queue = max_queue
+        self._subscribers: Dict[Tuple[str, str], Set[Subscription]] = {}
+        self._connection: Optional[aio_pika.abc.AbstractRobustConnection] = None
+
+    def subscribe(self, thread_id: Optional[str] = None, message_id: Optional[str] = None) -> Subscription:
+        keys = tuple(key for key in (("thread_id", thread_id), ("message_id", message_id)) if key[1])
+        subscription = Subscription(keys, self.max_queue)
+        for key in keys:
+            self._subscribers.setdefault(key, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        for key in subscription.keys:
+            subscribers = self._subscribers.get(key)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscribers[key]
+
+    def subscriber_count(self) -> int:
+        return len({sub for subs in self._subscribers.values() for sub in subs})
+
+    def dispatch(self, event: Dict[str, Any]):
+        events_received.inc()
+        data = event.get("data") or {}
+        targets: Set[Subscription] = set()
+        for field in ("thread_id", "message_id"):
+            if data.get(field):
+                targets.update(self._subscribers.get((field, str(data[field])), ()))
+        for subscription in targets:
+            if subscription.offer(event):
+                events_delivered.inc()
+            else:
+                subscribers_dropped.inc()
+                self.unsubscribe(subscription)
+
+    @property
+    def connected(self) -> bool:
+        return self._connection is not None and not self._connection.is_closed
+
+    async def _on_message(self, message: aio_pika.abc.AbstractIncomingMessage):
+        async with message.process():
+            try:
+                self.dispatch(json.loads(message.body))
+            except ValueError:
+                logger.warning("Evento de archivos con cuerpo inválido")
+
+    async def _connect(self):
+        connection = await aio_pika.connect_robust(
+            host=settings.rabbitmq_host,
+            port=settings.rabbitmq_port,
+            login=settings.rabbitmq_user,
+            password=settings.rabbitmq_password,
+        )
+        try:
+            channel = await connection.channel()
+            await channel.set_qos(prefetch_count=100)
+            exchange = await channel.declare_exchange(settings.rabbitmq_exchange, aio_pika.ExchangeType.TOPIC, durable=True)
+            queue = await channel.declare_queue("", exclusive=True, auto_delete=True)
+            for routing_key in ROUTING_KEYS:
+                await queue.bind(exchange, routing_key=routing_key)
+            await queue.consume(self._on_message)
+        except Exception:
+            await connection.close()
+            raise
+        self._connection = connection
+
+    async def run(self):
+        """Conecta con reintentos; una vez conectado, connect_robust se encarga de reconectar"""
+        delay = 1.0
+        while self._connection is None:
+            try:
+                await self._connect()
+                logger.info("Suscrito a eventos de archivos en '%s'", settings.rabbitmq_exchange)
+            except Exception as exc:
+                logger.warning("No se pudo conectar a RabbitMQ (%s); reintento en %.0fs", exc, delay)
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, 30.0)
+
+    async def close(self):
+        if self._connection is not None:
+            await self._connection.close()
+            self._connection = None
+
+
+file_event_hub = FileEventHub(settings.file_events_queue_size)
+
+
+@metrics.on_collect
+def _collect_subscribers():
+    subscribers_active.set(file_event_hub.subscriber_count())
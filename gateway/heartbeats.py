@@ -0,0 +1,118 @@
+"""Agregación de heartbeats de presencia: se absorben en memoria y se envían por lotes"""
+import asyncio
+import logging
+import time
+from typing import Dict, Set
+
+import metrics
+from clients.presence import presence_client
+from config import settings
+
+logger = logging.getLogger("gateway.heartbeats")
+
+heartbeats_received = metrics.Counter("gateway_presence_heartbeats_total", "Heartbeats recibidos por el gateway")
+heartbeats_flushed = metrics.Counter("gateway_presence_heartbeats_flushed_total", "Heartbeats enviados al servicio de presencia por resultado")
+heartbeats_pending = metrics.Gauge("gateway_presence_heartbeats_pending", "Usuarios con heartbeat pendiente de enviar")
+
+
+class HeartbeatAggregator:
+    """
+    Guarda solo el último heartbeat de cada usuario (user_id -> epoch en segundos)
+    y cada `flush_seconds` envía un PATCH por usuario pendiente, con concurrencia
+    acotada. N heartbeats de un usuario dentro del intervalo se reducen a uno.
+    """
+
+    def __init__(self, flush_seconds: float, concurrency: int, max_pending: int):
+        self.flush_seconds = flush_seconds
+        self.concurrency = concurrency
+        self.max_pending = max_pending
+        self._pending: Dict[str, int] = {}
+        # Usuarios con cambio de estado desde que empezó el envío en curso
+        self._changed: Set[str] = set()
+        # Heartbeats en vuelo por usuario, para que un cambio de estado espere a que terminen
+        self._sending: Dict[str, asyncio.Future] = {}
+        self._wakeup = asyncio.Event()
+        self._stopping = False
+
+    def record(self, user_id: str):
+        self._pending[user_id] = int(time.time())
+        heartbeats_received.inc()
+        if len(self._pending) >= self.max_pending:
+            self._wakeup.set()
+
+    async def discard(self, user_id: str):
+        """
+        Antes de enviar un cambio de estado: descarta el heartbeat pendiente, evita
+        que el envío en curso lo mande y espera al que ya esté en vuelo, para que
+        un heartbeat viejo no llegue después (p. ej. volviendo a marcar online).
+        """
+        self._pending.pop(user_id, None)
+        self._changed.add(user_id)
+        sending = self._sending.get(user_id)
+        if sending is not None:
+            await asyncio.shield(sending)
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    async def flush(self):
+        if not self._pending:
+            return
+        # Se intercambia el dict: lo que llegue durante el envío queda para la próxima ronda
+        batch, self._pending = self._pending, {}
+        self._changed.clear()
+        items = iter(batch.items())
+        loop = asyncio.get_running_loop()
+
+        # `concurrency` workers consumen el mismo iterador: sin una task por usuario
+        async def worker():
+            for user_id, seen_at in items:
+                if user_id in self._changed:
+                    heartbeats_flushed.inc(outcome="superseded")
+                    continue
+                sending = self._sending[user_id] = loop.create_future()
+                try:
+                    result = await presence_client.update_status(user_id, heartbeat=True)
+                finally:
+                    del self._sending[user_id]
+                    sending.set_result(None)
+                if isinstance(result, dict) and "error" in result:
+                    heartbeats_flushed.inc(outcome="error")
+                    # Se reintenta en la próxima ronda salvo que ya haya uno más nuevo o cambió el estado
+                    if result.get("status_code", 500) >= 500 and user_id not in self._changed:
+                        self._pending.setdefault(user_id, seen_at)
+                else:
+                    heartbeats_flushed.inc(outcome="ok")
+
+        await asyncio.gather(*(worker() for _ in range(min(self.concurrency, len(batch)))))
+
+    def stop(self):
+        """Termina `run()` después de un último envío completo"""
+        self._stopping = True
+        self._wakeup.set()
+
+    async def run(self):
+        while not self._stopping:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_seconds)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            try:
+                await self.flush()
+            except Exception:
+                logger.exception("Error enviando heartbeats de presencia")
+        # Lo que llegó durante el último envío
+        await self.flush()
+
+
+heartbeat_aggregator = HeartbeatAggregator(
+    settings.presence_heartbeat_flush_seconds,
+    settings.presence_heartbeat_concurrency,
+    settings.presence_heartbeat_max_pending,
+)
+
+
+@metrics.on_collect
+def _collect_pending():
+    heartbeats_pending.set(len(heartbeat_aggregator))
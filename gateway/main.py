@@ -2,11 +2,22 @@
 API Gateway - Punto único de entrada para todos los microservicios
 Integra: Usuarios, Canales, Mensajes, Moderación, Archivos, Búsqueda
 """
+import asyncio
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, Request
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 from config import settings
+from clients.base import BaseClient, UpstreamError
+from deadline import DeadlineMiddleware
+from tracing import TracingMiddleware
+from heartbeats import heartbeat_aggregator
+from moderation_blacklist import blacklist_mirror
+from file_events import file_event_hub
+from auth import AuthMiddleware, token_verifier
+import metrics
 from routers import (
+    batch,
     users,
     channels,
     messages,
@@ -18,12 +29,38 @@ from routers import (
     chatbots,
 )
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Un pool de conexiones por backend, reutilizado durante toda la vida del proceso
+    await BaseClient.open_all()
+    heartbeat_task = asyncio.create_task(heartbeat_aggregator.run())
+    # Copia local de la lista negra: detecta cambios y descarta análisis memoizados viejos
+    blacklist_task = asyncio.create_task(blacklist_mirror.run()) if settings.moderation_blacklist_sync_enabled else None
+    # Un solo consumidor AMQP por proceso para todos los clientes SSE
+    events_task = asyncio.create_task(file_event_hub.run()) if settings.file_events_enabled else None
+    jwks_task = asyncio.create_task(token_verifier.run())
+    # Readmite las réplicas expulsadas cuando vuelven a responder su health check
+    health_task = asyncio.create_task(BaseClient.run_health_checks())
+    yield
+    health_task.cancel()
+    jwks_task.cancel()
+    # No se cancela: se espera el último envío completo antes de cerrar los pools
+    heartbeat_aggregator.stop()
+    if blacklist_task:
+        blacklist_task.cancel()
+    if events_task:
+        events_task.cancel()
+    await file_event_hub.close()
+    await heartbeat_task
+    await BaseClient.close_all()
+
 app = FastAPI(
     title="API Gateway - Sistema de Chat Universitario",
     version="1.0.0",
     description="Gateway unificado para todos los microservicios del sistema",
     docs_url="/gateway/docs",
-    openapi_url="/gateway/openapi.json"
+    openapi_url="/gateway/openapi.json",
+    lifespan=lifespan,
 )
 
 # CORS - Permitir frontend
@@ -35,6 +72,15 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Identidad del token bearer verificada localmente
+app.add_middleware(AuthMiddleware)
+
+# Plazo de cada request (cabecera X-Request-Timeout-Ms), propagado a los backends
+app.add_middleware(DeadlineMiddleware)
+
+# Span del gateway y traceparent hacia los backends (más externo: mide también los demás middlewares)
+app.add_middleware(TracingMiddleware)
+
 @app.get("/gateway/health")
 async def health_check():
     """Health check del gateway"""
@@ -44,6 +90,21 @@ async def health_check():
         "version": "1.0.0"
     }
 
+@app.get("/gateway/backends")
+async def backends_status():
+    """Estado de cada backend: circuit breaker, latencias observadas y pool de conexiones"""
+    return {"backends": [client.status() for client in BaseClient.instances]}
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics_endpoint():
+    """Métricas Prometheus del gateway"""
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+# Errores de backends en modo passthrough: mismo formato que HTTPException
+@app.exception_handler(UpstreamError)
+async def upstream_error_handler(request: Request, exc: UpstreamError):
+    return JSONResponse(status_code=exc.status_code, content={"detail": exc.detail})
+
 # Error handler global
 @app.exception_handler(Exception)
 async def global_exception_handler(request: Request, exc: Exception):
@@ -68,6 +129,7 @@ app.include_router(search.router, prefix="/gateway/search", tags=["Búsqueda"])
 app.include_router(presence.router, prefix="/gateway/presence", tags=["Presencia"])
 app.include_router(threads.router, prefix="/gateway/threads", tags=["Threads"])
 app.include_router(chatbots.router, prefix="/gateway/chat", tags=["Chatbots"])
+app.include_router(batch.router, prefix="/gateway/batch", tags=["Gateway"])
 
 @app.get("/")
 async def root():
@@ -0,0 +1,93 @@
+"""Copia local de la lista negra de moderación, para invalidar los análisis memoizados cuando cambia"""
+import asyncio
+import logging
+import unicodedata
+from typing import Any, Iterable, List, Optional, Set
+
+import metrics
+from cache import response_cache
+from config import settings
+
+logger = logging.getLogger("gateway.moderation")
+
+# Clave de los análisis memoizados (ver ModerationClient.analyze_text)
+ANALYZE_CACHE_PREFIX = "moderation:analyze#"
+
+blacklist_size = metrics.Gauge("gateway_moderation_blacklist_words", "Palabras de la lista negra en la copia local")
+
+
+def normalize(text: str) -> str:
+    """Minúsculas y sin tildes, para que 'Palabrá' y 'palabra' cuenten como la misma palabra"""
+    decomposed = unicodedata.normalize("NFKD", text.casefold())
+    return "".join(char for char in decomposed if not unicodedata.combining(char))
+
+
+def _extract_words(result: Any) -> Optional[List[str]]:
+    """Acepta ["w", ...], [{"word": "w"}, ...] o {"words": [...]} según responda el servicio"""
+    if isinstance(result, dict):
+        if "error" in result:
+            return None
+        result = result.get("words", result.get("items"))
+    if not isinstance(result, list):
+        return None
+    words = []
+    for item in result:
+        word = item.get("word") if isinstance(item, dict) else item
+        if isinstance(word, str) and word.strip():
+            words.append(word.strip())
+    return words
+
+
+class BlacklistMirror:
+    """
+    Copia local de la lista negra, refrescada periódicamente desde el servicio.
+
+    No decide nada por sí sola: la aprobación de mensajes y los análisis siempre
+    vienen del servicio. Sirve para detectar cambios en la lista (también los hechos
+    desde otras réplicas) y descartar los análisis memoizados que quedaron viejos.
+    """
+
+    def __init__(self, refresh_seconds: float):
+        self.refresh_seconds = refresh_seconds
+        self._words: Optional[Set[str]] = None
+
+    @property
+    def ready(self) -> bool:
+        return self._words is not None
+
+    def load(self, words: Iterable[str]):
+        words = {normalize(word) for word in words}
+        if words == self._words:
+            return
+        if self.ready:
+            # Un análisis memoizado con la lista anterior puede haber quedado desactualizado
+            response_cache.invalidate_prefix(ANALYZE_CACHE_PREFIX)
+        self._words = words
+        blacklist_size.set(len(words))
+
+    def add(self, word: str):
+        if self.ready:
+            self.load(self._words | {normalize(word)})
+        else:
+            response_cache.invalidate_prefix(ANALYZE_CACHE_PREFIX)
+
+    async def refresh(self):
+        # Import diferido: clients.moderation usa este módulo
+        from clients.moderation import moderation_client
+
+        words = _extract_words(await moderation_client.list_blacklist_words())
+        if words is None:
+            logger.warning("No se pudo actualizar la lista negra; se mantiene la copia local")
+            return
+        self.load(words)
+
+    async def run(self):
+        while True:
+            try:
+                await self.refresh()
+            except Exception:
+                logger.exception("Error actualizando la lista negra")
+            await asyncio.sleep(self.refresh_seconds)
+
+
+blacklist_mirror = BlacklistMirror(settings.moderation_blacklist_refresh_seconds)
@@ -0,0 +1,175 @@
+"""Paginación por cursor: normalización de listados y prefetch de la página siguiente"""
+import asyncio
+import json
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from starlette.responses import Response
+
+import auth
+import deadline
+import metrics
+from config import settings
+
+logger = logging.getLogger("gateway.pagination")
+
+prefetch_results = metrics.Counter("gateway_prefetch_total", "Páginas precargadas por resultado (hit, miss, stored, discarded)")
+prefetch_bytes = metrics.Gauge("gateway_prefetch_bytes", "Bytes de páginas precargadas en memoria")
+
+
+def items(payload: Any) -> List[Dict[str, Any]]:
+    """Normaliza listados que llegan como lista, {"items": [...]} o {"data": [...]}"""
+    if isinstance(payload, list):
+        return payload
+    if isinstance(payload, dict):
+        for key in ("items", "data", "messages"):
+            if isinstance(payload.get(key), list):
+                return payload[key]
+    return []
+
+
+def next_cursor(payload: Any) -> Optional[str]:
+    if isinstance(payload, dict):
+        for key in ("next_cursor", "nextCursor", "cursor"):
+            if payload.get(key):
+                return payload[key]
+    return None
+
+
+# (usuario, thread, limit, cursor): cada página precargada es de quien la pidió
+PageKey = Tuple[str, str, int, str]
+
+
+def page_key(thread_id: str, limit: int, cursor: str) -> PageKey:
+    """Clave de la página para el usuario autenticado en la request actual"""
+    return (auth.current_user_id() or "", thread_id, limit, cursor)
+
+
+class _Prefetched:
+    __slots__ = ("task", "response", "size", "expires_at")
+
+    def __init__(self, task: asyncio.Task, ttl: float):
+        self.task = task
+        self.response: Optional[Response] = None
+        self.size = 0
+        self.expires_at = time.monotonic() + ttl
+
+
+class PagePrefetcher:
+    """
+    Al servir la página N de un thread, baja la N+1 en segundo plano (con el cursor
+    que vino en la respuesta) para que el siguiente scroll se responda desde memoria.
+
+    - Cada página precargada se usa una sola vez y vence a los `ttl` segundos.
+    - Las páginas son del usuario que las pidió (el loader corre con su identidad).
+    - Máximo `per_thread` páginas por usuario y thread y `max_bytes` en total (se descartan
+      las más antiguas).
+    """
+
+    def __init__(self, ttl: float, per_thread: int, max_bytes: int):
+        self.ttl = ttl
+        self.per_thread = per_thread
+        self.max_bytes = max_bytes
+        self._pages: "OrderedDict[PageKey, _Prefetched]" = OrderedDict()
+        self._bytes = 0
+
+    @property
+    def size_bytes(self) -> int:
+        return self._bytes
+
+    async def take(self, key: PageKey) -> Optional[Response]:
+        """Página precargada para `key` (esperando si aún se está bajando) o None"""
+        self._purge_expired()
+        entry = self._pages.get(key)
+        if entry is None:
+            prefetch_results.inc(result="miss")
+            return None
+        if entry.response is None:
+            # Sigue en vuelo: se comparte en lugar de pedir la misma página dos veces
+            await asyncio.wait({entry.task})
+        self._discard(key, used=True)
+        if entry.response is None:
+            prefetch_results.inc(result="miss")
+            return None
+        prefetch_results.inc(result="hit")
+        return Response(
+            content=entry.response.body,
+            status_code=entry.response.status_code,
+            media_type=entry.response.media_type,
+            headers={"X-Gateway-Prefetch": "hit"},
+        )
+
+    def schedule(self, thread_id: str, limit: int, page: Response, loader: Callable[[str], Awaitable[Response]]):
+        """Programa el prefetch de la página que sigue a `page` (si trae cursor)"""
+        try:
+            cursor = next_cursor(json.loads(page.body))
+        except ValueError:
+            return
+        if not cursor:
+            return
+        self._purge_expired()
+        key = page_key(thread_id, limit, cursor)
+        if key in self._pages:
+            return
+        self._evict_thread(key[0], thread_id, keep=self.per_thread - 1)
+        # El prefetch no hereda el plazo de la request que lo originó
+        task = asyncio.create_task(self._load(key, loader, cursor), context=deadline.detached())
+        self._pages[key] = _Prefetched(task, self.ttl)
+
+    async def _load(self, key: PageKey, loader: Callable[[str], Awaitable[Response]], cursor: str):
+        try:
+            response = await loader(cursor)
+        except Exception as exc:
+            logger.debug("Prefetch de %s falló: %s", key, exc)
+            self._pages.pop(key, None)
+            return
+        entry = self._pages.get(key)
+        if entry is None:
+            return
+        entry.response = response
+        entry.size = len(response.body)
+        self._bytes += entry.size
+        prefetch_results.inc(result="stored")
+        while self._bytes > self.max_bytes and self._pages:
+            oldest = next(iter(self._pages))
+            self._discard(oldest)
+
+    def _purge_expired(self):
+        # Todas las entradas usan el mismo TTL: las vencidas están al principio
+        now = time.monotonic()
+        while self._pages:
+            key, entry = next(iter(self._pages.items()))
+            if entry.expires_at >= now:
+                break
+            self._discard(key)
+
+    def _evict_thread(self, user_id: str, thread_id: str, keep: int):
+        keys = [key for key in self._pages if key[:2] == (user_id, thread_id)]
+        for key in keys[: max(0, len(keys) - keep)]:
+            self._discard(key)
+
+    def _discard(self, key: PageKey, used: bool = False):
+        entry = self._pages.pop(key, None)
+        if entry is None:
+            return
+        self._bytes -= entry.size
+        if not used:
+            entry.task.cancel()
+            prefetch_results.inc(result="discarded")
+
+    def __len__(self) -> int:
+        return len(self._pages)
+
+
+message_prefetcher = PagePrefetcher(
+    settings.message_prefetch_ttl_seconds,
+    settings.message_prefetch_per_thread,
+    settings.message_prefetch_max_bytes,
+)
+
+
+@metrics.on_collect
+def _collect_prefetch():
+    prefetch_bytes.set(message_prefetcher.size_bytes)
@@ -0,0 +1,119 @@
+"""Circuit breaker, medición de latencia y presupuesto de reintentos por backend"""
+import random
+import time
+from collections import deque
+from typing import Any, Dict, Optional
+
+import httpx
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(httpx.TransportError):
+    """El backend tiene el circuito abierto: se falla sin intentar la conexión"""
+
+
+class CircuitBreaker:
+    """
+    Breaker clásico de tres estados.
+
+    - closed: todo pasa; `failure_threshold` fallos seguidos lo abren.
+    - open: se rechaza de inmediato durante `open_seconds`.
+    - half_open: se dejan pasar hasta `half_open_max_calls` sondas; un éxito
+      lo cierra y un fallo lo vuelve a abrir. Una sonda cancelada no da
+      resultado y devuelve su cupo con `release()`.
+    """
+
+    def __init__(self, failure_threshold: int, open_seconds: float, half_open_max_calls: int = 1):
+        self.failure_threshold = failure_threshold
+        self.open_seconds = open_seconds
+        self.half_open_max_calls = half_open_max_calls
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self.opened_at: Optional[float] = None
+        self._probes = 0
+
+    def allow(self) -> bool:
+        if self.state == OPEN:
+            if time.monotonic() - self.opened_at < self.open_seconds:
+                return False
+            self.state = HALF_OPEN
+            self._probes = 0
+        if self.state == HALF_OPEN:
+            if self._probes >= self.half_open_max_calls:
+                return False
+            self._probes += 1
+        return True
+
+    def release(self):
+        """La llamada autorizada terminó sin resultado (p. ej. se canceló)"""
+        if self.state == HALF_OPEN and self._probes > 0:
+            self._probes -= 1
+
+    def record_success(self):
+        self.consecutive_failures = 0
+        if self.state != CLOSED:
+            self.state = CLOSED
+            self.opened_at = None
+
+    def record_failure(self):
+        self.consecutive_failures += 1
+        if self.state == HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+            self.state = OPEN
+            self.opened_at = time.monotonic()
+
+    def snapshot(self) -> Dict[str, Any]:
+        retry_in = None
+        if self.state == OPEN:
+            retry_in = max(0.0, self.open_seconds - (time.monotonic() - self.opened_at))
+        return {
+            "state": self.state,
+            "consecutive_failures": self.consecutive_failures,
+            "retry_in_seconds": retry_in,
+        }
+
+
+class LatencyTracker:
+    """Ventana deslizante de latencias exitosas para estimar percentiles"""
+
+    def __init__(self, window: int = 200, min_samples: int = 20):
+        self._samples: deque = deque(maxlen=window)
+        self.min_samples = min_samples
+
+    def observe(self, seconds: float):
+        self._samples.append(seconds)
+
+    def percentile(self, p: float) -> Optional[float]:
+        if len(self._samples) < self.min_samples:
+            return None
+        ordered = sorted(self._samples)
+        return ordered[min(len(ordered) - 1, int(p * len(ordered)))]
+
+
+class RetryBudget:
+    """
+    Presupuesto de reintentos (token bucket): cada request deposita `ratio` fichas
+    y cada reintento gasta una. Así los reintentos quedan acotados a ~ratio del
+    tráfico y no multiplican la carga de un backend que ya está caído.
+    """
+
+    def __init__(self, ratio: float, max_tokens: float):
+        self.ratio = ratio
+        self.max_tokens = max_tokens
+        self.tokens = max_tokens
+
+    def deposit(self):
+        self.tokens = min(self.max_tokens, self.tokens + self.ratio)
+
+    def withdraw(self) -> bool:
+        if self.tokens < 1:
+            return False
+        self.tokens -= 1
+        return True
+
+
+def backoff_delay(attempt: int, base: float, cap: float) -> float:
+    """Backoff exponencial con jitter completo: uniforme en [0, min(cap, base * 2^intento)]"""
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
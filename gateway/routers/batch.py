@@ -0,0 +1,138 @@
+"""Router para lotes de sub-requests: varias llamadas al gateway en un solo viaje del navegador"""
+import asyncio
+import contextvars
+import json
+from typing import Any, Dict, List, Optional
+
+import httpx
+from fastapi import APIRouter, HTTPException, Request
+from pydantic import BaseModel, Field
+
+import deadline
+import tracing
+from config import settings
+
+router = APIRouter()
+
+# Rutas que no tienen sentido dentro de un lote (respuestas que no terminan o binarias)
+_BLOCKED_SUFFIXES = ("/stream", "/events", "/content")
+
+# Headers de la request original que se copian a cada sub-request
+_FORWARDED_HEADERS = ("authorization", "accept-language")
+
+# Headers que un ítem no puede fijar: identidad, traza y plazo los pone el lote
+_PROTECTED_HEADERS = {"authorization", "traceparent", "host", "content-length", settings.deadline_header.lower()}
+
+# Marca de las sub-requests: corren en el mismo contexto que el lote (ASGI en proceso)
+_in_batch: contextvars.ContextVar[bool] = contextvars.ContextVar("gateway_in_batch", default=False)
+
+
+class BatchItem(BaseModel):
+    id: Optional[str] = None
+    method: str = "GET"
+    path: str = Field(..., description="Ruta del gateway con query string, p. ej. /gateway/users/123")
+    body: Optional[Any] = None
+    headers: Optional[Dict[str, str]] = None
+
+
+class BatchRequest(BaseModel):
+    requests: List[BatchItem]
+
+
+def _validate(item: BatchItem, request: Optional[httpx.Request]):
+    """Valida la ruta ya normalizada, tal como la verá el router (sin `..` ni escapes %)"""
+    path = request.url.path if request is not None else ""
+    segments = path.split("/")
+    if (
+        request is None
+        # Solo rutas relativas al gateway: ni URLs absolutas ni "//host/..."
+        or not item.path.startswith("/")
+        or item.path.startswith("//")
+        or request.url.host != "gateway"
+        or "%" in path
+        or "." in segments
+        or ".." in segments
+        or not path.startswith("/gateway/")
+        or path.rstrip("/") == "/gateway/batch"
+        or path.rstrip("/").endswith(_BLOCKED_SUFFIXES)
+    ):
+        return {"code": "INVALID_PATH", "message": f"Ruta no permitida en un lote: {item.path}"}
+    if item.method.upper() not in ("GET", "POST", "PUT", "PATCH", "DELETE"):
+        return {"code": "INVALID_METHOD", "message": f"Método no permitido: {item.method}"}
+    return None
+
+
+def _decode(response: httpx.Response) -> Any:
+    if not response.content:
+        return None
+    if "json" in response.headers.get("content-type", ""):
+        try:
+            return response.json()
+        except ValueError:
+            pass
+    return response.text
+
+
+@router.post("")
+async def run_batch(payload: BatchRequest, request: Request):
+    """
+    Ejecuta sub-requests contra las rutas del gateway en el mismo proceso (vía ASGI,
+    sin red) y con concurrencia acotada. Cada ítem responde su propio status y body;
+    el fallo de uno no afecta a los demás. Un lote no puede contener otro lote.
+    """
+    if _in_batch.get():
+        raise HTTPException(
+            status_code=400,
+            detail={"code": "NESTED_BATCH", "message": "Un lote no puede ejecutarse dentro de otro"},
+        )
+    if len(payload.requests) > settings.batch_max_items:
+        raise HTTPException(
+            status_code=400,
+            detail={"code": "BATCH_TOO_LARGE", "message": f"Máximo {settings.batch_max_items} sub-requests por lote"},
+        )
+
+    base_headers = {name: request.headers[name] for name in _FORWARDED_HEADERS if name in request.headers}
+    span = tracing.current_span()
+    if span is not None:
+        base_headers["traceparent"] = span.traceparent()
+    semaphore = asyncio.Semaphore(settings.batch_concurrency)
+    transport = httpx.ASGITransport(app=request.app, raise_app_exceptions=False)
+    batch_token = _in_batch.set(True)
+
+    try:
+        async with httpx.AsyncClient(transport=transport, base_url="http://gateway") as client:
+
+            async def run(item: BatchItem) -> Dict[str, Any]:
+                headers = {
+                    name: value for name, value in (item.headers or {}).items() if name.lower() not in _PROTECTED_HEADERS
+                }
+                headers.update(base_headers)
+                content = None
+                if item.body is not None:
+                    content = json.dumps(item.body).encode("utf-8")
+                    headers["content-type"] = "application/json"
+                try:
+                    sub_request = client.build_request(item.method.upper(), item.path, content=content, headers=headers)
+                except httpx.InvalidURL:
+                    sub_request = None
+                error = _validate(item, sub_request)
+                if error:
+                    return {"id": item.id, "status": 400, "body": {"detail": error}}
+                async with semaphore:
+                    # Cada sub-request hereda lo que le queda al lote
+                    left = deadline.remaining()
+                    if left is not None:
+                        if left <= 0:
+                            return {"id": item.id, "status": 504, "body": {"detail": {"code": "DEADLINE_EXCEEDED"}}}
+                        # Al menos 1 ms: "0" se interpretaría como "sin plazo"
+                        sub_request.headers[settings.deadline_header] = str(max(1, int(left * 1000)))
+                    try:
+                        response = await client.send(sub_request)
+                    except Exception as exc:
+                        return {"id": item.id, "status": 500, "body": {"detail": {"code": "GATEWAY_ERROR", "message": str(exc)}}}
+                return {"id": item.id, "status": response.status_code, "body": _decode(response)}
+
+            responses = await asyncio.gather(*(run(item) for item in payload.requests))
+    finally:
+        _in_batch.reset(batch_token)
+    return {"responses": responses}
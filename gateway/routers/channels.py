@@ -19,28 +19,19 @@ class ChannelUpdate(BaseModel):
 
 @router.get("")
 async def list_channels(page: int = Query(1, ge=1), page_size: int = Query(20, ge=1, le=100)):
-    """Listar canales paginados"""
-    result = await channels_client.list_channels(page, page_size)
-    if "error" in result:
-        raise HTTPException(status_code=result.get("status_code", 500), detail=result)
-    return result
+    """Listar canales paginados (passthrough: el cuerpo del backend se reenvía sin re-serializar)"""
+    return await channels_client.list_channels(page, page_size, raw=True)
 
 
 @router.get("/member/{user_id}")
 async def list_channels_by_member(user_id: str):
     """Listar canales donde participa un usuario"""
-    result = await channels_client.list_channels_by_member(user_id)
-    if "error" in result:
-        raise HTTPException(status_code=result.get("status_code", 500), detail=result)
-    return result
+    return await channels_client.list_channels_by_member(user_id, raw=True)
 
 @router.get("/owner/{owner_id}")
 async def list_channels_by_owner(owner_id: str):
     """Listar canales por propietario"""
-    result = await channels_client.list_channels_by_owner(owner_id)
-    if "error" in result:
-        raise HTTPException(status_code=result.get("status_code", 500), detail=result)
-    return result
+    return await channels_client.list_channels_by_owner(owner_id, raw=True)
 
 @router.get("/{channel_id}")
 async def get_channel(channel_id: str):
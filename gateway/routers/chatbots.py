@@ -1,7 +1,10 @@
 """Router para chatbots de soporte"""
+import httpx
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
 from clients.chatbots import wikipedia_chat_client, programming_chat_client
+from resilience import CircuitOpenError
+from streaming import relay_event_stream
 
 router = APIRouter()
 
@@ -24,3 +27,32 @@ async def ask_programming_bot(prompt: ChatPrompt):
     if "error" in result:
         raise HTTPException(status_code=result.get("status_code", 500), detail=result)
     return result
+
+
+async def _stream_answer(client, message: str):
+    try:
+        response = await client.ask_stream(message)
+    except CircuitOpenError as e:
+        raise HTTPException(status_code=503, detail={"error": str(e), "status_code": 503, "circuit_open": True})
+    except httpx.HTTPError as e:
+        raise HTTPException(status_code=500, detail={"error": str(e), "status_code": 500})
+    if response.is_error:
+        await response.aread()
+        await response.aclose()
+        raise HTTPException(
+            status_code=response.status_code,
+            detail={"error": f"{client.name} respondió {response.status_code}", "status_code": response.status_code},
+        )
+    return relay_event_stream(response, client.answer_field)
+
+
+@router.post("/wiki/stream")
+async def ask_wikipedia_stream(prompt: ChatPrompt):
+    """Igual que /wiki pero la respuesta llega como Server-Sent Events a medida que se genera"""
+    return await _stream_answer(wikipedia_chat_client, prompt.message)
+
+
+@router.post("/programming/stream")
+async def ask_programming_bot_stream(prompt: ChatPrompt):
+    """Igual que /programming pero la respuesta llega como Server-Sent Events a medida que se genera"""
+    return await _stream_answer(programming_chat_client, prompt.message)
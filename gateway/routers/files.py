@@ -1,27 +1,66 @@
 """Router para Archivos"""
-from fastapi import APIRouter, HTTPException, UploadFile, File, Form, Query
-from typing import Optional
+import asyncio
+import json
+import httpx
+from fastapi import APIRouter, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+from typing import List, Optional
 from clients.files import files_client
+from config import settings
+from file_events import file_event_hub
+from streaming import forward_headers, relay_response
 
 router = APIRouter()
 
-@router.post("")
+
+class FileLookup(BaseModel):
+    message_ids: List[str] = []
+    file_ids: List[str] = []
+
+_UPLOAD_OPENAPI = {
+    "requestBody": {
+        "required": True,
+        "content": {
+            "multipart/form-data": {
+                "schema": {
+                    "type": "object",
+                    "required": ["file"],
+                    "properties": {
+                        "file": {"type": "string", "format": "binary"},
+                        "message_id": {"type": "string"},
+                        "thread_id": {"type": "string"},
+                    },
+                }
+            }
+        },
+    }
+}
+
+@router.post("", openapi_extra=_UPLOAD_OPENAPI)
 async def upload_file(
-    file: UploadFile = File(...),
-    message_id: Optional[str] = Form(None),
-    thread_id: Optional[str] = Form(None)
+    request: Request,
+    message_id: Optional[str] = Query(None),
+    thread_id: Optional[str] = Query(None),
 ):
-    """Subir un archivo"""
-    file_data = await file.read()
-    result = await files_client.upload_file(
-        file_data,
-        file.filename,
-        message_id,
-        thread_id
-    )
-    if "error" in result:
-        raise HTTPException(status_code=result.get("status_code", 500), detail=result)
-    return result
+    """
+    Subir un archivo (multipart/form-data con el campo `file`).
+
+    El cuerpo se retransmite al servicio de archivos a medida que llega, sin
+    copiarlo en memoria; `message_id`/`thread_id` pueden ir como campos del
+    formulario o como query params.
+    """
+    headers = forward_headers(request.headers, ("content-type", "content-length"))
+    try:
+        response = await files_client.upload_file(
+            request.stream(),
+            headers,
+            message_id,
+            thread_id,
+        )
+    except httpx.HTTPError as e:
+        raise HTTPException(status_code=500, detail={"error": str(e), "status_code": 500})
+    return relay_response(response)
 
 @router.get("")
 async def list_files(
@@ -34,11 +73,89 @@ async def list_files(
             status_code=400, 
             detail={"code": "MISSING_FILTER", "message": "Debe proporcionar message_id o thread_id como filtro"}
         )
-    result = await files_client.list_files(message_id, thread_id)
+    return await files_client.list_files(message_id, thread_id, raw=True)
+
+@router.delete("")
+async def delete_files(
+    message_id: Optional[str] = Query(None),
+    thread_id: Optional[str] = Query(None)
+):
+    """Eliminar todos los archivos de un mensaje o thread - Requiere al menos uno de los filtros"""
+    if not message_id and not thread_id:
+        raise HTTPException(
+            status_code=400,
+            detail={"code": "MISSING_FILTER", "message": "Debe proporcionar message_id o thread_id como filtro"}
+        )
+    result = await files_client.delete_files(message_id, thread_id)
     if "error" in result:
         raise HTTPException(status_code=result.get("status_code", 500), detail=result)
     return result
 
+@router.post("/lookup")
+async def lookup_files(payload: FileLookup):
+    """Archivos de varios mensajes (agrupados por message_id) y/o por ID en una sola consulta"""
+    if not payload.message_ids and not payload.file_ids:
+        raise HTTPException(
+            status_code=400,
+            detail={"code": "MISSING_FILTER", "message": "Debe proporcionar message_ids o file_ids"}
+        )
+    result = await files_client.lookup_files(payload.message_ids, payload.file_ids)
+    if "error" in result:
+        raise HTTPException(status_code=result.get("status_code", 500), detail=result)
+    return result
+
+@router.get("/events")
+async def file_events(
+    request: Request,
+    message_id: Optional[str] = Query(None),
+    thread_id: Optional[str] = Query(None),
+):
+    """
+    Server-Sent Events con files.added.v1 / files.deleted.v1 del thread o mensaje indicado.
+    Si el cliente no consume a tiempo se cierra el stream con `event: dropped`;
+    al reconectar debe volver a listar los archivos. 503 si los eventos están desactivados
+    o el gateway no está conectado a RabbitMQ.
+    """
+    if not message_id and not thread_id:
+        raise HTTPException(
+            status_code=400,
+            detail={"code": "MISSING_FILTER", "message": "Debe proporcionar message_id o thread_id como filtro"}
+        )
+    if not settings.file_events_enabled or not file_event_hub.connected:
+        # Sin consumidor no llegaría ningún evento: el cliente debe recargar por su cuenta
+        raise HTTPException(
+            status_code=503,
+            detail={"code": "EVENTS_UNAVAILABLE", "message": "Los eventos de archivos no están disponibles"}
+        )
+    subscription = file_event_hub.subscribe(thread_id=thread_id, message_id=message_id)
+
+    async def stream():
+        try:
+            yield ": subscribed\n\n"
+            while True:
+                try:
+                    event = await asyncio.wait_for(
+                        subscription.queue.get(), timeout=settings.file_events_keepalive_seconds
+                    )
+                except asyncio.TimeoutError:
+                    if await request.is_disconnected():
+                        return
+                    # Comentario SSE: mantiene viva la conexión a través de proxies
+                    yield ": keep-alive\n\n"
+                    continue
+                if event is None:
+                    yield "event: dropped\ndata: {}\n\n"
+                    return
+                yield f"event: {event.get('type', 'message')}\ndata: {json.dumps(event, ensure_ascii=False)}\n\n"
+        finally:
+            file_event_hub.unsubscribe(subscription)
+
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
 @router.get("/{file_id}")
 async def get_file(file_id: str):
     """Obtener información de un archivo"""
@@ -55,6 +172,24 @@ async def delete_file(file_id: str):
         raise HTTPException(status_code=result.get("status_code", 500), detail=result)
     return result
 
+# Headers condicionales y de rango que se reenvían al servicio de archivos
+_DOWNLOAD_REQUEST_HEADERS = ("range", "if-range", "if-none-match", "if-modified-since")
+
+@router.get("/{file_id}/content")
+async def download_content(file_id: str, request: Request):
+    """
+    Descargar el archivo a través del gateway (para clientes sin acceso a MinIO).
+
+    Soporta `Range` e `If-None-Match`/`If-Modified-Since`: las respuestas 206/304
+    del servicio de archivos se retransmiten tal cual, sin bufferizar el cuerpo.
+    """
+    headers = forward_headers(request.headers, _DOWNLOAD_REQUEST_HEADERS)
+    try:
+        response = await files_client.download_content(file_id, headers)
+    except httpx.HTTPError as e:
+        raise HTTPException(status_code=500, detail={"error": str(e), "status_code": 500})
+    return relay_response(response)
+
 @router.post("/{file_id}/download-url")
 async def get_download_url(file_id: str):
     """Obtener URL de descarga"""
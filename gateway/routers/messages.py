@@ -2,7 +2,9 @@
 from fastapi import APIRouter, HTTPException, Query
 from pydantic import BaseModel
 from typing import Optional, List
+from auth import current_user_id
 from clients.messages import messages_client
+from pagination import message_prefetcher, page_key
 
 router = APIRouter()
 
@@ -11,24 +13,44 @@ class MessageCreate(BaseModel):
     content: str
     message_type: Optional[str] = None  # 'text', 'audio', 'file'
     paths: Optional[List[str]] = None
-    user_id: str
+    user_id: Optional[str] = None  # opcional si viene un token bearer válido
 
 class MessageUpdate(BaseModel):
     content: str
-    user_id: str
+    user_id: Optional[str] = None  # opcional si viene un token bearer válido
     paths: Optional[List[str]] = None
 
+def _acting_user(user_id: Optional[str]) -> str:
+    """Usuario que ejecuta la acción: el del token verificado o, sin token, el indicado por el cliente"""
+    acting = current_user_id() or user_id
+    if not acting:
+        raise HTTPException(
+            status_code=401,
+            detail={"code": "MISSING_USER", "message": "Se requiere un token bearer válido o user_id"}
+        )
+    return acting
+
 @router.get("/threads/{thread_id}")
 async def list_messages(
     thread_id: str,
     limit: int = Query(50, ge=1, le=200),
-    cursor: Optional[str] = Query(None)
+    cursor: Optional[str] = Query(None),
+    prefetch: bool = Query(False, description="Precargar en segundo plano la página siguiente"),
 ):
     """Listar mensajes de un thread. Thread_id es requerido."""
-    result = await messages_client.list_messages(thread_id, limit, cursor)
-    if "error" in result:
-        raise HTTPException(status_code=result.get("status_code", 500), detail=result)
-    return result
+    page = None
+    if cursor:
+        page = await message_prefetcher.take(page_key(thread_id, limit, cursor))
+    if page is None:
+        page = await messages_client.list_messages(thread_id, limit, cursor, raw=True)
+    if prefetch:
+        message_prefetcher.schedule(
+            thread_id,
+            limit,
+            page,
+            lambda next_cursor: messages_client.list_messages(thread_id, limit, next_cursor, raw=True),
+        )
+    return page
 
 @router.get("/threads/{thread_id}/messages/{message_id}")
 async def get_message(thread_id: str, message_id: str):
@@ -53,7 +75,7 @@ async def create_message(thread_id: str, message: MessageCreate):
         content=message.content,
         message_type=message.message_type,
         paths=message.paths,
-        user_id=message.user_id,
+        user_id=_acting_user(message.user_id),
     )
     if "error" in result:
         raise HTTPException(status_code=result.get("status_code", 500), detail=result)
@@ -66,16 +88,16 @@ async def update_message(thread_id: str, message_id: str, message: MessageUpdate
         thread_id,
         message_id,
         message.content,
-        user_id=message.user_id,
+        user_id=_acting_user(message.user_id),
     )
     if "error" in result:
         raise HTTPException(status_code=result.get("status_code", 500), detail=result)
     return result
 
 @router.delete("/threads/{thread_id}/messages/{message_id}")
-async def delete_message(thread_id: str, message_id: str, user_id: str = Query(..., description="ID del usuario que ejecuta la acción")):
+async def delete_message(thread_id: str, message_id: str, user_id: Optional[str] = Query(None, description="ID del usuario que ejecuta la acción (opcional con token bearer)")):
     """Eliminar un mensaje de un thread"""
-    result = await messages_client.delete_message(thread_id, message_id, user_id=user_id)
+    result = await messages_client.delete_message(thread_id, message_id, user_id=_acting_user(user_id))
     if "error" in result:
         raise HTTPException(status_code=result.get("status_code", 500), detail=result)
     return result
@@ -1,8 +1,10 @@
 """Router para el servicio de presencia"""
 from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import JSONResponse
 from pydantic import BaseModel
 from typing import Optional
 from clients.presence import presence_client
+from heartbeats import heartbeat_aggregator
 
 router = APIRouter()
 
@@ -20,10 +22,7 @@ class PresenceUpdate(BaseModel):
 
 @router.get("")
 async def list_presence(status: Optional[str] = Query(None)):
-    result = await presence_client.list_users(status)
-    if "error" in result:
-        raise HTTPException(status_code=result.get("status_code", 500), detail=result)
-    return result
+    return await presence_client.list_users(status, raw=True)
 
 
 @router.get("/stats")
@@ -52,6 +51,14 @@ async def register_presence(payload: PresenceRegister):
 
 @router.patch("/{user_id}")
 async def update_presence(user_id: str, payload: PresenceUpdate):
+    """
+    Los heartbeats sin cambio de estado se agregan en el gateway y se envían en
+    segundo plano (202). Los cambios de estado pasan de inmediato al servicio.
+    """
+    if payload.heartbeat and not payload.status:
+        heartbeat_aggregator.record(user_id)
+        return JSONResponse(status_code=202, content={"userId": user_id, "heartbeat": "queued"})
+    await heartbeat_aggregator.discard(user_id)
     result = await presence_client.update_status(
         user_id,
         status=payload.status,
@@ -1,7 +1,9 @@
 """Router para Búsqueda"""
+import asyncio
 from fastapi import APIRouter, HTTPException, Query
 from typing import Optional
 from clients.search import search_client
+from config import settings
 
 router = APIRouter()
 
@@ -19,20 +21,43 @@ async def search_everything(
     thread_id: Optional[str] = Query(None),
     user_id: Optional[str] = Query(None),
 ):
-    messages = _raise_if_error(
-        await search_client.search_messages(q, thread_id=thread_id, user_id=user_id)
-    )
-    files = _raise_if_error(
-        await search_client.search_files(q, thread_id=thread_id)
-    )
-    channels = _raise_if_error(
-        await search_client.search_channels(q, channel_id=channel_id, owner_id=user_id)
-    )
-    return {
-        "channels": channels,
-        "messages": messages,
-        "files": files,
+    """
+    Búsqueda en canales, mensajes y archivos a la vez.
+
+    Las tres consultas corren en paralelo bajo un plazo común
+    (`search_deadline_seconds`); se devuelve lo que haya terminado y cada
+    sección fallida o vencida queda en `null` con su detalle en `errors`.
+    """
+    tasks = {
+        "channels": asyncio.create_task(search_client.search_channels(q, channel_id=channel_id, owner_id=user_id)),
+        "messages": asyncio.create_task(search_client.search_messages(q, thread_id=thread_id, user_id=user_id)),
+        "files": asyncio.create_task(search_client.search_files(q, thread_id=thread_id)),
     }
+    _, pending = await asyncio.wait(tasks.values(), timeout=settings.search_deadline_seconds)
+    for task in pending:
+        task.cancel()
+
+    response = {}
+    errors = {}
+    for section, task in tasks.items():
+        if task in pending:
+            response[section] = None
+            errors[section] = {"error": "timeout", "timeout": True, "status_code": 504}
+            continue
+        result = task.result()
+        if isinstance(result, dict) and "error" in result:
+            response[section] = None
+            errors[section] = result
+        else:
+            response[section] = result
+
+    if len(errors) == len(tasks):
+        # Sin ninguna sección útil se mantiene el comportamiento de error anterior
+        first = next(iter(errors.values()))
+        raise HTTPException(status_code=first.get("status_code", 500), detail=errors)
+    response["errors"] = errors
+    response["partial"] = bool(errors)
+    return response
 
 
 @router.get("/messages")
@@ -1,8 +1,14 @@
 """Router para hilos"""
-from fastapi import APIRouter, HTTPException
+import asyncio
+from fastapi import APIRouter, HTTPException, Query
 from pydantic import BaseModel
-from typing import Optional
+from typing import Any, Dict, Optional
 from clients.threads import threads_client
+from clients.messages import messages_client
+from clients.files import files_client
+from clients.users import users_client
+from config import settings
+from pagination import items as _items, next_cursor as _next_cursor
 
 router = APIRouter()
 
@@ -20,18 +26,85 @@ class ThreadEdit(BaseModel):
 
 @router.get("/channel/{channel_id}")
 async def list_channel_threads(channel_id: str):
-    result = await threads_client.list_threads_for_channel(channel_id)
-    if "error" in result:
-        raise HTTPException(status_code=result.get("status_code", 500), detail=result)
-    return result
+    return await threads_client.list_threads_for_channel(channel_id, raw=True)
 
 
 @router.get("/mine/{user_id}")
 async def list_user_threads(user_id: str):
-    result = await threads_client.list_threads_for_user(user_id)
-    if "error" in result:
-        raise HTTPException(status_code=result.get("status_code", 500), detail=result)
-    return result
+    return await threads_client.list_threads_for_user(user_id, raw=True)
+
+
+@router.get("/{thread_id}/view")
+async def get_thread_view(
+    thread_id: str,
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = Query(None),
+):
+    """
+    Vista compuesta de un hilo en una sola llamada: el hilo, una página de
+    mensajes con sus adjuntos y los perfiles de los autores.
+
+    Los adjuntos de toda la página salen de una sola consulta al servicio de
+    archivos; los usuarios se piden en paralelo con concurrencia acotada
+    (`view_fanout_concurrency`) y cada autor se consulta una sola vez.
+    """
+    thread, page = await asyncio.gather(
+        threads_client.get_thread(thread_id),
+        messages_client.list_messages(thread_id, limit, cursor),
+    )
+    if isinstance(page, dict) and "error" in page:
+        raise HTTPException(status_code=page.get("status_code", 500), detail=page)
+
+    messages = _items(page)
+    message_ids = [message["id"] for message in messages if message.get("id")]
+    user_ids = list(dict.fromkeys(
+        message.get("user_id") or message.get("author_id")
+        for message in messages
+        if message.get("user_id") or message.get("author_id")
+    ))
+
+    semaphore = asyncio.Semaphore(settings.view_fanout_concurrency)
+
+    async def bounded(call, *args):
+        async with semaphore:
+            return await call(*args)
+
+    async def attachments():
+        if not message_ids:
+            return {}
+        return await files_client.lookup_files(message_ids=message_ids)
+
+    lookup, *user_list = await asyncio.gather(
+        attachments(),
+        *(bounded(users_client.get_user, user_id) for user_id in user_ids),
+    )
+    user_results = dict(zip(user_ids, user_list))
+
+    errors: Dict[str, Any] = {}
+    if isinstance(thread, dict) and "error" in thread:
+        errors["thread"] = thread
+        thread = None
+    attachment_results = lookup.get("messages") or {}
+    if "error" in lookup:
+        errors["attachments"] = lookup
+    users = {}
+    for user_id, result in user_results.items():
+        if isinstance(result, dict) and "error" in result:
+            errors.setdefault("users", {})[user_id] = result
+            users[user_id] = None
+        else:
+            users[user_id] = result
+
+    return {
+        "thread": thread,
+        "messages": [
+            {**message, "attachments": attachment_results.get(message.get("id"), [])}
+            for message in messages
+        ],
+        "users": users,
+        "next_cursor": _next_cursor(page),
+        "errors": errors,
+    }
 
 
 @router.get("/{thread_id}")
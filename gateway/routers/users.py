@@ -1,7 +1,8 @@
 """Router para Usuarios"""
-from fastapi import APIRouter, HTTPException, Query
+from fastapi import APIRouter, Header, HTTPException, Query
 from pydantic import BaseModel
 from typing import Optional
+from auth import current_user_id
 from clients.users import users_client
 
 router = APIRouter()
@@ -22,9 +23,18 @@ class UserLogin(BaseModel):
     password: str
 
 @router.get("/me")
-async def get_current_user():
-    """Obtener información del usuario actual (requiere autenticación)"""
-    result = await users_client.get_current_user()
+async def get_current_user(authorization: Optional[str] = Header(None)):
+    """
+    Obtener información del usuario actual (requiere autenticación).
+    Con el token verificado localmente se responde desde el usuario cacheado.
+    """
+    user_id = current_user_id()
+    if user_id:
+        result = await users_client.get_user(user_id)
+    elif authorization:
+        result = await users_client.get_current_user(authorization)
+    else:
+        raise HTTPException(status_code=401, detail={"code": "MISSING_TOKEN", "message": "Se requiere un token bearer"})
     if "error" in result:
         raise HTTPException(status_code=result.get("status_code", 500), detail=result)
     return result
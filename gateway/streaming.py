@@ -0,0 +1,123 @@
+"""Retransmisión de respuestas upstream al cliente a medida que llegan"""
+import json
+import httpx
+from fastapi.responses import StreamingResponse
+
+# Headers que describen la conexión y no deben reenviarse (RFC 7230 §6.1)
+HOP_BY_HOP_HEADERS = {
+    "connection",
+    "keep-alive",
+    "proxy-authenticate",
+    "proxy-authorization",
+    "te",
+    "trailers",
+    "transfer-encoding",
+    "upgrade",
+}
+
+
+class UpstreamStreamingResponse(StreamingResponse):
+    """StreamingResponse que cierra la respuesta upstream pase lo que pase.
+
+    Si el cliente se desconecta, Starlette abandona el generador del cuerpo sin
+    cerrarlo; el `finally` de aquí libera la conexión del pool de inmediato.
+    """
+
+    def __init__(self, upstream: httpx.Response, content, **kwargs):
+        super().__init__(content, **kwargs)
+        self.upstream = upstream
+
+    async def __call__(self, scope, receive, send):
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            await self.upstream.aclose()
+
+
+def forward_headers(headers, names) -> dict:
+    """Copia solo los headers indicados (si están presentes)"""
+    return {name: headers[name] for name in names if name in headers}
+
+
+def relay_response(response: httpx.Response) -> StreamingResponse:
+    """Devuelve la respuesta upstream al cliente bloque a bloque.
+
+    Se usan los bytes crudos (sin descomprimir), por lo que Content-Encoding y
+    Content-Length se conservan. La conexión upstream se libera al terminar o
+    si el cliente se desconecta a mitad de la descarga.
+    """
+    headers = {
+        name: value
+        for name, value in response.headers.items()
+        if name.lower() not in HOP_BY_HOP_HEADERS
+    }
+
+    async def body():
+        try:
+            async for chunk in response.aiter_raw():
+                yield chunk
+        finally:
+            await response.aclose()
+
+    return UpstreamStreamingResponse(response, body(), status_code=response.status_code, headers=headers)
+
+
+def _answer_text(body: str, text_field: str) -> str:
+    """Campo `text_field` de un JSON; el cuerpo tal cual si no es un JSON con ese campo"""
+    try:
+        payload = json.loads(body)
+    except ValueError:
+        return body
+    if isinstance(payload, dict) and isinstance(payload.get(text_field), str):
+        return payload[text_field]
+    return body
+
+
+def _data_event(text: str) -> str:
+    # Un salto de línea dentro de `data:` se expresa con varias líneas data
+    return "".join(f"data: {line}\n" for line in text.split("\n")) + "\n"
+
+
+def relay_event_stream(response: httpx.Response, text_field: str) -> StreamingResponse:
+    """Retransmite una respuesta upstream como Server-Sent Events.
+
+    - `text/event-stream`: los eventos pasan tal cual a medida que llegan.
+    - JSON: se espera el cuerpo completo (un fragmento de JSON no sirve de nada) y
+      se envía un único evento con el campo `text_field`.
+    - Otro contenido (p. ej. texto chunked): cada bloque se envía como un evento
+      `data:` apenas llega.
+    Salvo en el primer caso, se termina con `event: done`.
+
+    Si el cliente se desconecta se cierra la respuesta upstream (ver
+    `UpstreamStreamingResponse`): se corta la conexión y el backend deja de generar.
+    """
+    content_type = response.headers.get("content-type", "")
+    upstream_sse = content_type.startswith("text/event-stream")
+    upstream_json = "json" in content_type
+
+    async def events():
+        try:
+            if upstream_sse:
+                async for chunk in response.aiter_raw():
+                    yield chunk
+                return
+            if upstream_json:
+                await response.aread()
+                text = _answer_text(response.text, text_field)
+                if text:
+                    yield _data_event(text)
+            else:
+                async for text in response.aiter_text():
+                    if text:
+                        yield _data_event(text)
+            yield f"event: done\ndata: {json.dumps({'status_code': response.status_code})}\n\n"
+        finally:
+            await response.aclose()
+
+    return UpstreamStreamingResponse(
+        response,
+        events(),
+        status_code=response.status_code,
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
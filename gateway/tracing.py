@@ -0,0 +1,132 @@
+"""Trazas distribuidas W3C (traceparent): span del gateway y spans hijos por llamada a backend"""
+import contextvars
+import json
+import logging
+import random
+import re
+import sys
+import time
+from typing import Optional
+
+from config import settings
+
+logger = logging.getLogger("gateway.trace")
+# Los spans van a stdout como JSON, una línea por span, para que los recoja el colector de logs
+if not logger.handlers:
+    _handler = logging.StreamHandler(sys.stdout)
+    _handler.setFormatter(logging.Formatter("%(message)s"))
+    logger.addHandler(_handler)
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+
+_TRACEPARENT = re.compile(r"^00-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$")
+
+
+class SpanContext:
+    __slots__ = ("trace_id", "span_id", "sampled")
+
+    def __init__(self, trace_id: str, span_id: str, sampled: bool):
+        self.trace_id = trace_id
+        self.span_id = span_id
+        self.sampled = sampled
+
+    def traceparent(self, span_id: Optional[str] = None) -> str:
+        return f"00-{self.trace_id}-{span_id or self.span_id}-{'01' if self.sampled else '00'}"
+
+
+_current_span: contextvars.ContextVar[Optional[SpanContext]] = contextvars.ContextVar("gateway_span", default=None)
+_current_scope: contextvars.ContextVar[Optional[dict]] = contextvars.ContextVar("gateway_scope", default=None)
+
+
+def new_span_id() -> str:
+    return f"{random.getrandbits(64):016x}"
+
+
+def current_span() -> Optional[SpanContext]:
+    return _current_span.get()
+
+
+def current_route() -> str:
+    """Plantilla de la ruta del gateway que originó la llamada (cardinalidad acotada para métricas)"""
+    scope = _current_scope.get()
+    if scope is None:
+        return "background"
+    route = scope.get("route")
+    return getattr(route, "path", None) or "unmatched"
+
+
+def export_span(name: str, span: SpanContext, span_id: str, parent_id: Optional[str], started: float, **attributes):
+    """Los spans muestreados se emiten como una línea JSON en el logger gateway.trace"""
+    logger.info(json.dumps({
+        "trace_id": span.trace_id,
+        "span_id": span_id,
+        "parent_id": parent_id,
+        "name": name,
+        "start": started,
+        "duration_ms": round((time.time() - started) * 1000, 3),
+        **attributes,
+    }))
+
+
+class TracingMiddleware:
+    """
+    Abre el span del gateway para cada request HTTP. Continúa el `traceparent`
+    entrante si lo hay; si no, inicia una traza solo con probabilidad
+    `settings.trace_sample_ratio` (con 0 no se genera nada por request).
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        parent_id = None
+        span = None
+        for name, value in scope["headers"]:
+            if name == b"traceparent":
+                match = _TRACEPARENT.match(value.decode("latin-1").strip().lower())
+                if match:
+                    parent_id = match.group(2)
+                    span = SpanContext(match.group(1), new_span_id(), match.group(3) == "01")
+                break
+        if span is None and settings.trace_sample_ratio > 0 and random.random() < settings.trace_sample_ratio:
+            span = SpanContext(f"{random.getrandbits(128):032x}", new_span_id(), True)
+
+        scope_token = _current_scope.set(scope)
+        if span is None:
+            try:
+                await self.app(scope, receive, send)
+            finally:
+                _current_scope.reset(scope_token)
+            return
+
+        span_token = _current_span.set(span)
+        started = time.time()
+        status = {"code": 500}
+
+        async def send_with_trace(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+                headers = list(message.get("headers", []))
+                headers.append((b"traceparent", span.traceparent().encode("latin-1")))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_trace)
+        finally:
+            _current_span.reset(span_token)
+            _current_scope.reset(scope_token)
+            if span.sampled:
+                export_span(
+                    "gateway " + scope["method"],
+                    span,
+                    span.span_id,
+                    parent_id,
+                    started,
+                    kind="server",
+                    route=getattr(scope.get("route"), "path", scope["path"]),
+                    status=status["code"],
+                )
@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# El gateway se ejecuta desde su carpeta (imports de nivel superior: `from config import settings`)
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "gateway"))
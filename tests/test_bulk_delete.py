@@ -0,0 +1,90 @@
+import uuid
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app.config import settings
+from app.db import Base
+from app.events import event_bus
+from app.models import File as FileModel
+from app.routers.files import delete_files
+
+
+@pytest.fixture
+async def session():
+    # UPDATE ... RETURNING también existe en SQLite (>= 3.35): alcanza para probar el recorrido por bloques
+    engine = create_async_engine("sqlite+aiosqlite://")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    async with async_sessionmaker(engine, expire_on_commit=False, class_=AsyncSession)() as session:
+        yield session
+    await engine.dispose()
+
+
+async def _add_files(session, thread_id, count):
+    session.add_all([
+        FileModel(
+            id=uuid.uuid4(),
+            filename=f"f{i}.txt",
+            mime_type="text/plain",
+            size=1,
+            bucket="files",
+            object_key=f"{thread_id}/{uuid.uuid4()}",
+            thread_id=thread_id,
+            checksum_sha256="0" * 64,
+        )
+        for i in range(count)
+    ])
+    await session.commit()
+
+
+async def _alive(session, thread_id):
+    return await session.scalar(
+        select(func.count()).select_from(FileModel).where(FileModel.thread_id == thread_id, FileModel.deleted_at.is_(None))
+    )
+
+
+async def test_deletes_in_chunks_and_publishes_each_chunk(session, monkeypatch):
+    monkeypatch.setattr(settings, "bulk_delete_chunk_size", 2)
+    published = []
+
+    async def publish_many(routing_key, payloads):
+        published.append([payload["data"]["file_id"] for payload in payloads])
+
+    monkeypatch.setattr(event_bus, "publish_many", publish_many)
+    await _add_files(session, "t1", 5)
+    await _add_files(session, "t2", 1)
+
+    assert await delete_files(message_id=None, thread_id="t1", session=session) == {"deleted": 5}
+    assert [len(chunk) for chunk in published] == [2, 2, 1]
+    assert len({file_id for chunk in published for file_id in chunk}) == 5
+    assert await _alive(session, "t1") == 0
+    assert await _alive(session, "t2") == 1
+
+
+async def test_failed_publish_rolls_back_the_chunk_and_reports_progress(session, monkeypatch):
+    monkeypatch.setattr(settings, "bulk_delete_chunk_size", 2)
+    calls = []
+
+    async def publish_many(routing_key, payloads):
+        calls.append(len(payloads))
+        if len(calls) == 2:
+            raise ConnectionError("broker caído")
+
+    monkeypatch.setattr(event_bus, "publish_many", publish_many)
+    await _add_files(session, "t1", 5)
+
+    with pytest.raises(HTTPException) as error:
+        await delete_files(message_id=None, thread_id="t1", session=session)
+    assert error.value.status_code == 503
+    assert error.value.detail["deleted"] == 2
+    # El bloque cuyo evento no salió sigue vivo: reintentar lo borra y lo publica
+    assert await _alive(session, "t1") == 3
+
+
+async def test_requires_a_filter(session):
+    with pytest.raises(HTTPException) as error:
+        await delete_files(message_id=None, thread_id=None, session=session)
+    assert error.value.status_code == 400
@@ -0,0 +1,76 @@
+import uuid
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy.dialects import postgresql
+
+from app.config import settings
+from app.models import File as FileModel
+from app.routers.files import lookup_files
+from app.schemas import FileLookupIn
+
+
+class RecordingSession:
+    """Sesión que guarda las sentencias ejecutadas y devuelve filas fijas (el lookup usa ARRAY de PostgreSQL)"""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.statements = []
+
+    async def execute(self, statement):
+        self.statements.append(statement)
+        return self
+
+    def scalars(self):
+        return self
+
+    def all(self):
+        return self.rows
+
+
+def _file(message_id):
+    return FileModel(id=uuid.uuid4(), message_id=message_id, filename="a.txt", bucket="files", object_key="k")
+
+
+def _sql(session):
+    return str(session.statements[0].compile(dialect=postgresql.dialect()))
+
+
+async def test_lookup_is_one_statement_with_array_parameters():
+    first, second = _file("m1"), _file("m1")
+    missing = uuid.uuid4()
+    session = RecordingSession([first, second])
+    body = FileLookupIn(message_ids=["m1", "m2", "m1"], file_ids=[first.id, missing])
+
+    result = await lookup_files(body, session=session)
+
+    assert len(session.statements) == 1
+    assert _sql(session).count("= ANY (") == 2
+    # Cada mensaje pedido aparece una vez, aunque no tenga archivos
+    assert result["messages"] == {"m1": [first, second], "m2": []}
+    assert result["files"] == [first]
+    assert result["missing_file_ids"] == [missing]
+
+
+async def test_lookup_sql_does_not_depend_on_the_number_of_ids():
+    few, many = RecordingSession([]), RecordingSession([])
+    await lookup_files(FileLookupIn(message_ids=["m1"]), session=few)
+    await lookup_files(FileLookupIn(message_ids=[f"m{i}" for i in range(100)]), session=many)
+    assert _sql(few) == _sql(many)
+
+
+@pytest.mark.parametrize(
+    ("body", "code"),
+    [
+        (FileLookupIn(), "MISSING_FILTER"),
+        (FileLookupIn(message_ids=["m1", "m2", "m3"]), "TOO_MANY_IDS"),
+    ],
+)
+async def test_lookup_rejects_invalid_requests(monkeypatch, body, code):
+    monkeypatch.setattr(settings, "lookup_max_ids", 2)
+    session = RecordingSession([])
+    with pytest.raises(HTTPException) as error:
+        await lookup_files(body, session=session)
+    assert error.value.status_code == 400
+    assert error.value.detail["code"] == code
+    assert session.statements == []
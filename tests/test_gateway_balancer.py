@@ -0,0 +1,26 @@
+from balancer import EJECTED, HEALTHY
+from clients.base import BaseClient
+
+
+def _client():
+    client = BaseClient("http://a,http://b", name="balancer-test")
+    BaseClient.instances.remove(client)
+    return client
+
+
+def test_overloaded_replica_is_not_ejected():
+    client = _client()
+    endpoint = client.balancer.endpoints[0]
+    for _ in range(client.balancer.failure_threshold * 2):
+        endpoint.in_flight += 1
+        client._release(endpoint, 503)
+    assert endpoint.state == HEALTHY
+
+
+def test_broken_replica_is_ejected():
+    client = _client()
+    endpoint = client.balancer.endpoints[0]
+    for status in [500, 503, None, 502] * client.balancer.failure_threshold:
+        endpoint.in_flight += 1
+        client._release(endpoint, status)
+    assert endpoint.state == EJECTED
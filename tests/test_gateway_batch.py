@@ -0,0 +1,79 @@
+import httpx
+import pytest
+from fastapi import FastAPI, HTTPException, Request
+
+import deadline
+from config import settings
+from routers import batch
+
+
+@pytest.fixture
+def gateway():
+    app = FastAPI()
+    app.add_middleware(deadline.DeadlineMiddleware)
+    app.include_router(batch.router, prefix="/gateway/batch")
+
+    @app.get("/gateway/echo")
+    async def echo(request: Request):
+        return {"headers": dict(request.headers), "in_batch": batch._in_batch.get()}
+
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app), base_url="http://gateway")
+
+
+async def _batch(gateway, items, **kwargs):
+    response = await gateway.post("/gateway/batch", json={"requests": items}, **kwargs)
+    assert response.status_code == 200
+    return response.json()["responses"]
+
+
+@pytest.mark.parametrize(
+    "path",
+    [
+        "/gateway/batch",
+        "/gateway/x/../batch",
+        "/gateway/batc%68",
+        "/gateway/batc%2568",
+        "/gateway/x/%2e%2e/batch",
+        "/gateway/files/x/conten%74",
+        "/gateway/files/x/content/",
+        "/gateway/chat/wiki/stream",
+        "//other/gateway/echo",
+        "http://other/gateway/echo",
+        "/users/1",
+    ],
+)
+async def test_disallowed_paths_are_rejected_after_normalization(gateway, path):
+    [response] = await _batch(gateway, [{"path": path}])
+    assert response["status"] == 400
+    assert response["body"]["detail"]["code"] == "INVALID_PATH"
+
+
+async def test_sub_requests_run_marked_and_keep_the_batch_identity(gateway):
+    [response] = await _batch(
+        gateway,
+        [{"path": "/gateway/echo", "headers": {"Authorization": "Bearer otro", settings.deadline_header: "999999", "x-extra": "1"}}],
+        headers={"authorization": "Bearer original", settings.deadline_header: "5000"},
+    )
+    assert response["status"] == 200
+    body = response["body"]
+    assert body["in_batch"] is True
+    assert body["headers"]["authorization"] == "Bearer original"
+    assert body["headers"]["x-extra"] == "1"
+    assert int(body["headers"][settings.deadline_header.lower()]) <= 5000
+
+
+async def test_nested_batch_is_rejected():
+    token = batch._in_batch.set(True)
+    try:
+        with pytest.raises(HTTPException) as error:
+            await batch.run_batch(batch.BatchRequest(requests=[]), request=None)
+    finally:
+        batch._in_batch.reset(token)
+    assert error.value.detail["code"] == "NESTED_BATCH"
+
+
+async def test_almost_expired_deadline_is_forwarded_as_at_least_one_ms(gateway, monkeypatch):
+    # Al despachar la sub-request solo quedan 0,5 ms del plazo del lote
+    monkeypatch.setattr(deadline, "remaining", lambda: 0.0005)
+    [response] = await _batch(gateway, [{"path": "/gateway/echo"}])
+    assert response["body"]["headers"][settings.deadline_header.lower()] == "1"
@@ -0,0 +1,50 @@
+import asyncio
+import time
+
+import httpx
+import pytest
+
+from clients.base import BaseClient
+from resilience import HALF_OPEN, OPEN
+
+
+@pytest.fixture
+def client():
+    started = asyncio.Event()
+
+    async def handler(request):
+        started.set()
+        await asyncio.sleep(10)
+        return httpx.Response(200)
+
+    client = BaseClient("http://backend", name="breaker-test")
+    client._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    client.started = started
+    # Circuito abierto con el tiempo de espera ya cumplido: la próxima llamada es la sonda
+    client.breaker.state = OPEN
+    client.breaker.opened_at = time.monotonic() - client.breaker.open_seconds
+    yield client
+    BaseClient.instances.remove(client)
+
+
+async def _cancel_probe(client, call):
+    probe = asyncio.create_task(call)
+    await client.started.wait()
+    assert client.breaker.state == HALF_OPEN
+    probe.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await probe
+
+
+async def test_cancelled_half_open_probe_releases_its_slot(client):
+    await _cancel_probe(client, client.post("/items"))
+
+    assert client.breaker.state == HALF_OPEN
+    assert client.breaker.allow()
+
+
+async def test_cancelled_half_open_stream_probe_releases_its_slot(client):
+    await _cancel_probe(client, client.stream("GET", "/items"))
+
+    assert client.in_flight == 0
+    assert client.breaker.allow()
@@ -0,0 +1,46 @@
+import asyncio
+import contextvars
+
+import httpx
+import pytest
+
+import auth
+from cache import response_cache
+from clients.base import BaseClient
+
+
+class UserScopedClient(BaseClient):
+    user_id_header = "X-User-Id"
+
+
+@pytest.fixture
+def client():
+    async def handler(request):
+        await asyncio.sleep(0.05)
+        return httpx.Response(200, json={"user": request.headers.get("X-User-Id")})
+
+    client = UserScopedClient("http://backend", name="user-scoped-test")
+    client._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    yield client
+    BaseClient.instances.remove(client)
+
+
+def _as_user(user_id, call):
+    context = contextvars.copy_context()
+    context.run(auth._claims.set, {"sub": user_id})
+    return asyncio.create_task(call(), context=context)
+
+
+async def test_concurrent_gets_are_not_shared_between_users(client):
+    first = _as_user("ana", lambda: client.get("/messages"))
+    second = _as_user("bruno", lambda: client.get("/messages"))
+    assert await first == {"user": "ana"}
+    assert await second == {"user": "bruno"}
+
+
+async def test_cached_get_is_per_user_and_invalidated_for_all(client):
+    assert await _as_user("ana", lambda: client.get("/messages", cache_ttl=60)) == {"user": "ana"}
+    assert await _as_user("bruno", lambda: client.get("/messages", cache_ttl=60)) == {"user": "bruno"}
+    assert len([key for key in response_cache._entries if key.startswith(f"{client.name}:")]) == 2
+    client.invalidate("/messages")
+    assert not [key for key in response_cache._entries if key.startswith(f"{client.name}:")]
@@ -0,0 +1,109 @@
+import asyncio
+import contextvars
+import time
+
+import httpx
+import pytest
+from fastapi import FastAPI
+
+import deadline
+from balancer import HEALTHY
+from cache import response_cache
+from clients.base import BaseClient
+from config import settings
+from resilience import CLOSED
+
+
+class SlowTransport(httpx.AsyncBaseTransport):
+    """Backend lento que respeta el timeout de lectura de cada request, como uno real"""
+
+    def __init__(self, delay: float):
+        self.delay = delay
+        self.seen_deadlines = []
+
+    async def handle_async_request(self, request):
+        self.seen_deadlines.append(request.headers.get("X-Request-Timeout-Ms"))
+        read_timeout = request.extensions.get("timeout", {}).get("read")
+        if read_timeout is not None and read_timeout < self.delay:
+            await asyncio.sleep(read_timeout)
+            raise httpx.ReadTimeout("timed out", request=request)
+        await asyncio.sleep(self.delay)
+        return httpx.Response(200, json={"ok": True})
+
+
+@pytest.fixture
+def slow():
+    transport = SlowTransport(delay=0.3)
+    client = BaseClient("http://a,http://b", name="deadline-test")
+    client._client = httpx.AsyncClient(transport=transport)
+    client.transport = transport
+    yield client
+    BaseClient.instances.remove(client)
+
+
+def _with_deadline(budget: float, call):
+    context = contextvars.copy_context()
+    context.run(deadline._deadline.set, time.monotonic() + budget)
+    return asyncio.create_task(call(), context=context)
+
+
+async def test_short_client_deadline_does_not_trip_breaker_or_eject(slow):
+    for _ in range(slow.breaker.failure_threshold + 1):
+        result = await _with_deadline(0.05, lambda: slow.post("/items", json={}))
+        assert result["status_code"] == 504
+        assert result.get("deadline_exceeded")
+    assert slow.breaker.state == CLOSED
+    assert all(endpoint.state == HEALTHY for endpoint in slow.balancer.endpoints)
+    assert all(endpoint.in_flight == 0 for endpoint in slow.balancer.endpoints)
+    # Sin plazo corto, la siguiente request llega al backend
+    assert await slow.post("/items", json={}) == {"ok": True}
+
+
+async def test_backend_timeout_still_counts_as_failure(slow):
+    slow._client = httpx.AsyncClient(transport=slow.transport, timeout=0.05)
+    for _ in range(slow.breaker.failure_threshold):
+        result = await _with_deadline(5, lambda: slow.post("/items", json={}))
+        assert result["status_code"] == 500
+    assert slow.breaker.state != CLOSED
+
+
+async def test_shared_load_is_bounded_by_the_leader_deadline(slow):
+    response_cache.invalidate_prefix(f"{slow.name}:")
+    result = await _with_deadline(0.05, lambda: slow.get("/items"))
+    assert result.get("deadline_exceeded")
+    assert int(slow.transport.seen_deadlines[-1]) <= 50
+
+
+@pytest.fixture
+def echo_deadline():
+    app = FastAPI()
+    app.add_middleware(deadline.DeadlineMiddleware)
+
+    @app.get("/left")
+    async def left():
+        return {"left": deadline.remaining()}
+
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app), base_url="http://gateway")
+
+
+@pytest.mark.parametrize(
+    ("header", "expected"),
+    [
+        (None, 30.0),  # sin cabecera: el plazo por defecto
+        ("200", 0.2),  # el cliente puede acortarlo
+        ("600000", 30.0),  # pero no alargarlo más allá del máximo
+        ("0", 30.0),  # 0 o valores inválidos se ignoran
+        ("abc", 30.0),
+    ],
+)
+async def test_request_timeout_header_sets_the_deadline(echo_deadline, monkeypatch, header, expected):
+    monkeypatch.setattr(settings, "request_deadline_seconds", 30.0)
+    headers = {settings.deadline_header: header} if header else {}
+    left = (await echo_deadline.get("/left", headers=headers)).json()["left"]
+    assert expected - 0.1 < left <= expected
+
+
+async def test_backend_receives_the_remaining_deadline(slow):
+    slow.transport.delay = 0
+    assert await _with_deadline(0.2, lambda: slow.post("/items", json={})) == {"ok": True}
+    assert 0 < int(slow.transport.seen_deadlines[-1]) <= 200
@@ -0,0 +1,66 @@
+import httpx
+import pytest
+from fastapi import FastAPI
+
+from clients.files import files_client
+from routers import files
+
+CONTENT = b"0123456789"
+
+
+class Body(httpx.AsyncByteStream):
+    """Cuerpo en streaming, como el de un backend real (no precargado en memoria)"""
+
+    def __init__(self, data: bytes):
+        self.data = data
+
+    async def __aiter__(self):
+        for start in range(0, len(self.data), 4):
+            yield self.data[start:start + 4]
+
+
+@pytest.fixture
+def gateway(monkeypatch):
+    seen = []
+
+    def handler(request):
+        seen.append(request.headers)
+        if request.headers.get("if-none-match") == '"v1"':
+            return httpx.Response(304, headers={"etag": '"v1"'}, stream=Body(b""))
+        if request.headers.get("range") == "bytes=2-5":
+            return httpx.Response(
+                206,
+                stream=Body(CONTENT[2:6]),
+                headers={"content-range": "bytes 2-5/10", "etag": '"v1"'},
+            )
+        return httpx.Response(200, stream=Body(CONTENT), headers={"etag": '"v1"'})
+
+    monkeypatch.setattr(files_client, "_client", httpx.AsyncClient(transport=httpx.MockTransport(handler)))
+    app = FastAPI()
+    app.include_router(files.router, prefix="/gateway/files")
+    gateway = httpx.AsyncClient(transport=httpx.ASGITransport(app), base_url="http://gateway")
+    gateway.seen = seen
+    return gateway
+
+
+async def test_range_request_is_relayed_as_partial_content(gateway):
+    response = await gateway.get("/gateway/files/f1/content", headers={"Range": "bytes=2-5", "Cookie": "s=1"})
+    assert response.status_code == 206
+    assert response.content == CONTENT[2:6]
+    assert response.headers["content-range"] == "bytes 2-5/10"
+    # Solo los headers de rango/condicionales llegan al servicio de archivos
+    assert gateway.seen[-1]["range"] == "bytes=2-5"
+    assert "cookie" not in gateway.seen[-1]
+
+
+async def test_conditional_request_is_relayed_as_not_modified(gateway):
+    response = await gateway.get("/gateway/files/f1/content", headers={"If-None-Match": '"v1"'})
+    assert response.status_code == 304
+    assert response.content == b""
+
+
+async def test_full_download_streams_the_whole_body(gateway):
+    response = await gateway.get("/gateway/files/f1/content")
+    assert response.status_code == 200
+    assert response.content == CONTENT
+    assert response.headers["etag"] == '"v1"'
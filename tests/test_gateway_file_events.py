@@ -0,0 +1,33 @@
+from file_events import FileEventHub
+
+
+def _event(thread_id, file_id="f1"):
+    return {"type": "files.added.v1", "data": {"file_id": file_id, "thread_id": thread_id}}
+
+
+def test_events_reach_only_subscribers_of_their_thread():
+    hub = FileEventHub(max_queue=10)
+    mine = hub.subscribe(thread_id="t1")
+    other = hub.subscribe(thread_id="t2")
+    hub.dispatch(_event("t1"))
+    assert mine.queue.get_nowait()["data"]["thread_id"] == "t1"
+    assert other.queue.empty()
+
+
+def test_slow_subscriber_is_dropped_with_an_end_marker():
+    hub = FileEventHub(max_queue=2)
+    slow = hub.subscribe(thread_id="t1")
+    for index in range(3):
+        hub.dispatch(_event("t1", file_id=f"f{index}"))
+    assert slow.dropped
+    # Solo queda la marca de fin: el stream cierra con `event: dropped`
+    assert slow.queue.get_nowait() is None
+    assert hub.subscriber_count() == 0
+
+
+def test_unsubscribe_removes_empty_keys():
+    hub = FileEventHub(max_queue=2)
+    subscription = hub.subscribe(thread_id="t1", message_id="m1")
+    hub.unsubscribe(subscription)
+    assert hub.subscriber_count() == 0
+    assert hub._subscribers == {}
@@ -0,0 +1,53 @@
+import asyncio
+
+from clients.presence import presence_client
+from heartbeats import HeartbeatAggregator
+
+
+def _recording(monkeypatch, release=None):
+    sent = []
+
+    async def update_status(user_id, heartbeat=False):
+        sent.append(user_id)
+        if release is not None:
+            await release.wait()
+        return {"ok": True}
+
+    monkeypatch.setattr(presence_client, "update_status", update_status)
+    return sent
+
+
+async def test_heartbeats_of_a_user_are_coalesced(monkeypatch):
+    sent = _recording(monkeypatch)
+    aggregator = HeartbeatAggregator(flush_seconds=60, concurrency=4, max_pending=100)
+    for _ in range(5):
+        aggregator.record("ana")
+    aggregator.record("bruno")
+    await aggregator.flush()
+    assert sorted(sent) == ["ana", "bruno"]
+    assert len(aggregator) == 0
+
+
+async def test_status_change_drops_pending_heartbeat(monkeypatch):
+    sent = _recording(monkeypatch)
+    aggregator = HeartbeatAggregator(flush_seconds=60, concurrency=4, max_pending=100)
+    aggregator.record("ana")
+    await aggregator.discard("ana")
+    await aggregator.flush()
+    assert sent == []
+
+
+async def test_status_change_waits_for_the_heartbeat_in_flight(monkeypatch):
+    release = asyncio.Event()
+    sent = _recording(monkeypatch, release)
+    aggregator = HeartbeatAggregator(flush_seconds=60, concurrency=4, max_pending=100)
+    aggregator.record("ana")
+    flush = asyncio.create_task(aggregator.flush())
+    await asyncio.sleep(0.01)
+    assert sent == ["ana"]
+    discard = asyncio.create_task(aggregator.discard("ana"))
+    await asyncio.sleep(0.01)
+    # El cambio de estado no sale hasta que termina el heartbeat viejo
+    assert not discard.done()
+    release.set()
+    await asyncio.gather(flush, discard)
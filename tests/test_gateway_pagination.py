@@ -0,0 +1,44 @@
+import asyncio
+import contextvars
+import json
+
+from starlette.responses import Response
+
+import auth
+from pagination import PagePrefetcher, page_key
+
+
+def _page(cursor=None, marker=""):
+    return Response(content=json.dumps({"items": [marker], "next_cursor": cursor}), media_type="application/json")
+
+
+def _as_user(user_id, call):
+    context = contextvars.copy_context()
+    context.run(auth._claims.set, {"sub": user_id})
+    return context.run(call)
+
+
+async def _schedule_as(prefetcher, user_id):
+    async def loader(cursor):
+        # El loader corre con la identidad de quien programó el prefetch
+        return _page(marker=auth.current_user_id())
+
+    _as_user(user_id, lambda: prefetcher.schedule("t1", 20, _page(cursor="c2"), loader))
+    await asyncio.sleep(0)
+
+
+async def test_prefetched_page_is_only_served_to_its_user():
+    prefetcher = PagePrefetcher(ttl=60, per_thread=2, max_bytes=1 << 20)
+    await _schedule_as(prefetcher, "ana")
+
+    assert await _as_user("bruno", lambda: prefetcher.take(page_key("t1", 20, "c2"))) is None
+    page = await _as_user("ana", lambda: prefetcher.take(page_key("t1", 20, "c2")))
+    assert json.loads(page.body)["items"] == ["ana"]
+    assert page.headers["X-Gateway-Prefetch"] == "hit"
+
+
+async def test_per_thread_limit_is_counted_per_user():
+    prefetcher = PagePrefetcher(ttl=60, per_thread=1, max_bytes=1 << 20)
+    await _schedule_as(prefetcher, "ana")
+    await _schedule_as(prefetcher, "bruno")
+    assert len(prefetcher) == 2
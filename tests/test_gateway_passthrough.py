@@ -0,0 +1,30 @@
+import httpx
+import pytest
+
+from clients.base import BaseClient, UpstreamError
+
+
+@pytest.fixture
+def client():
+    def handler(request):
+        if request.url.path == "/missing":
+            return httpx.Response(404, json={"detail": "no existe"})
+        return httpx.Response(200, content=b'{"items": [1, 2]}', headers={"content-type": "application/json; charset=utf-8"})
+
+    client = BaseClient("http://backend", name="passthrough-test")
+    client._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    yield client
+    BaseClient.instances.remove(client)
+
+
+async def test_raw_get_returns_backend_bytes_untouched(client):
+    response = await client.get("/items", raw=True)
+    assert response.body == b'{"items": [1, 2]}'
+    assert response.status_code == 200
+    assert response.media_type == "application/json; charset=utf-8"
+
+
+async def test_raw_get_errors_raise_upstream_error(client):
+    with pytest.raises(UpstreamError) as error:
+        await client.get("/missing", raw=True)
+    assert error.value.status_code == 404
@@ -0,0 +1,55 @@
+import asyncio
+
+import httpx
+import pytest
+
+import metrics
+from clients.base import BaseClient
+from config import settings
+
+
+@pytest.fixture
+def pool_settings(monkeypatch):
+    monkeypatch.setattr(settings, "http_max_connections", 100)
+    monkeypatch.setattr(settings, "http_max_keepalive_connections", 20)
+    monkeypatch.setattr(settings, "http_pool_limits_raw", "files=50:10, messages=30,bogus")
+
+
+def test_pool_limits_apply_per_backend_overrides(pool_settings):
+    assert settings.pool_limits("files") == (50, 10)
+    # Sin keep-alive explícito se acota al valor global
+    assert settings.pool_limits("messages") == (30, 20)
+    assert settings.pool_limits("users") == (100, 20)
+
+
+async def test_client_is_built_with_its_pool_limits(pool_settings):
+    client = BaseClient("http://backend", name="files")
+    try:
+        pool = client.client._transport._pool
+        assert pool._max_connections == 50
+        assert pool._max_keepalive_connections == 10
+        assert client.client.timeout.pool == settings.http_pool_timeout
+    finally:
+        await client.close()
+        BaseClient.instances.remove(client)
+
+
+async def test_in_flight_requests_are_exported_per_backend():
+    release = asyncio.Event()
+
+    async def handler(request):
+        await release.wait()
+        return httpx.Response(200, json={})
+
+    client = BaseClient("http://backend", name="pool-test")
+    client._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    try:
+        pending = asyncio.create_task(client.post("/items", json={}))
+        await asyncio.sleep(0.01)
+        assert client.pool_stats()["in_flight"] == 1
+        assert 'gateway_upstream_in_flight{service="pool-test"} 1' in metrics.render()
+        release.set()
+        await pending
+        assert client.pool_stats()["in_flight"] == 0
+    finally:
+        BaseClient.instances.remove(client)
@@ -0,0 +1,67 @@
+import asyncio
+
+import httpx
+import pytest
+from fastapi import FastAPI
+
+from clients.search import search_client
+from config import settings
+from routers import search
+
+
+@pytest.fixture
+def gateway():
+    app = FastAPI()
+    app.include_router(search.router, prefix="/gateway/search")
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app), base_url="http://gateway")
+
+
+def _stub(monkeypatch, channels, messages, files):
+    for name, result in (("search_channels", channels), ("search_messages", messages), ("search_files", files)):
+        monkeypatch.setattr(search_client, name, result)
+
+
+async def test_failed_and_slow_sections_are_reported_in_errors(gateway, monkeypatch):
+    monkeypatch.setattr(settings, "search_deadline_seconds", 0.05)
+
+    async def channels(q, **kwargs):
+        return [{"id": "c1"}]
+
+    async def messages(q, **kwargs):
+        return {"error": "boom", "status_code": 502}
+
+    async def files(q, **kwargs):
+        await asyncio.sleep(1)
+        return []
+
+    _stub(monkeypatch, channels, messages, files)
+    response = await gateway.get("/gateway/search", params={"q": "hola"})
+    assert response.status_code == 200
+    body = response.json()
+    assert body["channels"] == [{"id": "c1"}]
+    assert body["messages"] is None and body["files"] is None
+    assert body["errors"]["messages"]["status_code"] == 502
+    assert body["errors"]["files"]["timeout"] is True
+    assert body["partial"] is True
+
+
+async def test_sections_run_in_parallel(gateway, monkeypatch):
+    async def slow(q, **kwargs):
+        await asyncio.sleep(0.1)
+        return []
+
+    _stub(monkeypatch, slow, slow, slow)
+    started = asyncio.get_running_loop().time()
+    body = (await gateway.get("/gateway/search", params={"q": "hola"})).json()
+    assert asyncio.get_running_loop().time() - started < 0.25
+    assert body["errors"] == {} and body["partial"] is False
+
+
+async def test_all_sections_failing_is_an_error(gateway, monkeypatch):
+    async def failing(q, **kwargs):
+        return {"error": "down", "status_code": 503}
+
+    _stub(monkeypatch, failing, failing, failing)
+    response = await gateway.get("/gateway/search", params={"q": "hola"})
+    assert response.status_code == 503
+    assert set(response.json()["detail"]) == {"channels", "messages", "files"}
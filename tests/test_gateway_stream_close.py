@@ -0,0 +1,45 @@
+import httpx
+import pytest
+from starlette.requests import ClientDisconnect
+
+from clients.base import BaseClient
+from streaming import relay_response
+
+
+class TrackedBody(httpx.AsyncByteStream):
+    def __init__(self):
+        self.closed = False
+
+    async def __aiter__(self):
+        yield b"parte 1"
+        yield b"parte 2"
+
+    async def aclose(self):
+        self.closed = True
+
+
+@pytest.fixture
+def client():
+    body = TrackedBody()
+    client = BaseClient("http://backend", name="stream-close-test")
+    client._client = httpx.AsyncClient(transport=httpx.MockTransport(lambda request: httpx.Response(200, stream=body)))
+    client.body = body
+    yield client
+    BaseClient.instances.remove(client)
+
+
+async def test_client_disconnect_closes_upstream_and_releases_in_flight(client):
+    upstream = await client.stream("GET", "/files/1/content")
+    assert client.in_flight == 1
+
+    async def receive():
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        if message["type"] == "http.response.body":
+            raise OSError("cliente desconectado")
+
+    with pytest.raises(ClientDisconnect):
+        await relay_response(upstream)({"type": "http", "asgi": {"spec_version": "2.4"}}, receive, send)
+    assert client.body.closed
+    assert client.in_flight == 0
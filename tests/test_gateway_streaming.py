@@ -0,0 +1,43 @@
+import asyncio
+
+import httpx
+
+from streaming import relay_event_stream
+
+
+class GatedStream(httpx.AsyncByteStream):
+    """Cuerpo chunked cuyo segundo bloque solo sale cuando el test lo permite"""
+
+    def __init__(self):
+        self.release = asyncio.Event()
+
+    async def __aiter__(self):
+        yield b"hola"
+        await self.release.wait()
+        yield b" mundo"
+
+
+async def _relay(handler):
+    upstream = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    response = await upstream.send(upstream.build_request("POST", "http://bot/chat"), stream=True)
+    return relay_event_stream(response, "reply").body_iterator
+
+
+async def test_json_answer_is_sent_as_one_event_with_the_text_field():
+    events = await _relay(lambda request: httpx.Response(200, json={"reply": "hola\nmundo"}))
+    assert [event async for event in events] == [
+        "data: hola\ndata: mundo\n\n",
+        'event: done\ndata: {"status_code": 200}\n\n',
+    ]
+
+
+async def test_chunked_text_is_relayed_as_it_arrives():
+    body = GatedStream()
+    events = await _relay(lambda request: httpx.Response(200, headers={"content-type": "text/plain"}, stream=body))
+    # El primer bloque sale antes de que el bot termine de generar
+    assert await asyncio.wait_for(events.__anext__(), 1) == "data: hola\n\n"
+    body.release.set()
+    assert [event async for event in events] == [
+        "data:  mundo\n\n",
+        'event: done\ndata: {"status_code": 200}\n\n',
+    ]
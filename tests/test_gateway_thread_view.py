@@ -0,0 +1,95 @@
+import asyncio
+
+import httpx
+import pytest
+from fastapi import FastAPI
+
+from clients.files import files_client
+from clients.messages import messages_client
+from clients.threads import threads_client
+from clients.users import users_client
+from config import settings
+from routers import threads
+
+
+@pytest.fixture
+def gateway():
+    app = FastAPI()
+    app.include_router(threads.router, prefix="/gateway/threads")
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app), base_url="http://gateway")
+
+
+@pytest.fixture
+def calls(monkeypatch):
+    calls = {"lookups": [], "users": [], "active": 0, "peak": 0}
+
+    async def get_thread(thread_id):
+        return {"id": thread_id}
+
+    async def list_messages(thread_id, limit, cursor):
+        return {
+            "items": [
+                {"id": "m1", "user_id": "ana"},
+                {"id": "m2", "user_id": "bruno"},
+                {"id": "m3", "user_id": "ana"},
+            ],
+            "next_cursor": "c2",
+        }
+
+    async def lookup_files(message_ids):
+        calls["lookups"].append(message_ids)
+        return {"messages": {"m1": [{"id": "f1"}]}}
+
+    async def get_user(user_id):
+        calls["users"].append(user_id)
+        calls["active"] += 1
+        calls["peak"] = max(calls["peak"], calls["active"])
+        await asyncio.sleep(0.01)
+        calls["active"] -= 1
+        if user_id == "bruno":
+            return {"error": "not found", "status_code": 404}
+        return {"id": user_id}
+
+    monkeypatch.setattr(threads_client, "get_thread", get_thread)
+    monkeypatch.setattr(messages_client, "list_messages", list_messages)
+    monkeypatch.setattr(files_client, "lookup_files", lookup_files)
+    monkeypatch.setattr(users_client, "get_user", get_user)
+    return calls
+
+
+async def test_view_batches_attachments_and_dedupes_authors(gateway, calls):
+    body = (await gateway.get("/gateway/threads/t1/view")).json()
+    assert body["thread"] == {"id": "t1"}
+    assert [message["attachments"] for message in body["messages"]] == [[{"id": "f1"}], [], []]
+    assert body["next_cursor"] == "c2"
+    # Una sola consulta de adjuntos para toda la página y un GET por autor
+    assert calls["lookups"] == [["m1", "m2", "m3"]]
+    assert sorted(calls["users"]) == ["ana", "bruno"]
+
+
+async def test_failed_parts_are_reported_without_failing_the_view(gateway, calls, monkeypatch):
+    async def get_thread(thread_id):
+        return {"error": "timeout", "status_code": 504}
+
+    monkeypatch.setattr(threads_client, "get_thread", get_thread)
+    response = await gateway.get("/gateway/threads/t1/view")
+    assert response.status_code == 200
+    body = response.json()
+    assert body["thread"] is None
+    assert body["users"] == {"ana": {"id": "ana"}, "bruno": None}
+    assert body["errors"]["thread"]["status_code"] == 504
+    assert body["errors"]["users"]["bruno"]["status_code"] == 404
+
+
+async def test_user_fanout_respects_the_concurrency_limit(gateway, calls, monkeypatch):
+    monkeypatch.setattr(settings, "view_fanout_concurrency", 1)
+    await gateway.get("/gateway/threads/t1/view")
+    assert calls["peak"] == 1
+
+
+async def test_failed_message_page_fails_the_view(gateway, calls, monkeypatch):
+    async def list_messages(thread_id, limit, cursor):
+        return {"error": "down", "status_code": 503}
+
+    monkeypatch.setattr(messages_client, "list_messages", list_messages)
+    assert (await gateway.get("/gateway/threads/t1/view")).status_code == 503
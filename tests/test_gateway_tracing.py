@@ -0,0 +1,51 @@
+import httpx
+import pytest
+from fastapi import FastAPI
+
+import tracing
+from clients.base import BaseClient
+
+
+@pytest.fixture
+def backend_headers():
+    seen = []
+
+    def handler(request):
+        seen.append(request.headers.get("traceparent"))
+        return httpx.Response(200, json={})
+
+    client = BaseClient("http://backend", name="tracing-test")
+    client._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+    app = FastAPI()
+    app.add_middleware(tracing.TracingMiddleware)
+
+    @app.get("/call")
+    async def call():
+        await client.post("/items", json={})
+        span = tracing.current_span()
+        return {"span": span.span_id if span else None}
+
+    yield httpx.AsyncClient(transport=httpx.ASGITransport(app), base_url="http://gateway"), seen
+    BaseClient.instances.remove(client)
+
+
+async def test_incoming_trace_is_continued_with_a_child_span_per_backend_call(backend_headers, monkeypatch):
+    monkeypatch.setattr(tracing, "export_span", lambda *args, **kwargs: None)
+    gateway, seen = backend_headers
+    trace_id, parent_id = "4bf92f3577b34da6a3ce929d0e0e4736", "00f067aa0ba902b7"
+    response = await gateway.get("/call", headers={"traceparent": f"00-{trace_id}-{parent_id}-01"})
+    gateway_span = response.json()["span"]
+
+    version, backend_trace, backend_parent, flags = seen[0].split("-")
+    assert backend_trace == trace_id
+    # El backend cuelga de un span hijo del del gateway, no del span del cliente
+    assert backend_parent not in (parent_id, gateway_span)
+    assert flags == "01"
+
+
+async def test_untraced_request_sends_no_traceparent(backend_headers, monkeypatch):
+    monkeypatch.setattr(tracing.settings, "trace_sample_ratio", 0)
+    gateway, seen = backend_headers
+    await gateway.get("/call")
+    assert seen == [None]
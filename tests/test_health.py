@@ -0,0 +1,26 @@
+import asyncio
+import logging
+
+from app import health
+from app.events import event_bus
+
+
+async def test_readiness_does_not_open_the_broker_connection(monkeypatch):
+    async def connect():
+        raise AssertionError("/readyz no debe conectar")
+
+    monkeypatch.setattr(event_bus, "connect", connect)
+    results = await health.run_checks(0.5, {"broker": health.check_broker})
+    assert results["broker"]["status"] == "error"
+
+
+async def test_failed_warmup_is_logged(caplog):
+    async def failing(timeout):
+        raise RuntimeError("sin postgres")
+
+    warmup = asyncio.create_task(health.run_checks(0.5, {"database": failing}))
+    warmup.add_done_callback(health.log_startup_results)
+    with caplog.at_level(logging.WARNING, logger="filesvc.health"):
+        await warmup
+        await asyncio.sleep(0)
+    assert "sin postgres" in caplog.text
@@ -0,0 +1,53 @@
+import asyncio
+from datetime import datetime, timezone
+from types import SimpleNamespace
+from uuid import uuid4
+
+import pytest
+
+from app.cache import ObjectCache
+
+
+def _file():
+    return SimpleNamespace(
+        id=uuid4(),
+        object_key="k/avatar.png",
+        checksum_sha256="abc",
+        filename="avatar.png",
+        mime_type="image/png",
+        created_at=datetime.now(timezone.utc),
+    )
+
+
+async def test_cancelled_leader_does_not_cancel_coalesced_waiters():
+    cache = ObjectCache(max_bytes=1024, max_object_size=1024, ttl=60)
+    file = _file()
+    release = asyncio.Event()
+
+    async def loader():
+        await release.wait()
+        return b"png"
+
+    leader = asyncio.create_task(cache.get_or_load(file, loader))
+    await asyncio.sleep(0)
+    follower = asyncio.create_task(cache.get_or_load(file, loader))
+    await asyncio.sleep(0)
+    leader.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await leader
+    release.set()
+    assert (await follower).body == b"png"
+    assert cache.get_by_file_id(file.id).body == b"png"
+
+
+async def test_entries_read_by_file_id_expire():
+    cache = ObjectCache(max_bytes=1024, max_object_size=1024, ttl=0.01)
+    file = _file()
+
+    async def loader():
+        return b"png"
+
+    await cache.get_or_load(file, loader)
+    assert cache.get_by_file_id(file.id) is not None
+    await asyncio.sleep(0.02)
+    assert cache.get_by_file_id(file.id) is None